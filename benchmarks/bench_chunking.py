@@ -0,0 +1,105 @@
+"""
+Benchmark of word counting and chunking on a large synthetic Markdown document.
+
+Compares the original implementation (whole-text split, then a list of lines
+and a second per-line split) with src.scraper.count_words / chunk_text,
+reporting wall time and peak traced memory.
+
+Usage: python benchmarks/bench_chunking.py [--size-mb 100] [--max-words 400000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.scraper import chunk_text, count_words
+
+VOCABULARY = ["the", "request", "response", "token", "model", "parâmetro", "função", "`client.chat()`",
+              "|", "---", "```python", "def", "return", "import", "json", "stream", "a", "of"]
+
+
+def synthetic_document(size_mb: int, seed: int = 0) -> str:
+    """Builds a docs-like Markdown document of roughly size_mb megabytes."""
+    rng = random.Random(seed)
+    lines = []
+    for _ in range(2000):
+        kind = rng.random()
+        if kind < 0.1:
+            lines.append("## " + " ".join(rng.choices(VOCABULARY, k=4)))
+        elif kind < 0.2:
+            lines.append("")
+        else:
+            lines.append(" ".join(rng.choices(VOCABULARY, k=rng.randint(3, 25))))
+    block = "\n".join(lines)
+    repeats = max(1, (size_mb * 1024 * 1024) // len(block.encode("utf-8")))
+    return "\n".join([block] * repeats)
+
+
+def legacy_count_words(text: str) -> int:
+    return len(text.split())
+
+
+def legacy_chunk_text(text: str, max_words: int) -> list:
+    if len(text.split()) <= max_words:
+        return [text]
+    chunks, current_chunk, current_word_count = [], [], 0
+    for line in text.split('\n'):
+        line_word_count = len(line.split())
+        if current_word_count + line_word_count > max_words and current_chunk:
+            chunks.append('\n'.join(current_chunk))
+            current_chunk, current_word_count = [line], line_word_count
+        else:
+            current_chunk.append(line)
+            current_word_count += line_word_count
+    if current_chunk:
+        chunks.append('\n'.join(current_chunk))
+    return chunks
+
+
+def measure(label: str, trace_memory: bool, function, *args):
+    """Times function(*args); peak memory is traced in a second run, as tracing distorts timings."""
+    start = time.perf_counter()
+    result = function(*args)
+    elapsed = time.perf_counter() - start
+
+    peak_mb = "-"
+    if trace_memory:
+        tracemalloc.start()
+        function(*args)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        peak_mb = f"{peak / 1024 / 1024:.1f} MB"
+    print(f"{label:<28} {elapsed:>8.2f}s {peak_mb:>13}")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--size-mb", type=int, default=100)
+    parser.add_argument("--max-words", type=int, default=400000)
+    parser.add_argument("--no-memory", action="store_true", help="Skip the (slow) traced-memory runs")
+    args = parser.parse_args()
+    trace = not args.no_memory
+
+    text = synthetic_document(args.size_mb)
+    print(f"Document: {len(text.encode('utf-8')) / 1024 / 1024:.1f} MB, max_words={args.max_words}")
+    print(f"{'':<28} {'time':>9} {'peak mem':>13}")
+
+    legacy_words = measure("count: len(text.split())", trace, legacy_count_words, text)
+    words = measure("count: count_words", trace, count_words, text)
+    assert words == legacy_words
+
+    legacy_chunks = measure("chunk: original chunk_text", trace, legacy_chunk_text, text, args.max_words)
+    chunks = measure("chunk: chunk_text", trace, chunk_text, text, args.max_words)
+    assert chunks == legacy_chunks
+    print(f"{len(chunks)} chunks, identical output")
+
+    measure("chunk: chunk_text + bytes", trace, chunk_text, text, args.max_words, 4 * 1024 * 1024)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Benchmark of crawl frontier bookkeeping.
+
+Simulates link discovery on a docs site where every page repeats a shared
+sidebar, and compares the original list-based frontier (list.pop(0) plus
+linear `in` checks) with src.frontier.Frontier.
+
+Usage: python benchmarks/bench_frontier.py [--sizes 1000 10000 100000] [--legacy-max 10000]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.frontier import Frontier, normalize_url
+
+BASE = "https://docs.example.com/docs"
+
+
+def synthetic_links(n_pages: int, sidebar_size: int):
+    """Yields (page_index, outgoing links) for a site of n_pages pages."""
+    sidebar = [f"{BASE}/section-{i}" for i in range(sidebar_size)]
+    for page in range(n_pages):
+        own = [f"{BASE}/page-{page * 3 + k}" for k in range(1, 4) if page * 3 + k < n_pages]
+        yield own + sidebar
+
+
+def run_legacy(n_pages: int, sidebar_size: int) -> int:
+    to_visit = [BASE]
+    visited = set()
+    links = synthetic_links(n_pages, sidebar_size)
+    while to_visit:
+        current = to_visit.pop(0)
+        if current in visited:
+            continue
+        visited.add(current)
+        for full_url in next(links, []):
+            if full_url not in visited and full_url not in to_visit:
+                to_visit.append(full_url)
+    return len(visited)
+
+
+def run_frontier(n_pages: int, sidebar_size: int) -> int:
+    normalize_url.cache_clear()
+    frontier = Frontier([BASE])
+    links = synthetic_links(n_pages, sidebar_size)
+    visited = 0
+    while frontier:
+        frontier.pop()
+        visited += 1
+        for full_url in next(links, []):
+            if full_url not in frontier:
+                frontier.add(full_url)
+    return visited
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--sidebar", type=int, default=50, help="Links repeated on every page")
+    parser.add_argument("--legacy-max", type=int, default=10000,
+                        help="Largest size to run the quadratic list-based frontier on")
+    args = parser.parse_args()
+
+    print(f"{'urls':>8} {'list (s)':>10} {'Frontier (s)':>13} {'speedup':>8}")
+    for size in args.sizes:
+        start = time.perf_counter()
+        run_frontier(size, args.sidebar)
+        frontier_time = time.perf_counter() - start
+
+        if size <= args.legacy_max:
+            start = time.perf_counter()
+            run_legacy(size, args.sidebar)
+            legacy_time = time.perf_counter() - start
+            print(f"{size:>8} {legacy_time:>10.3f} {frontier_time:>13.3f} {legacy_time / frontier_time:>7.1f}x")
+        else:
+            print(f"{size:>8} {'skipped':>10} {frontier_time:>13.3f} {'-':>8}")
+
+
+if __name__ == "__main__":
+    main()
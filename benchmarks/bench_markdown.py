@@ -0,0 +1,71 @@
+"""
+Throughput benchmark of the HTML to Markdown conversion of page content.
+
+Converts the main content of synthetic documentation pages (the same as
+bench_process_page.py, plus the pages of the mock docs site) with markdownify
+and with src.fast_markdown, checks that the output is identical and reports
+the throughput of each, in pages and MB of HTML per second. Parsing is not
+timed: each converter gets its own freshly parsed trees.
+
+Usage: python benchmarks/bench_markdown.py [--pages 50] [--sections 60] [--rounds 3]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import markdownify
+from bs4 import BeautifulSoup
+
+from bench_process_page import synthetic_page
+from mock_site import SyntheticSite
+from src import fast_markdown
+from src.scraper import HTML_PARSER, _extract
+
+
+def containers(pages: list) -> list:
+    """Parses every page and returns its detached main content container, as process_page converts it."""
+    result = []
+    for url, html in pages:
+        _, main_content, _ = _extract(BeautifulSoup(html, HTML_PARSER), url)
+        result.append(main_content.extract())
+    return result
+
+
+def measure(label: str, convert, pages: list, rounds: int) -> list:
+    size_mb = sum(len(html.encode("utf-8")) for _, html in pages) / 1024 / 1024
+    best, results = None, None
+    for _ in range(rounds):
+        trees = containers(pages)
+        start = time.perf_counter()
+        results = [convert(tree) for tree in trees]
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    print(f"{label:<24} {len(pages) / best:>8.1f} pages/s {size_mb / best:>8.2f} MB/s {best:>8.3f}s best")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pages", type=int, default=50)
+    parser.add_argument("--sections", type=int, default=60, help="Content sections per synthetic page")
+    parser.add_argument("--rounds", type=int, default=3, help="Runs per converter; the best one is reported")
+    args = parser.parse_args()
+
+    site = SyntheticSite(args.pages)
+    pages = [(f"https://docs.example.com/docs/page-{i}", synthetic_page(args.sections, i)) for i in range(args.pages)]
+    pages += [(f"https://docs.example.com{site.path(i)}", site.page(i)) for i in range(args.pages)]
+    size_kb = sum(len(html) for _, html in pages) / len(pages) / 1024
+    print(f"{len(pages)} pages, {size_kb:.0f} KB each on average, parser={HTML_PARSER}")
+
+    reference = markdownify.MarkdownConverter(heading_style="ATX")
+    expected = measure("markdownify", reference.convert_soup, pages, args.rounds)
+    converted = measure("fast_markdown", fast_markdown.convert_soup, pages, args.rounds)
+    assert converted == expected
+    print("identical output")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Benchmark of per-page HTML processing on synthetic documentation pages.
+
+Compares the original process_page (find_all for links, a second traversal to
+decompose non-content tags, find for the container, then str() and a second
+parse inside markdownify) with src.scraper.process_page, which walks the tree
+once and converts it directly. Reports the mean time per page.
+
+Usage: python benchmarks/bench_process_page.py [--pages 50] [--sections 60]
+"""
+import argparse
+import logging
+import os
+import random
+import sys
+import time
+from urllib.parse import urljoin
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import markdownify
+from bs4 import BeautifulSoup
+
+from src.scraper import HTML_PARSER, process_page
+
+REMOVED_TAGS = ["nav", "footer", "header", "aside", "script", "style", "svg", "img", "noscript", "form", "iframe",
+                "video", "audio", "canvas", "map", "area", "button", "input", "select", "textarea"]
+
+
+def synthetic_page(sections: int, seed: int) -> str:
+    """Builds a docs-like page: site chrome around a main element with prose, lists, tables and code."""
+    rng = random.Random(seed)
+    nav = "".join(f'<li><a href="/docs/section-{i}">Section {i}</a></li>' for i in range(40))
+    body = []
+    for i in range(sections):
+        body.append(f'<h2 id="s{i}">Heading {i} <a href="#s{i}">#</a></h2>')
+        body.append("<p>" + " ".join(rng.choice(["the", "<code>client</code>", "request", "<em>token</em>",
+                                                    "model", "stream", "<a href='/docs/ref'>ref</a>"])
+                                     for _ in range(60)) + "</p>")
+        kind = i % 3
+        if kind == 0:
+            body.append("<ul>" + "".join(f"<li>Item {j} <strong>bold</strong></li>" for j in range(5)) + "</ul>")
+        elif kind == 1:
+            body.append("<table><thead><tr><th>Name</th><th>Type</th></tr></thead><tbody>"
+                        + "".join(f"<tr><td>param_{j}</td><td>string</td></tr>" for j in range(4))
+                        + "</tbody></table>")
+        else:
+            body.append('<pre><button class="copy">Copy</button><code>import docs\nclient = docs.Client()\n'
+                        'client.run()</code></pre>')
+        body.append('<svg width="16" height="16"><path d="M0 0h16v16H0z"/></svg>')
+    return (f"<html><head><title>Page {seed}</title><style>body {{}}</style></head><body>"
+            f"<header><nav><ul>{nav}</ul></nav></header><aside>{nav}</aside>"
+            f"<main>{''.join(body)}</main><footer>Footer <a href='/about'>About</a></footer>"
+            f"<script>window.x = 1;</script></body></html>")
+
+
+def legacy_process_page(url: str, html: str):
+    soup = BeautifulSoup(html, 'html.parser')
+    links = []
+    for a_tag in soup.find_all("a", href=True):
+        href = a_tag['href']
+        if href.startswith('#'):
+            continue
+        links.append(urljoin(url, href))
+    for tag in soup(REMOVED_TAGS):
+        tag.decompose()
+    main_content = soup.find("main") or soup.find("article") or soup.find("body") or soup
+    return markdownify.markdownify(str(main_content), heading_style="ATX").strip(), links
+
+
+def measure(label: str, function, pages: list) -> list:
+    start = time.perf_counter()
+    results = [function(url, html) for url, html in pages]
+    elapsed = time.perf_counter() - start
+    print(f"{label:<36} {elapsed / len(pages) * 1000:>8.2f} ms/page {elapsed:>8.2f}s total")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pages", type=int, default=50)
+    parser.add_argument("--sections", type=int, default=60, help="Content sections per page")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    pages = [(f"https://docs.example.com/docs/page-{i}", synthetic_page(args.sections, i)) for i in range(args.pages)]
+    size_kb = sum(len(html) for _, html in pages) / len(pages) / 1024
+    print(f"{args.pages} pages, {size_kb:.0f} KB each on average, parser={HTML_PARSER}")
+
+    legacy = measure("original process_page", legacy_process_page, pages)
+    current = measure("process_page (single walk)", process_page, pages)
+
+    if HTML_PARSER == "html.parser":
+        assert [(page.markdown, page.links) for page in current] == legacy
+        print("identical output")
+
+
+if __name__ == "__main__":
+    main()
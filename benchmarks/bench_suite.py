@@ -0,0 +1,209 @@
+"""
+End-to-end benchmark suite against local synthetic documentation sites.
+
+Serves synthetic docs sites (see mock_site.py) from a local HTTP server with
+the given latency, then runs each scenario in a fresh process, so its peak
+RSS is its own:
+  - scrape: scrape_documentation over one site,
+  - chunk: chunk_text over a synthetic Markdown document of --chunk-mb MB,
+  - run: run_scraper over --targets sites, uploading to an in-memory Drive.
+
+For each scenario it reports throughput (pages/s, or MB/s for chunk), wall
+and CPU time, peak RSS and the CPU time of the parse/extract/convert stages
+(from the run's metrics, see src.metrics). --save-baseline stores the results;
+later runs are compared against the stored baseline and exit with status 1
+when throughput drops, or peak RSS grows, by more than --tolerance.
+
+Usage: python benchmarks/bench_suite.py [--pages 1000] [--latency-ms 20] [--scenarios scrape,chunk,run]
+       [--save-baseline | --baseline benchmarks/baseline.json]
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+from typing import Optional
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_chunking import synthetic_document
+from main import run_scraper
+from mock_site import FakeDrive, MockDocsServer, SyntheticSite
+from src.http_client import HttpClient
+from src.metrics import Metrics, get_metrics, set_metrics
+from src.scraper import chunk_text, scrape_documentation
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+DEFAULT_TOLERANCE = 0.2
+# The mock server is local: pace requests by its latency, not by politeness limits
+UNLIMITED_RATE = {"requests_per_second": 10000, "burst": 10000, "max_concurrency": 16}
+# Settings that must match for results to be comparable with a baseline
+COMPARABLE_SETTINGS = ("pages", "sections", "latency_ms", "jitter_ms", "targets", "parse_workers",
+                       "drive_latency_ms", "chunk_mb")
+
+
+def bench_scrape(settings: dict, urls: list, document: Optional[str]):
+    client = HttpClient()
+    try:
+        scrape_documentation(urls[0], client=client)
+    finally:
+        client.close()
+    return get_metrics().counter("pages", target=urls[0], outcome="emitted"), "pages/s"
+
+
+def bench_chunk(settings: dict, urls: list, document: Optional[str]):
+    chunk_text(document, max_bytes=4 * 1024 * 1024)
+    return len(document.encode("utf-8")) / 1024 / 1024, "MB/s"
+
+
+def bench_run(settings: dict, urls: list, document: Optional[str]):
+    with tempfile.TemporaryDirectory() as directory:
+        config_path = os.path.join(directory, "docs_links.json")
+        documents = [{"nome": f"Site {i}", "url_base": url, "drive_folder_id": f"folder-{i}",
+                      "rate_limit": UNLIMITED_RATE} for i, url in enumerate(urls)]
+        with open(config_path, "w", encoding="utf-8") as f:
+            json.dump({"documentacoes": documents}, f)
+        drive = FakeDrive(latency=settings["drive_latency_ms"] / 1000)
+        run_scraper(config_path, sink=drive, max_targets=len(urls), parse_workers=settings["parse_workers"])
+    # run_scraper installs its own metrics registry, which get_metrics() now returns
+    return get_metrics().totals("pages", "outcome").get("emitted", 0), "pages/s"
+
+
+SCENARIOS = {"scrape": bench_scrape, "chunk": bench_chunk, "run": bench_run}
+
+
+def _setup(name: str, settings: dict):
+    """Builds a scenario's input outside of the measurement."""
+    return synthetic_document(settings["chunk_mb"]) if name == "chunk" else None
+
+
+def _cpu_seconds() -> float:
+    """User and system CPU time of this process and of its finished children (e.g. a parse pool)."""
+    usage = [resource.getrusage(who) for who in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN)]
+    return sum(u.ru_utime + u.ru_stime for u in usage)
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def _run_scenario(name: str, settings: dict, urls: list, results):
+    logging.disable(logging.INFO)
+    set_metrics(Metrics())
+    document = _setup(name, settings)
+    cpu = _cpu_seconds()
+    started = time.perf_counter()
+    amount, unit = SCENARIOS[name](settings, urls, document)
+    elapsed = time.perf_counter() - started
+    metrics = get_metrics()
+    stages = metrics.totals("stage_seconds", "stage")
+    results.put({
+        "amount": round(amount, 2),
+        "unit": unit,
+        "rate": round(amount / elapsed, 2) if elapsed else 0.0,
+        "seconds": round(elapsed, 3),
+        "cpu_seconds": round(_cpu_seconds() - cpu, 3),
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+        "stage_cpu_seconds": {stage: round(seconds, 3) for stage, seconds in sorted(stages.items())},
+        "http_seconds": round(sum(metrics.totals("http_request_seconds", "").values()), 3),
+    })
+
+
+def run_suite(settings: dict, scenarios: list) -> dict:
+    sites = [SyntheticSite(settings["pages"], prefix=f"/site-{i}/docs", sections=settings["sections"], seed=i)
+             for i in range(settings["targets"])]
+    context = multiprocessing.get_context("spawn")
+    results = {}
+    with MockDocsServer(sites, latency=settings["latency_ms"] / 1000, jitter=settings["jitter_ms"] / 1000) as server:
+        urls = [server.url + site.prefix for site in sites]
+        for name in scenarios:
+            queue = context.Queue()
+            process = context.Process(target=_run_scenario, args=(name, settings, urls, queue))
+            process.start()
+            result = queue.get()
+            process.join()
+            results[name] = result
+            print_result(name, result)
+    return {"settings": settings, "results": results}
+
+
+def print_result(name: str, result: dict):
+    unit = result["unit"].split("/")[0]
+    stages = ", ".join(f"{stage} {seconds:.2f}s" for stage, seconds in result["stage_cpu_seconds"].items())
+    print(f"{name:<7} {result['amount']:>9.0f} {unit:<6} {result['rate']:>9.1f} {result['unit']:<8} "
+          f"{result['seconds']:>8.2f}s wall {result['cpu_seconds']:>8.2f}s CPU {result['peak_rss_mb']:>8.1f} MB RSS"
+          + (f"  [{stages}]" if stages else ""))
+
+
+def compare(report: dict, baseline: dict, tolerance: float) -> list:
+    """Prints the change of every scenario against the baseline. Returns the regressions found."""
+    changed = [key for key in COMPARABLE_SETTINGS
+               if report["settings"].get(key) != baseline.get("settings", {}).get(key)]
+    if changed:
+        print(f"Warning: settings differ from the baseline ({', '.join(changed)}); results are not comparable.")
+    regressions = []
+    for name, result in report["results"].items():
+        before = baseline.get("results", {}).get(name)
+        if before is None:
+            continue
+        rate_change = result["rate"] / before["rate"] - 1 if before["rate"] else 0.0
+        rss_change = result["peak_rss_mb"] / before["peak_rss_mb"] - 1 if before["peak_rss_mb"] else 0.0
+        print(f"{name:<7} rate {rate_change:+7.1%}  peak RSS {rss_change:+7.1%}")
+        if rate_change < -tolerance:
+            regressions.append(f"{name}: {result['rate']} {result['unit']} vs {before['rate']} in the baseline")
+        if rss_change > tolerance:
+            regressions.append(f"{name}: peak RSS {result['peak_rss_mb']} MB vs {before['peak_rss_mb']} in the baseline")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pages", type=int, default=1000, help="Pages per synthetic site (e.g. 100 to 50000)")
+    parser.add_argument("--sections", type=int, default=8, help="Content sections per page")
+    parser.add_argument("--latency-ms", type=float, default=20, help="Server latency per response")
+    parser.add_argument("--jitter-ms", type=float, default=0, help="Random extra latency, up to this much")
+    parser.add_argument("--targets", type=int, default=2, help="Sites crawled at once by the run scenario")
+    parser.add_argument("--parse-workers", type=int, help="Parse pool size for the run scenario (0 = one per core)")
+    parser.add_argument("--drive-latency-ms", type=float, default=0, help="Latency of each in-memory Drive upload")
+    parser.add_argument("--chunk-mb", type=int, default=50, help="Size of the chunk scenario's document")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="Comma-separated scenarios to run")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline results file")
+    parser.add_argument("--save-baseline", action="store_true", help="Store the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Relative slowdown or memory growth reported as a regression")
+    parser.add_argument("--output", help="Also write the results to this JSON file")
+    args = parser.parse_args()
+
+    scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = [name for name in scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(unknown)}")
+    settings = {key: getattr(args, key) for key in COMPARABLE_SETTINGS}
+    print(f"{args.pages} pages per site, {args.latency_ms:g} ms latency, {args.targets} target(s) in the run scenario")
+
+    report = run_suite(settings, scenarios)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
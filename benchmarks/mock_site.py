@@ -0,0 +1,202 @@
+"""
+Synthetic documentation sites served over local HTTP, and a stand-in Drive,
+for benchmarks that exercise the real fetch, crawl and upload paths offline.
+
+A SyntheticSite of N pages looks like a typical docs site: every page has a
+header nav listing the site's sections, a sidebar listing the pages of its
+section, breadcrumbs, a footer and scripts around a main element with prose,
+lists, tables, code blocks and a few cross links. Pages are generated on
+request from their index, so sites of 50,000 pages cost no memory up front,
+and the same page is always generated identically.
+
+MockDocsServer serves one or more sites (each under its own path prefix) from
+a threaded HTTP/1.1 server on 127.0.0.1, with keep-alive connections and an
+optional per-response latency.
+"""
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+
+# Pages listed in each section's sidebar
+PAGES_PER_SECTION = 50
+# Sections listed in the header nav of every page
+NAV_SECTIONS = 40
+
+VOCABULARY = ("the", "request", "response", "token", "model", "stream", "client", "returns", "parameter",
+              "endpoint", "object", "list", "create", "update", "delete", "limit", "a", "of", "to", "is",
+              "when", "with", "optional", "required", "default", "string", "integer", "array", "field")
+
+
+class SyntheticSite:
+    """
+    A docs site of `pages` pages under `prefix`, each with `sections` content
+    sections (about 1 KB of HTML apiece, plus the site chrome). Page 0 is the
+    home page, at prefix itself.
+    """
+
+    def __init__(self, pages: int, prefix: str = "/docs", sections: int = 8, seed: int = 0):
+        if pages < 1:
+            raise ValueError("pages must be at least 1")
+        self.pages = pages
+        self.prefix = prefix.rstrip("/")
+        self.sections = sections
+        self.seed = seed
+        self.section_count = (pages + PAGES_PER_SECTION - 1) // PAGES_PER_SECTION
+
+    def path(self, index: int) -> str:
+        if index == 0:
+            return self.prefix
+        return f"{self.prefix}/section-{index // PAGES_PER_SECTION}/page-{index}"
+
+    def resolve(self, path: str) -> Optional[int]:
+        """Returns the index of the page at path, or None if there is none."""
+        path = path.rstrip("/")
+        if path == self.prefix:
+            return 0
+        section, _, page = path[len(self.prefix) + 1:].partition("/")
+        if not (path.startswith(self.prefix + "/") and section.startswith("section-") and page.startswith("page-")):
+            return None
+        try:
+            index = int(page[len("page-"):])
+        except ValueError:
+            return None
+        if 0 < index < self.pages and section == f"section-{index // PAGES_PER_SECTION}":
+            return index
+        return None
+
+    def page(self, index: int) -> str:
+        rng = random.Random(self.seed * 1_000_003 + index)
+        section = index // PAGES_PER_SECTION
+        nav = "".join(f'<li><a href="{self.path(s * PAGES_PER_SECTION)}">Section {s}</a></li>'
+                      for s in range(min(self.section_count, NAV_SECTIONS)))
+        first = section * PAGES_PER_SECTION
+        sidebar = "".join(f'<li><a href="{self.path(i)}">Page {i}</a></li>'
+                          for i in range(first, min(first + PAGES_PER_SECTION, self.pages)))
+        body = [f"<h1>Page {index}</h1>"]
+        if index == 0:
+            # The home page links every section, so the whole site is reachable
+            body.append("<ul>" + "".join(f'<li><a href="{self.path(s * PAGES_PER_SECTION)}">Section {s}</a></li>'
+                                         for s in range(self.section_count)) + "</ul>")
+        for i in range(self.sections):
+            body.append(f'<h2 id="s{i}">{" ".join(rng.choices(VOCABULARY, k=3)).title()} <a href="#s{i}">#</a></h2>')
+            words = [f"<code>{word}</code>" if rng.random() < 0.05 else word for word in rng.choices(VOCABULARY, k=80)]
+            cross = rng.randrange(self.pages)
+            body.append(f"<p>{' '.join(words)} <a href='{self.path(cross)}'>see page {cross}</a>.</p>")
+            kind = i % 3
+            if kind == 0:
+                body.append("<ul>" + "".join(f"<li><strong>{rng.choice(VOCABULARY)}</strong> {rng.choice(VOCABULARY)}</li>"
+                                             for _ in range(5)) + "</ul>")
+            elif kind == 1:
+                body.append("<table><thead><tr><th>Name</th><th>Type</th></tr></thead><tbody>"
+                            + "".join(f"<tr><td>{rng.choice(VOCABULARY)}_{j}</td><td>string</td></tr>" for j in range(4))
+                            + "</tbody></table>")
+            else:
+                body.append(f'<pre><button class="copy">Copy</button><code>client = docs.Client()\n'
+                            f'client.{rng.choice(VOCABULARY)}(limit={rng.randrange(100)})</code></pre>')
+        return (f"<!DOCTYPE html><html><head><title>Page {index}</title>"
+                f"<link rel='stylesheet' href='/static/site.css'><style>body {{margin: 0}}</style></head><body>"
+                f"<header><nav><ul>{nav}</ul></nav></header>"
+                f"<aside><ul>{sidebar}</ul></aside>"
+                f"<main><ol class='breadcrumbs'><li><a href='{self.prefix}'>Docs</a></li>"
+                f"<li>Section {section}</li></ol>{''.join(body)}</main>"
+                f"<footer>Footer <a href='/about'>About</a></footer>"
+                f"<script>window.analytics = {{page: {index}}};</script></body></html>")
+
+
+class MockDocsServer:
+    """
+    Serves SyntheticSites on 127.0.0.1 (each under its own prefix), sleeping latency
+    seconds (plus up to jitter more) before each response. Use as a context manager.
+    """
+
+    def __init__(self, sites: List[SyntheticSite], latency: float = 0.0, jitter: float = 0.0):
+        self.sites = list(sites)
+        self.latency = latency
+        self.jitter = jitter
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                with server._lock:
+                    server.requests += 1
+                delay = server.latency + (random.uniform(0, server.jitter) if server.jitter else 0)
+                if delay:
+                    time.sleep(delay)
+                body = server.render(urlsplit(self.path).path)
+                payload = (body or "Not Found").encode("utf-8")
+                self.send_response(200 if body is not None else 404)
+                self.send_header("Content-Type", "text/html; charset=utf-8" if body is not None else "text/plain")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def render(self, path: str) -> Optional[str]:
+        for site in self.sites:
+            index = site.resolve(path)
+            if index is not None:
+                return site.page(index)
+        return None
+
+    def start(self) -> "MockDocsServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="mock-docs-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "MockDocsServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class FakeDrive:
+    """
+    Stand-in for DriveClient that keeps uploads in memory, skipping unchanged
+    content like the real client. Optionally sleeps latency seconds per upload.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.files: Dict[str, str] = {}
+        self.uploads = 0
+        self.bytes = 0
+        self._lock = threading.Lock()
+
+    def upload(self, drive_folder_id: str, file_name: str, content: str) -> dict:
+        key = f"{drive_folder_id}/{file_name}"
+        with self._lock:
+            if self.files.get(key) == content:
+                return {"id": key, "skipped": True}
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.files[key] = content
+            self.uploads += 1
+            self.bytes += len(content.encode("utf-8"))
+        return {"id": key}
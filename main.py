@@ -1,15 +1,30 @@
 import os
 import sys
+import json
 import logging
 import argparse
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import nullcontext
+from functools import partial
 
 # Ensure src directory is in path when running as a module or script
 # This helps imports when running from different locations or via Github Actions
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from src.config_parser import load_config
-from src.scraper import scrape_documentation, clean_text, chunk_text
-from src.gdrive_client import update_drive_file
+from src.config_parser import load_config, get_crawl_options
+from src.scraper import iter_documentation, iter_pages, clean_text, ChunkAssembler, PROCESSING_VERSION, create_parse_pool
+from src.gdrive_client import DriveClient, update_drive_file
+from src.http_cache import HttpCache
+from src.http_client import HttpClient, set_default_client, USER_AGENT
+from src.checkpoint import CrawlCheckpoint, checkpoint_path_for
+from src.dedup import Deduplicator
+from src.manifest import PageManifest, manifest_path_for
+from src.metrics import Metrics, ThreadProfiler, set_metrics, write_json_report
+from src.page_store import PageStore
+from src.rate_limit import RateLimiter
+from src.shards import DEFAULT_SHARD_BYTES, MANIFEST_EXTENSION, ShardBuilder
+from src.sinks import DEFAULT_UPLOAD_WORKERS, SINKS, LocalDirSink, S3Sink, UploadQueue, when_all
 
 logging.basicConfig(
     level=logging.INFO,
@@ -17,11 +32,44 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-def run_scraper(config_path="docs_links.json", target=None):
+DEFAULT_CACHE_DIR = ".docscraper_cache"
+MAX_WORDS_PER_FILE = 400000
+DEFAULT_MAX_TARGETS = 4
+DEFAULT_MAX_CONNECTIONS = 32
+
+def run_scraper(config_path="docs_links.json", target=None, cache_dir=None, incremental=False, max_bytes=None,
+                max_targets=DEFAULT_MAX_TARGETS, max_connections=DEFAULT_MAX_CONNECTIONS, parse_workers=None,
+                checkpoint_dir=None, resume=False, metrics_path=None, prometheus_path=None, profile_path=None,
+                sink=None, upload_workers=DEFAULT_UPLOAD_WORKERS):
     """
     Main orchestration function.
     Loads config, iterates over projects, scrapes them and updates Google Drive.
     If target is specified, skips any project whose 'nome' does not exactly match it.
+    Up to max_targets projects are processed at once, sharing one HTTP client that
+    keeps at most max_connections requests in flight and paces requests per host
+    (see RateLimiter; projects may override it with "rate_limit"). A failing
+    project does not stop the others; a summary of every project is logged at the end.
+    If cache_dir is given, pages are fetched with conditional GETs against an
+    HTTP cache persisted in that directory.
+    If incremental is true, each target keeps a page manifest (under cache_dir,
+    or DEFAULT_CACHE_DIR) so unchanged pages are not parsed and converted again.
+    Each uploaded file holds at most MAX_WORDS_PER_FILE words and, if max_bytes
+    is given, at most max_bytes bytes.
+    If parse_workers is given, pages are parsed and converted on a process pool
+    shared by all projects, with that many workers (0 means one per CPU core).
+    If checkpoint_dir is given, each project's crawl is checkpointed there as it
+    goes, and the checkpoint is deleted once the project is uploaded. If resume is
+    true, projects continue from their checkpoint (under checkpoint_dir, or
+    DEFAULT_CACHE_DIR) instead of starting over.
+    The run is instrumented (see src.metrics): time by stage is logged at the end,
+    and if metrics_path is given, a JSON run report with every project's result and
+    the run's metrics is written there. prometheus_path gets the metrics in the
+    Prometheus text format. If profile_path is given, the run is profiled with
+    cProfile (every project thread included) and the stats are written there.
+    Files are uploaded to sink, or to Google Drive through a DriveClient built
+    from the environment if omitted (any object with DriveClient's upload method
+    will do, such as the sinks of src.sinks). Uploads run on upload_workers
+    threads while scraping goes on, including the scrape of the next projects.
     """
     logger.info("Starting DocScraper workflow...")
     
@@ -31,57 +79,298 @@ def run_scraper(config_path="docs_links.json", target=None):
         logger.error(f"Failed to load configuration: {e}")
         return
 
+    if max_targets < 1:
+        raise ValueError("max_targets must be at least 1")
+
+    try:
+        sink = sink or DriveClient.from_env()
+    except Exception as e:
+        logger.error(f"Failed to initialize Google Drive client: {e}")
+        return
+
+    metrics = Metrics()
+    set_metrics(metrics)
+    profiler = ThreadProfiler() if profile_path else None
+    profiled = profiler.profile if profiler is not None else nullcontext
+
+    cache = HttpCache(os.path.join(cache_dir, "http_cache.sqlite")) if cache_dir else None
+    rate_limiter = RateLimiter(user_agent=USER_AGENT)
+    client = HttpClient(cache=cache, max_connections=max_connections, rate_limiter=rate_limiter)
+    set_default_client(client)
+
+    manifest_dir = (cache_dir or DEFAULT_CACHE_DIR) if incremental else None
+    if resume:
+        checkpoint_dir = checkpoint_dir or DEFAULT_CACHE_DIR
+    parse_pool = create_parse_pool(parse_workers or None) if parse_workers is not None else None
+
     documents = config.get("documentacoes", [])
     logger.info(f"Found {len(documents)} documentations to process.")
 
+    selected = []
     for doc in documents:
-        nome = doc["nome"]
-        
-        if target and nome != target:
-            logger.debug(f"Skipping {nome} (does not match target '{target}')")
+        if target and doc["nome"] != target:
+            logger.debug(f"Skipping {doc['nome']} (does not match target '{target}')")
             continue
-            
-        url_base = doc["url_base"]
-        folder_id = doc["drive_folder_id"]
+        selected.append(doc)
+
+    uploads = UploadQueue(workers=upload_workers)
 
-        logger.info(f"--- Processing: {nome} ---")
-        
+    def run_target(doc):
+        started = time.monotonic()
+        with profiled():
+            try:
+                uploaded = process_document(doc, sink, uploads, manifest_dir=manifest_dir, max_bytes=max_bytes,
+                                            parse_pool=parse_pool, checkpoint_dir=checkpoint_dir, resume=resume)
+            except Exception as e:
+                uploaded = Future()
+                uploaded.set_exception(e)
+        # The target's files may still be uploading: its result is known once they are done,
+        # while this thread moves on to the next target
+        return when_all([uploaded], partial(target_result, doc, started))
+
+    def target_result(doc, started, done):
         try:
-            logger.info(f"Starting scrape for {url_base}")
-            markdown_content = scrape_documentation(url_base)
-            
-            if not markdown_content:
-                logger.warning(f"No content extracted for {nome}. Skipping document update.")
-                continue
-                
-            markdown_content = clean_text(markdown_content)
-            quantidade_caracteres = len(markdown_content)
-            quantidade_palavras = len(markdown_content.split())
-            
-            chunks = chunk_text(markdown_content, max_words=400000)
-            logger.info(f"Extraídos {quantidade_caracteres} caracteres e {quantidade_palavras} palavras em {len(chunks)} parte(s).")
-            
-            if len(chunks) == 1:
+            result = {"nome": doc["nome"], "status": "ok", "stats": done[0].result(), "error": None}
+        except Exception as e:
+            logger.error(f"Error processing {doc['nome']}: {e}")
+            # The other targets keep running despite this error
+            result = {"nome": doc["nome"], "status": "failed",
+                      "stats": {"uploaded": 0, "skipped": 0, "duplicates": 0}, "error": str(e)}
+        result["elapsed"] = time.monotonic() - started
+        metrics.observe("target_seconds", result["elapsed"], target=doc["nome"])
+        metrics.increment("targets", status=result["status"])
+        return result
+
+    # Around the whole run: from Python 3.12 on, this one profiler sees the target and upload threads too
+    with profiled():
+        try:
+            with ThreadPoolExecutor(max_workers=max_targets, thread_name_prefix="target") as executor:
+                # map() keeps config order for the summary, whatever order targets finish in
+                pending = list(executor.map(run_target, selected))
+            results = [future.result() for future in pending]
+        finally:
+            uploads.close()
+            for host, limiter in rate_limiter.hosts().items():
+                if limiter.throttled:
+                    logger.info(f"Rate limit: {host} throttled {limiter.throttled} request(s); ended at "
+                                f"concurrency {int(limiter.limit)}, {limiter.bucket.rate:.2f} requests/s.")
+            if cache is not None:
+                logger.info(f"HTTP cache: {cache.hits} page(s) revalidated (304), "
+                            f"{cache.stores} stored, {len(cache)} cached.")
+            set_default_client(None)
+            client.close()
+            if parse_pool is not None:
+                parse_pool.shutdown()
+
+    totals = {"uploaded": 0, "skipped": 0, "duplicates": 0}
+    for result in results:
+        for key in totals:
+            totals[key] += result["stats"][key]
+
+    log_summary(results)
+    logger.info(f"Uploads: {totals['uploaded']} file(s) uploaded, {totals['skipped']} unchanged (skipped).")
+    if totals["duplicates"]:
+        logger.info(f"Dropped {totals['duplicates']} duplicate page(s).")
+    log_timings(metrics)
+
+    if metrics_path:
+        write_json_report(metrics_path, {"targets": results, "totals": totals, **metrics.report()})
+        logger.info(f"Run report written to {metrics_path}.")
+    if prometheus_path:
+        with open(prometheus_path, "w", encoding="utf-8") as f:
+            f.write(metrics.to_prometheus())
+    if profiler is not None and profiler.dump(profile_path) is not None:
+        logger.info(f"Profile written to {profile_path}.")
+    logger.info("DocScraper workflow completed.")
+    return totals
+
+def log_summary(results):
+    """Logs one line per processed target: status, elapsed time, Drive and dedup stats and error, if any."""
+    if not results:
+        return
+    width = max(len(result["nome"]) for result in results)
+    failed = sum(1 for result in results if result["status"] != "ok")
+    logger.info(f"Summary: {len(results) - failed} target(s) succeeded, {failed} failed.")
+    for result in results:
+        line = (f"  {result['nome']:<{width}}  {result['status']:<6}  {result['elapsed']:7.1f}s  "
+                f"{result['stats']['uploaded']} uploaded, {result['stats']['skipped']} skipped, "
+                f"{result['stats']['duplicates']} duplicates")
+        if result["error"]:
+            line += f"  ({result['error']})"
+        logger.info(line)
+
+def log_timings(metrics):
+    """
+    Logs where the run's time went: the parse/extract/convert stages, HTTP requests
+    (and waiting for the rate limiter) and Drive or S3 API calls, summed over every thread.
+    """
+    timings = {f"{stage} pages": seconds for stage, seconds in metrics.totals("stage_seconds", "stage").items()}
+    for label, name in (("HTTP requests", "http_request_seconds"),
+                        ("rate limit waits", "http_rate_limit_wait_seconds"),
+                        ("Drive API", "drive_request_seconds"),
+                        ("S3 API", "sink_request_seconds")):
+        seconds = sum(metrics.totals(name, "").values())
+        if seconds:
+            timings[label] = seconds
+    if timings:
+        logger.info("Time by stage: " + ", ".join(f"{label} {seconds:.1f}s" for label, seconds in timings.items()))
+
+def process_document(doc, sink, uploads, manifest_dir=None, max_bytes=None, parse_pool=None, checkpoint_dir=None,
+                     resume=False):
+    """
+    Scrapes a single documentation target and uploads the result to sink (the
+    shared DriveClient, or another sink from src.sinks) on the uploads queue:
+    one document split into "Parte N" files, or with "output": "shards", shard
+    files and a manifest (see ShardBuilder).
+    If manifest_dir is given, the scrape is incremental (see PageManifest).
+    If parse_pool is given, pages are parsed and converted on it.
+    If checkpoint_dir is given, the crawl is checkpointed (see CrawlCheckpoint);
+    with resume, it continues from the target's previous checkpoint.
+    Returns once the target is scraped, with a future that is done once its files
+    are uploaded: it gives how many files were uploaded, how many were skipped as
+    unchanged and how many duplicate pages were dropped, or the upload error.
+    """
+    nome = doc["nome"]
+    url_base = doc["url_base"]
+    folder_id = doc["drive_folder_id"]
+
+    logger.info(f"--- Processing: {nome} ---")
+
+    logger.info(f"Starting scrape for {url_base}")
+    options = get_crawl_options(doc)
+    checkpoint = None
+    if checkpoint_dir:
+        # Any change to the target's settings or to page processing invalidates the checkpoint
+        key = json.dumps([PROCESSING_VERSION, url_base, options], sort_keys=True)
+        checkpoint = CrawlCheckpoint(checkpoint_path_for(checkpoint_dir, nome), key, resume=resume)
+        if checkpoint.resumed:
+            logger.info(f"Resuming {nome} from its checkpoint ({len(checkpoint)} page(s) done).")
+        options["checkpoint"] = checkpoint
+    manifest = None
+    if manifest_dir:
+        manifest = PageManifest(manifest_path_for(manifest_dir, nome), version=PROCESSING_VERSION)
+        options["manifest"] = manifest
+    if parse_pool is not None:
+        options["parse_pool"] = parse_pool
+    deduplicator = Deduplicator()
+    options["deduplicator"] = deduplicator
+    # Converted pages wait in a temporary file, not in memory, until their turn in the output
+    page_store = PageStore()
+    options["page_store"] = page_store
+
+    stats = {"uploaded": 0, "skipped": 0, "duplicates": 0}
+    futures = []
+
+    def upload(file_name, chunk):
+        futures.append(uploads.submit(update_drive_file, folder_id, file_name, chunk, client=sink))
+
+    # Pages stream through cleaning and chunking; each chunk is uploaded as soon
+    # as it is full, so memory is bounded by the chunk size rather than the site size
+    assembler = ChunkAssembler(max_words=MAX_WORDS_PER_FILE, max_bytes=max_bytes)
+    shards = None
+    if doc.get("output") == "shards":
+        shards = ShardBuilder(nome, url_base, max_bytes=doc.get("shard_bytes", DEFAULT_SHARD_BYTES))
+    try:
+        if shards is not None:
+            for page in iter_pages(url_base, **options):
+                shards.add(page.url, clean_text(page.markdown))
+            # Unchanged shards have the same content as last time, and their upload is skipped
+            for name, content in shards.finish():
+                upload(name, content)
+        else:
+            for piece in iter_documentation(url_base, **options):
+                for chunk in assembler.feed(clean_text(piece)):
+                    # A chunk only fills up when more content follows it, so this is a multi-part upload
+                    upload(f"{nome} - Parte {assembler.chunk_count}", chunk)
+    finally:
+        stats["duplicates"] = deduplicator.dropped
+        page_store.close()
+        if shards is not None:
+            shards.close()
+        if manifest is not None:
+            manifest.close()
+        if checkpoint is not None:
+            checkpoint.close()
+
+    if shards is None:
+        # finish() yields the last chunk, preceded by one more if the last line overflowed
+        remaining = list(assembler.finish())
+        first_part = assembler.chunk_count - len(remaining) + 1
+        for part, chunk in enumerate(remaining, start=first_part):
+            if assembler.chunk_count == 1:
                 logger.info(f"Atualizando Google Drive: {nome}...")
-                update_drive_file(folder_id, nome, chunks[0])
+                upload(nome, chunk)
             else:
-                logger.info(f"Atualizando Google Drive com {len(chunks)} partes...")
-                for i, chunk in enumerate(chunks):
-                    part_name = f"{nome} - Parte {i+1}"
-                    update_drive_file(folder_id, part_name, chunk)
-            
+                upload(f"{nome} - Parte {part}", chunk)
+
+    def finish(done):
+        # Raises the error of the first failed upload, if any
+        results = [future.result() for future in done]
+        if shards is not None and len(shards):
+            # Last, so the manifest never lists a shard that is not uploaded
+            results.append(update_drive_file(folder_id, shards.manifest_name(), shards.manifest(), client=sink,
+                                             extension=MANIFEST_EXTENSION))
+        for result in results:
+            stats["skipped" if isinstance(result, dict) and result.get("skipped") else "uploaded"] += 1
+
+        # Everything is uploaded: there is nothing left to resume
+        if checkpoint is not None:
+            checkpoint.remove()
+
+        if not results:
+            logger.warning(f"No content extracted for {nome}. Skipping document update.")
+        elif shards is not None:
+            logger.info(f"Successfully processed {nome}: {len(shards)} page(s) in {shards.shard_count} shard(s).")
+        else:
+            logger.info(f"Extraídos {assembler.total_chars} caracteres e {assembler.total_words} palavras em {assembler.chunk_count} parte(s).")
             logger.info(f"Successfully processed {nome}.")
-            
-        except Exception as e:
-            logger.error(f"Error processing {nome}: {e}")
-            # Continue to next document despite error
+        return stats
 
-    logger.info("DocScraper workflow completed.")
+    return when_all(futures, finish)
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="DocScraper: Extract documentation and update Google Drive.")
     parser.add_argument("--config", default="docs_links.json", help="Path to the configuration file (default: docs_links.json)")
     parser.add_argument("--target", help="Specific documentation target to process (matches 'nome' in config). If omitted, all targets are processed.")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help=f"Directory for the HTTP cache persisted between runs (default: {DEFAULT_CACHE_DIR})")
+    parser.add_argument("--no-cache", action="store_true", help="Disable the HTTP cache and always download every page.")
+    parser.add_argument("--incremental", action="store_true", help="Reuse the Markdown of pages whose HTML is unchanged since the last run (manifests are kept in the cache directory).")
+    parser.add_argument("--max-bytes", type=int, help="Maximum size in bytes of each uploaded file, in addition to the word limit.")
+    parser.add_argument("--max-targets", type=int, default=DEFAULT_MAX_TARGETS, help=f"Number of documentation targets processed at once (default: {DEFAULT_MAX_TARGETS})")
+    parser.add_argument("--max-connections", type=int, default=DEFAULT_MAX_CONNECTIONS, help=f"Maximum HTTP requests in flight across all targets (default: {DEFAULT_MAX_CONNECTIONS})")
+    parser.add_argument("--resume", action="store_true", help="Continue each target from the checkpoint left by an interrupted run (checkpoints are kept in the cache directory).")
+    parser.add_argument("--metrics-json", help="Write a JSON run report (per-target results, counters and latency histograms) to this path.")
+    parser.add_argument("--metrics-prometheus", help="Write the run's metrics in the Prometheus text format to this path.")
+    parser.add_argument("--profile", help="Profile the run with cProfile and write the stats to this path (readable with pstats).")
+    parser.add_argument("--sink", choices=SINKS, default="drive", help="Where files are uploaded: Google Drive (default), a local directory (--output-dir) or an S3-compatible bucket (configured by S3_BUCKET, AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY and optionally S3_ENDPOINT_URL, AWS_REGION, S3_PREFIX).")
+    parser.add_argument("--output-dir", default="output", help="Directory the local sink writes to (default: output)")
+    parser.add_argument("--upload-workers", type=int, default=DEFAULT_UPLOAD_WORKERS, help=f"Number of files uploaded at once, while scraping continues (default: {DEFAULT_UPLOAD_WORKERS})")
+    parser.add_argument("--parse-workers", type=int, help="Parse and convert pages on a pool of this many processes (0 = one per CPU core). By default pages are converted in-process.")
     args = parser.parse_args()
+
+    sink = None
+    if args.sink == "local":
+        sink = LocalDirSink(args.output_dir)
+    elif args.sink == "s3":
+        try:
+            sink = S3Sink.from_env()
+        except ValueError as e:
+            parser.error(str(e))
     
-    run_scraper(config_path=args.config, target=args.target)
+    run_scraper(
+        config_path=args.config,
+        target=args.target,
+        cache_dir=None if args.no_cache else args.cache_dir,
+        incremental=args.incremental,
+        max_bytes=args.max_bytes,
+        max_targets=args.max_targets,
+        max_connections=args.max_connections,
+        parse_workers=args.parse_workers,
+        checkpoint_dir=args.cache_dir,
+        resume=args.resume,
+        metrics_path=args.metrics_json,
+        prometheus_path=args.metrics_prometheus,
+        profile_path=args.profile,
+        sink=sink,
+        upload_workers=args.upload_workers
+    )
@@ -0,0 +1,160 @@
+import hashlib
+import re
+from dataclasses import replace
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from src.crawler import PageResult
+
+# Blocks on more than this share of the pages seen so far are boilerplate
+DEFAULT_MIN_SHARE = 0.5
+# Pages seen before anything is removed; the first ones wait until then
+DEFAULT_MIN_PAGES = 10
+# Block counts are pruned every BUCKET_PAGES pages (lossy counting): a block
+# can be missed only if it is on fewer than 1 / BUCKET_PAGES of the pages
+BUCKET_PAGES = 100
+
+_LIST_ITEM = re.compile(r"[ \t]*(?:[*+-]|\d+\.) ")
+_WORD = re.compile(r"\w")
+
+
+def _line_kind(line: str) -> str:
+    if line.lstrip().startswith("```"):
+        return "code"
+    if line.startswith("#"):
+        return "heading"
+    if line.startswith("\t") or _LIST_ITEM.match(line):
+        return "list"
+    if line.startswith("|"):
+        return "table"
+    return "text"
+
+
+def split_blocks(markdown: str) -> List[Tuple[str, str]]:
+    """
+    Splits Markdown into blocks, as (block, separator after it) pairs whose
+    concatenation is the original text. Blocks are separated by blank lines,
+    and by a change of kind of line (heading, list, table, code or text), since
+    markdownify puts no blank line between a list or a line break and what
+    follows. Each heading is a block of its own; a fenced code block stays
+    whole, blank lines included.
+    """
+    blocks = []
+    lines: List[str] = []
+    blank: List[str] = []
+    previous = None
+    fenced = False
+    for line in markdown.split("\n"):
+        if fenced:
+            lines.append(line)
+            fenced = not line.lstrip().startswith("```")
+            continue
+        if not line.strip() and previous is not None:
+            blank.append(line)
+            continue
+        kind = _line_kind(line)
+        if previous is not None and (blank or kind != previous or kind == "heading"):
+            blocks.append(("\n".join(lines), "\n" + "".join(gap + "\n" for gap in blank)))
+            lines, blank = [], []
+        lines.append(line)
+        fenced = kind == "code"
+        previous = kind
+    blocks.append(("\n".join(lines), "".join("\n" + gap for gap in blank)))
+    return blocks
+
+
+def block_fingerprint(block: str) -> Optional[bytes]:
+    """
+    Fingerprint of a block, whitespace-insensitive; None for blocks that are
+    never boilerplate: headings, code and blocks without words (rules, table
+    separators...).
+    """
+    if block.lstrip().startswith("#") or "```" in block or not _WORD.search(block):
+        return None
+    return hashlib.blake2b(" ".join(block.split()).encode("utf-8"), digest_size=8).digest()
+
+
+class BoilerplateFilter:
+    """
+    Removes the blocks a site repeats on most of its pages (sidebars, cookie
+    banners, "Was this helpful?" widgets, version pickers...) that survive
+    the removal of NON_CONTENT_TAGS because they are built from plain divs.
+
+    Works on the pages' Markdown, in a single pass: strip() counts on how many
+    pages each block appears as pages go by, and removes from each page the
+    blocks found on more than min_share of the pages seen so far. The first
+    min_pages pages are held back until there are enough pages to tell, and
+    are left as is if the site has fewer pages.
+
+    Counts are kept with lossy counting, so memory grows with the number of
+    frequent blocks rather than with the size of the site.
+    """
+
+    def __init__(self, min_share: float = DEFAULT_MIN_SHARE, min_pages: int = DEFAULT_MIN_PAGES):
+        if not 0 < min_share < 1:
+            raise ValueError("min_share must be between 0 and 1")
+        self.min_share = min_share
+        self.min_pages = min_pages
+        self.pages = 0
+        self.removed_blocks = 0
+        self.removed_bytes = 0
+        # Fingerprint -> [pages counted, maximum pages missed before it was counted]
+        self._counts: Dict[bytes, List[int]] = {}
+        self._removed: Set[bytes] = set()
+
+    @property
+    def learned(self) -> int:
+        """Number of distinct blocks removed so far."""
+        return len(self._removed)
+
+    def strip(self, pages: Iterable[PageResult]) -> Iterator[PageResult]:
+        """Yields pages in the same order, without their boilerplate blocks. Pages without Markdown pass through."""
+        waiting = []
+        for page in pages:
+            blocks = self._count(page.markdown) if page.markdown else None
+            waiting.append((page, blocks))
+            if self.pages < self.min_pages:
+                continue
+            for waiting_page, waiting_blocks in waiting:
+                yield self._strip(waiting_page, waiting_blocks)
+            waiting = []
+        # Too few pages to tell boilerplate from content
+        for page, _ in waiting:
+            yield page
+
+    def _count(self, markdown: str) -> List[Tuple[str, str, Optional[bytes]]]:
+        self.pages += 1
+        bucket = (self.pages - 1) // BUCKET_PAGES + 1
+        blocks = [(block, separator, block_fingerprint(block)) for block, separator in split_blocks(markdown)]
+        for fingerprint in {fingerprint for _, _, fingerprint in blocks if fingerprint is not None}:
+            entry = self._counts.get(fingerprint)
+            if entry is None:
+                self._counts[fingerprint] = [1, bucket - 1]
+            else:
+                entry[0] += 1
+        if self.pages % BUCKET_PAGES == 0:
+            self._counts = {fingerprint: entry for fingerprint, entry in self._counts.items()
+                            if entry[0] + entry[1] > bucket}
+        return blocks
+
+    def _is_boilerplate(self, fingerprint: Optional[bytes]) -> bool:
+        entry = self._counts.get(fingerprint) if fingerprint is not None else None
+        if entry is None or entry[0] <= self.min_share * self.pages:
+            return False
+        self._removed.add(fingerprint)
+        return True
+
+    def _strip(self, page: PageResult, blocks: Optional[list]) -> PageResult:
+        if blocks is None:
+            return page
+        kept = []
+        removed = 0
+        for block, separator, fingerprint in blocks:
+            if self._is_boilerplate(fingerprint):
+                removed += 1
+            else:
+                kept.append(block + separator)
+        if not removed:
+            return page
+        markdown = "".join(kept).strip()
+        self.removed_blocks += removed
+        self.removed_bytes += len(page.markdown.encode("utf-8")) - len(markdown.encode("utf-8"))
+        return replace(page, markdown=markdown)
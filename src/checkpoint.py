@@ -0,0 +1,145 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from dataclasses import asdict
+from typing import Callable, Optional
+from src.crawler import PageResult, Processor
+from src.discovery import Discovery
+from src.manifest import target_slug
+
+# Processed pages are committed to disk at least this often, in seconds,
+# so a crash loses at most this much work
+CHECKPOINT_INTERVAL = 10.0
+# Older checkpoints are not resumed: their pages may have changed since
+CHECKPOINT_MAX_AGE = 24 * 60 * 60
+
+
+def checkpoint_path_for(state_dir: str, nome: str) -> str:
+    """Returns the checkpoint file used for the documentation target named nome."""
+    return os.path.join(state_dir, "checkpoints", f"{target_slug(nome)}.sqlite")
+
+
+class CrawlCheckpoint:
+    """
+    On-disk checkpoint of a target's crawl, so an interrupted run can resume.
+
+    Records what discovery found (the seed URLs) and every processed page
+    (Markdown, links, canonical URL and HTML hash). A crawl replayed against
+    the checkpoint is served the stored pages without fetching them; since
+    the crawl order only depends on the pages' links, the frontier, the
+    visited set and the output are rebuilt exactly as they were, and the crawl
+    carries on from the first page that was not reached.
+
+    Pages are committed every `interval` seconds rather than one at a time.
+    `key` identifies the target's settings and the processing version; a
+    checkpoint written under another key, more than max_age seconds ago, or
+    opened with resume=False, is discarded.
+    """
+
+    def __init__(self, path: str, key: str, resume: bool = False, interval: float = CHECKPOINT_INTERVAL,
+                 max_age: float = CHECKPOINT_MAX_AGE, clock: Callable[[], float] = time.monotonic):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.interval = interval
+        self.restored = 0
+        self.stored = 0
+        self._clock = clock
+        self._last_commit = clock()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                markdown BLOB NOT NULL,
+                links TEXT NOT NULL,
+                canonical TEXT,
+                content_hash TEXT
+            )
+        """)
+        meta = dict(self._conn.execute("SELECT key, value FROM meta WHERE key IN ('key', 'created')"))
+        fresh = meta.get("key") == key and time.time() - float(meta.get("created", "-inf")) <= max_age
+        if not (resume and fresh):
+            self._conn.execute("DELETE FROM pages")
+            self._conn.execute("DELETE FROM meta")
+            self._conn.executemany("INSERT INTO meta (key, value) VALUES (?, ?)",
+                                   [("key", key), ("created", repr(time.time()))])
+        self._conn.commit()
+
+    @property
+    def resumed(self) -> bool:
+        """Whether the checkpoint holds state from a previous run."""
+        return len(self) > 0 or self.discovery() is not None
+
+    def discovery(self) -> Optional[Discovery]:
+        """Returns the discovery result saved by save_discovery(), or None."""
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = 'discovery'").fetchone()
+        return Discovery(**json.loads(row[0])) if row is not None else None
+
+    def save_discovery(self, found: Discovery):
+        """Records the seeds of the crawl, so a resumed crawl starts from the same ones."""
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('discovery', ?)",
+                               (json.dumps(asdict(found)),))
+            self._conn.commit()
+
+    def lookup(self, url: str) -> Optional[PageResult]:
+        """Returns the stored result of url, or None if it was not processed before."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT markdown, links, canonical, content_hash FROM pages WHERE url = ?", (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            self.restored += 1
+        markdown, links, canonical, content_hash = row
+        return PageResult(url=url, markdown=zlib.decompress(markdown).decode("utf-8"), links=json.loads(links),
+                          canonical=canonical, content_hash=content_hash)
+
+    def store(self, result: PageResult):
+        """Records a processed page; it is written to disk with the next periodic commit."""
+        blob = zlib.compress(result.load_markdown().encode("utf-8"))
+        with self._lock:
+            self.stored += 1
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages (url, markdown, links, canonical, content_hash) VALUES (?, ?, ?, ?, ?)",
+                (result.url, blob, json.dumps(result.links), result.canonical, result.content_hash),
+            )
+            now = self._clock()
+            if now - self._last_commit >= self.interval:
+                self._conn.commit()
+                self._last_commit = now
+
+    def wrap(self, process: Processor) -> Processor:
+        """Wraps a page processor so every processed page is checkpointed."""
+        def process_with_checkpoint(url: str, html: str) -> PageResult:
+            result = process(url, html)
+            self.store(result)
+            return result
+        return process_with_checkpoint
+
+    def flush(self):
+        """Commits the pages stored since the last commit."""
+        with self._lock:
+            self._conn.commit()
+            self._last_commit = self._clock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.commit()
+            self._conn.close()
+
+    def remove(self):
+        """Deletes the checkpoint once its target is done. The checkpoint must be closed."""
+        if os.path.exists(self.path):
+            os.remove(self.path)
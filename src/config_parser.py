@@ -1,6 +1,14 @@
 import json
 import os
 from typing import Dict, Any
+from src.discovery import DISCOVERY_STRATEGIES
+from src.embedded import EXTRACTORS
+from src.rate_limit import RateLimit
+from src.shards import OUTPUT_LAYOUTS
+
+# Optional per-target keys forwarded to scrape_documentation
+CRAWL_OPTION_KEYS = ("ignore_paths", "include", "exclude", "max_depth", "max_pages", "discovery", "rate_limit",
+                     "dedupe", "extractors", "strip_boilerplate")
 
 def load_config(filepath: str) -> Dict[str, Any]:
     """
@@ -21,5 +29,66 @@ def load_config(filepath: str) -> Dict[str, Any]:
     for doc in data["documentacoes"]:
         if not all(k in doc for k in ("nome", "url_base", "drive_folder_id")):
             raise ValueError(f"Invalid document schema in {filepath}. Missing required keys.")
+        _validate_crawl_options(doc, filepath)
 
     return data
+
+def _validate_crawl_options(doc: Dict[str, Any], filepath: str):
+    for key in ("ignore_paths", "include", "exclude"):
+        value = doc.get(key, [])
+        if not isinstance(value, list) or not all(isinstance(v, str) for v in value):
+            raise ValueError(f"Invalid '{key}' for {doc['nome']} in {filepath}. Expected a list of strings.")
+
+    for key in ("max_depth", "max_pages"):
+        value = doc.get(key)
+        if value is not None and (isinstance(value, bool) or not isinstance(value, int) or value < 0):
+            raise ValueError(f"Invalid '{key}' for {doc['nome']} in {filepath}. Expected a non-negative integer.")
+
+    if doc.get("output", "document") not in OUTPUT_LAYOUTS:
+        raise ValueError(f"Invalid 'output' for {doc['nome']} in {filepath}. "
+                         f"Expected one of: {', '.join(OUTPUT_LAYOUTS)}.")
+    shard_bytes = doc.get("shard_bytes")
+    if shard_bytes is not None and (isinstance(shard_bytes, bool) or not isinstance(shard_bytes, int) or shard_bytes < 1):
+        raise ValueError(f"Invalid 'shard_bytes' for {doc['nome']} in {filepath}. Expected a positive integer.")
+
+    discovery = doc.get("discovery", [])
+    if not isinstance(discovery, list) or not all(v in DISCOVERY_STRATEGIES for v in discovery):
+        raise ValueError(f"Invalid 'discovery' for {doc['nome']} in {filepath}. "
+                         f"Expected a list of: {', '.join(DISCOVERY_STRATEGIES)}.")
+
+    extractors = doc.get("extractors", [])
+    if not isinstance(extractors, list) or not all(v in EXTRACTORS for v in extractors):
+        raise ValueError(f"Invalid 'extractors' for {doc['nome']} in {filepath}. "
+                         f"Expected a list of: {', '.join(EXTRACTORS)}.")
+
+    for key in ("dedupe", "strip_boilerplate"):
+        if not isinstance(doc.get(key, True), bool):
+            raise ValueError(f"Invalid '{key}' for {doc['nome']} in {filepath}. Expected a boolean.")
+
+    rate_limit = doc.get("rate_limit", {})
+    if not isinstance(rate_limit, dict) or not _valid_rate_limit(rate_limit):
+        raise ValueError(f"Invalid 'rate_limit' for {doc['nome']} in {filepath}. Expected an object with "
+                         f"positive numbers for {', '.join(RateLimit.keys()[:-1])} "
+                         f"and a boolean for respect_crawl_delay.")
+
+def _valid_rate_limit(rate_limit: Dict[str, Any]) -> bool:
+    for key, value in rate_limit.items():
+        if key == "respect_crawl_delay":
+            if not isinstance(value, bool):
+                return False
+        elif key == "requests_per_second":
+            if isinstance(value, bool) or not isinstance(value, (int, float)) or value <= 0:
+                return False
+        elif key in ("burst", "max_concurrency"):
+            if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+                return False
+        else:
+            return False
+    return True
+
+def get_crawl_options(doc: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Returns the crawl options configured for a documentation target,
+    ready to be passed as keyword arguments to scrape_documentation.
+    """
+    return {key: doc[key] for key in CRAWL_OPTION_KEYS if key in doc}
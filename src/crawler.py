@@ -0,0 +1,188 @@
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Callable, Dict, Iterable, Iterator, List, Optional
+from urllib.parse import urlparse
+from src.frontier import Frontier
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONCURRENCY = 16
+DEFAULT_PER_HOST_LIMIT = 6
+
+
+@dataclass
+class PageResult:
+    """Outcome of processing a single fetched page."""
+    url: str
+    markdown: str = ""
+    links: List[str] = field(default_factory=list)
+    # URL declared by <link rel="canonical">, if any
+    canonical: Optional[str] = None
+    # SHA-256 of the fetched HTML, set when pages are deduplicated
+    content_hash: Optional[str] = None
+    # CPU seconds spent in each processing stage (parse, extract, convert), for metrics
+    timings: Dict[str, float] = field(default_factory=dict, compare=False, repr=False)
+    # Reads the Markdown back when it was moved out of memory (to a PageStore) until it is emitted
+    stored: Optional[Callable[[], str]] = field(default=None, compare=False, repr=False)
+
+    def load_markdown(self) -> str:
+        """Returns the page's Markdown, reading it back if it was moved out of memory."""
+        return self.stored() if self.stored is not None else self.markdown
+
+
+Fetcher = Callable[[str], Optional[str]]
+Processor = Callable[[str, str], PageResult]
+LinkFilter = Callable[[str], bool]
+Lookup = Callable[[str], Optional[PageResult]]
+
+
+class CrawlEngine:
+    """
+    Breadth-first crawler that fetches pages concurrently with a pool of workers.
+
+    Pages are crawled level by level: every URL of a BFS level is fetched in
+    parallel (bounded by a global and a per-host limit), then the level's
+    results are emitted in discovery order before the next level is scheduled.
+    This keeps the output order identical to a serial BFS crawl regardless of
+    which fetches finish first.
+
+    `fetch` is a blocking callable returning the page HTML (or None on failure)
+    and runs on a thread pool. `process` turns (url, html) into a PageResult;
+    it runs on the event loop unless offload_process is set, in which case it
+    runs on the thread pool too (for processors that wait on other workers,
+    such as a process pool). `lookup`, if given, is asked for a known result
+    before each fetch; when it returns one, the page is neither fetched nor
+    processed.
+
+    While a level is processed, follows_links tells whether the links of its
+    pages will be followed (False at max_depth), and scheduled(url) whether a
+    URL was scheduled so far.
+    """
+
+    def __init__(self, fetch: Fetcher, process: Processor,
+                 concurrency: int = DEFAULT_CONCURRENCY,
+                 per_host_limit: int = DEFAULT_PER_HOST_LIMIT,
+                 offload_process: bool = False,
+                 lookup: Optional[Lookup] = None):
+        if concurrency < 1 or per_host_limit < 1:
+            raise ValueError("concurrency and per_host_limit must be at least 1")
+        self.fetch = fetch
+        self.process = process
+        self.concurrency = concurrency
+        self.per_host_limit = per_host_limit
+        self.offload_process = offload_process
+        self.lookup = lookup
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+        self._frontier = Frontier()
+        self.follows_links = True
+
+    def scheduled(self, url: str) -> bool:
+        """Whether url (or an equivalent URL) was scheduled in the current crawl."""
+        return url in self._frontier
+
+    def _host_limit(self, url: str) -> asyncio.Semaphore:
+        host = urlparse(url).netloc
+        if host not in self._host_limits:
+            self._host_limits[host] = asyncio.Semaphore(self.per_host_limit)
+        return self._host_limits[host]
+
+    async def _visit(self, url: str, executor: ThreadPoolExecutor) -> Optional[PageResult]:
+        loop = asyncio.get_running_loop()
+        if self.lookup is not None:
+            known = self.lookup(url)
+            if known is not None:
+                return known
+        async with self._host_limit(url):
+            html = await loop.run_in_executor(executor, self.fetch, url)
+        if html is None:
+            return None
+        if self.offload_process:
+            return await loop.run_in_executor(executor, self.process, url, html)
+        return self.process(url, html)
+
+    async def _worker(self, queue: asyncio.Queue, results: list, executor: ThreadPoolExecutor):
+        while True:
+            index, url = await queue.get()
+            try:
+                results[index] = await self._visit(url, executor)
+            except Exception as e:
+                logger.warning(f"Failed to process {url}: {e}")
+                results[index] = None
+            finally:
+                queue.task_done()
+
+    async def crawl(self, start_url: str, accept: LinkFilter,
+                    max_depth: Optional[int] = None,
+                    max_pages: Optional[int] = None,
+                    seeds: Iterable[str] = ()) -> AsyncIterator[PageResult]:
+        """
+        Crawls from start_url, following links for which accept(link) is true.
+        Yields a PageResult per successfully fetched page in stable BFS order.
+        Links deeper than max_depth (start_url is depth 0) are not followed, and
+        no more than max_pages URLs are ever scheduled. seeds (e.g. sitemap URLs)
+        are crawled at depth 0 right after start_url.
+        """
+        self._host_limits = {}
+        queue: asyncio.Queue = asyncio.Queue()
+        frontier = self._frontier = Frontier([start_url])
+        for seed in seeds:
+            if max_pages is not None and frontier.seen_count >= max_pages:
+                break
+            frontier.add(seed)
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            results: list = []
+            workers = [
+                asyncio.create_task(self._worker(queue, results, executor))
+                for _ in range(self.concurrency)
+            ]
+            depth = 0
+            try:
+                while frontier:
+                    level = frontier.drain()
+                    follow_links = self.follows_links = max_depth is None or depth < max_depth
+                    results[:] = [None] * len(level)
+                    for item in enumerate(level):
+                        queue.put_nowait(item)
+                    await queue.join()
+
+                    for page in results:
+                        if page is None:
+                            continue
+                        for link in page.links if follow_links else ():
+                            if max_pages is not None and frontier.seen_count >= max_pages:
+                                break
+                            if link not in frontier and accept(link):
+                                frontier.add(link)
+                        yield page
+                    depth += 1
+            finally:
+                for worker in workers:
+                    worker.cancel()
+                await asyncio.gather(*workers, return_exceptions=True)
+
+    def iter_pages(self, start_url: str, accept: LinkFilter, max_depth: Optional[int] = None,
+                   max_pages: Optional[int] = None, seeds: Iterable[str] = ()) -> Iterator[PageResult]:
+        """
+        Blocking generator over crawl(). Pages are yielded as soon as their BFS
+        level completes; the crawl pauses while the caller consumes them.
+        """
+        loop = asyncio.new_event_loop()
+        pages = self.crawl(start_url, accept, max_depth, max_pages, seeds)
+        try:
+            while True:
+                try:
+                    page = loop.run_until_complete(pages.__anext__())
+                except StopAsyncIteration:
+                    break
+                yield page
+        finally:
+            loop.run_until_complete(pages.aclose())
+            loop.close()
+
+    def run(self, start_url: str, accept: LinkFilter, max_depth: Optional[int] = None,
+            max_pages: Optional[int] = None, seeds: Iterable[str] = ()) -> List[PageResult]:
+        """Blocking helper that runs a full crawl and returns the ordered pages."""
+        return list(self.iter_pages(start_url, accept, max_depth, max_pages, seeds))
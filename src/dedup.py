@@ -0,0 +1,185 @@
+import hashlib
+import re
+import threading
+from collections import Counter
+from dataclasses import replace
+from typing import Callable, Dict, Iterable, List, Optional, Set
+from src.crawler import PageResult, Processor
+from src.frontier import normalize_url
+
+SIMHASH_BITS = 64
+# Pages whose fingerprints differ in at most this many bits are near-duplicates
+DEFAULT_MAX_DISTANCE = 3
+# Features are runs of this many consecutive words
+SHINGLE_SIZE = 4
+# Pages with fewer distinct shingles than this are only compared exactly
+MIN_FEATURES = 32
+
+_WORD = re.compile(r"\w+")
+
+
+def page_features(markdown: str) -> Set[str]:
+    """The distinct word shingles of a page (lowercased), used as SimHash features."""
+    words = _WORD.findall(markdown.lower())
+    return {" ".join(words[i:i + SHINGLE_SIZE]) for i in range(max(len(words) - SHINGLE_SIZE + 1, 0))}
+
+
+def simhash(features: Iterable[str]) -> int:
+    """
+    64-bit SimHash of a set of features: similar sets give fingerprints that
+    differ in few bits. Feature hashes are tallied byte by byte rather than
+    bit by bit, which keeps the per-feature work small.
+    """
+    digests = [hashlib.blake2b(feature.encode("utf-8"), digest_size=SIMHASH_BITS // 8).digest()
+               for feature in features]
+    ones = [0] * SIMHASH_BITS
+    for position in range(SIMHASH_BITS // 8):
+        # Bit b of byte `position` (big-endian) is bit 8 * (7 - position) + b of the fingerprint
+        offset = 8 * (SIMHASH_BITS // 8 - 1 - position)
+        for value, count in Counter(digest[position] for digest in digests).items():
+            for bit in range(8):
+                if value >> bit & 1:
+                    ones[offset + bit] += count
+    half = len(digests) / 2
+    return sum(1 << bit for bit, count in enumerate(ones) if count > half)
+
+
+def _converted(result: PageResult) -> bool:
+    """Whether result holds the page's Markdown, in memory or moved out of it."""
+    return bool(result.markdown) or result.stored is not None
+
+
+class SimHashIndex:
+    """
+    Banded index of SimHash fingerprints for near-duplicate lookups.
+
+    Fingerprints are split into max_distance + 1 bands; two fingerprints within
+    max_distance bits of each other agree exactly on at least one band, so only
+    fingerprints sharing a band are compared.
+    """
+
+    def __init__(self, max_distance: int = DEFAULT_MAX_DISTANCE):
+        self.max_distance = max_distance
+        self._bands = max_distance + 1
+        self._width = SIMHASH_BITS // self._bands
+        self._buckets: List[Dict[int, List[int]]] = [{} for _ in range(self._bands)]
+
+    def _keys(self, fingerprint: int):
+        mask = (1 << self._width) - 1
+        for band in range(self._bands):
+            yield band, fingerprint >> (band * self._width) & mask
+
+    def find(self, fingerprint: int) -> Optional[int]:
+        """Returns an indexed fingerprint within max_distance bits of fingerprint, or None."""
+        for band, key in self._keys(fingerprint):
+            for candidate in self._buckets[band].get(key, ()):
+                if (candidate ^ fingerprint).bit_count() <= self.max_distance:
+                    return candidate
+        return None
+
+    def add(self, fingerprint: int):
+        for band, key in self._keys(fingerprint):
+            self._buckets[band].setdefault(key, []).append(fingerprint)
+
+
+class Deduplicator:
+    """
+    Drops duplicate pages from a crawl.
+
+    - Exact copies: pages with byte-identical HTML are only converted once
+      (see wrap()); pages converting to identical Markdown are dropped as well.
+    - Canonical copies: pages whose <link rel="canonical"> points to another
+      URL the crawl visits are dropped in favour of that URL (see process_page).
+    - Near-duplicates: pages whose SimHash is within max_distance bits of a
+      page already kept. iter_pages checks them with accept_near() once the
+      site's boilerplate is stripped, so a sidebar shared by every page does
+      not make short pages look alike.
+
+    Which copy is kept is decided by accept(), called in crawl order, so the
+    output does not depend on which pages finish processing first.
+    """
+
+    def __init__(self, max_distance: int = DEFAULT_MAX_DISTANCE):
+        self.exact = 0
+        self.canonical = 0
+        self.near = 0
+        self._html: Set[str] = set()
+        self._markdown: Set[str] = set()
+        self._index = SimHashIndex(max_distance)
+        self._pending: Dict[str, PageResult] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def dropped(self) -> int:
+        return self.exact + self.canonical + self.near
+
+    def wrap(self, process: Processor) -> Processor:
+        """
+        Wraps a page processor so HTML already kept is not processed again, and
+        identical HTML processed concurrently is converted once. Only converted
+        pages count: a page left to a URL derived from its own (its Markdown
+        version) says nothing of another page with the same HTML shell.
+        """
+        def process_unique(url: str, html: str) -> PageResult:
+            content_hash = hashlib.sha256(html.encode("utf-8")).hexdigest()
+            with self._lock:
+                if content_hash in self._html:
+                    return PageResult(url=url, content_hash=content_hash)
+                pending = self._pending.get(content_hash)
+            if pending is not None:
+                return replace(pending, url=url)
+            result = process(url, html)
+            result.content_hash = content_hash
+            if _converted(result):
+                with self._lock:
+                    self._pending.setdefault(content_hash, result)
+            return result
+        return process_unique
+
+    def accept(self, page: PageResult, follows: Callable[[str], bool]) -> bool:
+        """
+        Returns True if page is kept, False if it duplicates a page kept before.
+        Must be called in crawl order. follows(url) tells whether a URL is crawled.
+        """
+        return self.accept_exact(page, follows) and self.accept_near(page)
+
+    def accept_exact(self, page: PageResult, follows: Callable[[str], bool]) -> bool:
+        """accept() without the near-duplicate check, for pages whose Markdown is cleaned up before accept_near()."""
+        with self._lock:
+            if page.content_hash is not None:
+                self._pending.pop(page.content_hash, None)
+                if page.content_hash in self._html:
+                    self.exact += 1
+                    return False
+
+        if page.canonical and normalize_url(page.canonical) != normalize_url(page.url) and follows(page.canonical):
+            self.canonical += 1
+            return False
+        if not page.markdown:
+            return True
+        if page.content_hash is not None:
+            with self._lock:
+                self._html.add(page.content_hash)
+
+        markdown_hash = hashlib.sha256(page.markdown.encode("utf-8")).hexdigest()
+        if markdown_hash in self._markdown:
+            self.exact += 1
+            return False
+        self._markdown.add(markdown_hash)
+        return True
+
+    def accept_near(self, page: PageResult) -> bool:
+        """
+        Returns False if page is a near-duplicate of a page kept before.
+        Must be called in crawl order, on the pages accept_exact() kept.
+        """
+        if not page.markdown:
+            return True
+        features = page_features(page.markdown)
+        if len(features) >= MIN_FEATURES:
+            fingerprint = simhash(features)
+            if self._index.find(fingerprint) is not None:
+                self.near += 1
+                return False
+            self._index.add(fingerprint)
+        return True
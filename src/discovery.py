@@ -0,0 +1,252 @@
+import logging
+import re
+import zlib
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import urljoin, urlsplit
+import requests
+from src.http_client import HttpClient
+
+logger = logging.getLogger(__name__)
+
+# Values accepted by a target's "discovery" option, in the order they are tried:
+#   llms-full - fetch the site's pre-rendered llms-full.txt as the whole document
+#   llms      - seed the crawl with the pages listed in llms.txt
+#   sitemap   - seed the crawl with the pages listed in the sitemap(s)
+#   links     - follow <a> links from every crawled page
+DISCOVERY_STRATEGIES = ("llms-full", "llms", "sitemap", "links")
+DEFAULT_DISCOVERY = ("links",)
+
+# Sitemap indexes may point to other indexes; nesting deeper than this is ignored
+MAX_SITEMAP_DEPTH = 3
+
+_MARKDOWN_LINK = re.compile(r"\[[^\]]*\]\(\s*<?([^)\s>]+)>?(?:\s+\"[^\"]*\")?\s*\)")
+
+
+@dataclass
+class SitemapEntry:
+    url: str
+    lastmod: Optional[str] = None
+
+
+@dataclass
+class Discovery:
+    """
+    What the discovery strategies found for a target: either a full document
+    (llms-full.txt) or seed URLs for the crawl, with their sitemap lastmod.
+    """
+    seeds: List[str] = field(default_factory=list)
+    lastmods: Dict[str, str] = field(default_factory=dict)
+    full_text: Optional[Tuple[str, str]] = None
+    follow_links: bool = True
+
+
+def parse_lastmod(value: Optional[str]) -> Optional[datetime]:
+    """Parses a sitemap <lastmod> (W3C datetime, date only or full) as an aware datetime, or None."""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.strip())
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def _origin(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def _candidates(base_url: str, name: str) -> List[str]:
+    """URLs where a well-known file may live: under the documentation path, then at the site root."""
+    urls = [base_url.rstrip("/") + "/" + name, _origin(base_url) + "/" + name]
+    return list(dict.fromkeys(urls))
+
+
+def _get(client: HttpClient, url: str, **kwargs) -> Optional[requests.Response]:
+    """GET that treats any failure as "not available"; discovery sources are optional."""
+    try:
+        return client.get(url, **kwargs)
+    except requests.RequestException as e:
+        logger.debug(f"Discovery source unavailable: {url} ({e})")
+        return None
+
+
+def is_plain_text(text: str, content_type: str = "") -> bool:
+    """Whether a response is a plain text file rather than an HTML page (or empty)."""
+    return "html" not in content_type and bool(text.strip()) and not text.lstrip().startswith("<")
+
+
+def fetch_text_file(client: HttpClient, base_url: str, name: str) -> Optional[Tuple[str, str]]:
+    """
+    Looks for a plain text file such as llms.txt next to base_url, then at the
+    site root. Returns (url, text) for the first one found, or None. Pages served
+    as HTML (e.g. a single-page app answering every path) do not count.
+    """
+    for url in _candidates(base_url, name):
+        response = _get(client, url)
+        if response is None:
+            continue
+        text = response.text
+        if not is_plain_text(text, response.headers.get("Content-Type", "")):
+            logger.debug(f"Ignoring {url}: not a plain text file")
+            continue
+        return url, text
+    return None
+
+
+def parse_llms_links(text: str, source_url: str) -> List[str]:
+    """Returns the absolute URLs of the Markdown links listed in an llms.txt file, in order."""
+    return [urljoin(source_url, match.group(1)) for match in _MARKDOWN_LINK.finditer(text)]
+
+
+def find_sitemaps(client: HttpClient, base_url: str) -> List[str]:
+    """Returns the sitemaps declared in robots.txt, or the conventional sitemap.xml locations."""
+    sitemaps = []
+    response = _get(client, _origin(base_url) + "/robots.txt")
+    if response is not None:
+        for line in response.text.splitlines():
+            key, _, value = line.partition(":")
+            if key.strip().lower() == "sitemap" and value.strip():
+                sitemaps.append(value.strip())
+    return list(dict.fromkeys(sitemaps)) or _candidates(base_url, "sitemap.xml")
+
+
+def _iter_body(response: requests.Response, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+    """Streams the response body, transparently gunzipping .xml.gz files."""
+    decompressor = None
+    for index, chunk in enumerate(response.iter_content(chunk_size)):
+        if index == 0 and chunk[:2] == b"\x1f\x8b":
+            decompressor = zlib.decompressobj(wbits=31)
+        yield decompressor.decompress(chunk) if decompressor else chunk
+    if decompressor:
+        yield decompressor.flush()
+
+
+def _local_name(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def _iter_sitemap_elements(chunks: Iterable[bytes]) -> Iterator[Tuple[str, str, Optional[str]]]:
+    """
+    Incrementally parses a sitemap or sitemap index, yielding ("url" | "sitemap",
+    loc, lastmod) per entry. Parsed elements are cleared as they are consumed,
+    so memory stays flat however large the file is.
+    """
+    parser = ET.XMLPullParser(events=("end",))
+    for chunk in chunks:
+        parser.feed(chunk)
+        for _, element in parser.read_events():
+            kind = _local_name(element.tag)
+            if kind not in ("url", "sitemap"):
+                continue
+            loc = lastmod = None
+            for child in element:
+                name = _local_name(child.tag)
+                if name == "loc":
+                    loc = (child.text or "").strip()
+                elif name == "lastmod":
+                    lastmod = (child.text or "").strip() or None
+            element.clear()
+            if loc:
+                yield kind, loc, lastmod
+    parser.close()
+
+
+def iter_sitemap(client: HttpClient, url: str, _depth: int = 0,
+                 _visited: Optional[set] = None) -> Iterator[SitemapEntry]:
+    """
+    Yields the page entries of the sitemap at url, following sitemap indexes.
+    Gzipped sitemaps are supported; unreachable or malformed sitemaps are skipped.
+    """
+    visited = _visited if _visited is not None else set()
+    if url in visited or _depth > MAX_SITEMAP_DEPTH:
+        return
+    visited.add(url)
+
+    response = _get(client, url, stream=True)
+    if response is None:
+        return
+    children = []
+    try:
+        for kind, loc, lastmod in _iter_sitemap_elements(_iter_body(response)):
+            if kind == "url":
+                yield SitemapEntry(loc, lastmod)
+            else:
+                children.append(loc)
+    except (ET.ParseError, zlib.error, requests.RequestException) as e:
+        logger.warning(f"Failed to parse sitemap {url}: {e}")
+    finally:
+        response.close()
+
+    for child in children:
+        yield from iter_sitemap(client, child, _depth + 1, visited)
+
+
+def select_seeds(entries: Iterable[SitemapEntry], limit: Optional[int] = None) -> List[SitemapEntry]:
+    """
+    Deduplicates entries, keeping their order. With a limit, keeps the `limit`
+    most recently modified entries (entries without lastmod count as oldest).
+    """
+    unique: Dict[str, SitemapEntry] = {}
+    for entry in entries:
+        known = unique.get(entry.url)
+        if known is None:
+            unique[entry.url] = SitemapEntry(entry.url, entry.lastmod)
+        elif known.lastmod is None:
+            known.lastmod = entry.lastmod
+    selected = list(unique.values())
+    if limit is None or len(selected) <= limit:
+        return selected
+    oldest = datetime.min.replace(tzinfo=timezone.utc)
+    ranked = sorted(range(len(selected)), key=lambda i: parse_lastmod(selected[i].lastmod) or oldest, reverse=True)
+    keep = set(ranked[:limit])
+    return [entry for i, entry in enumerate(selected) if i in keep]
+
+
+def discover(client: HttpClient, base_url: str, strategies: Iterable[str],
+             accept: Callable[[str], bool], max_pages: Optional[int] = None) -> Discovery:
+    """
+    Runs the discovery strategies of a target (see DISCOVERY_STRATEGIES).
+    Seed URLs are limited to those accepted by the target's URL rules.
+    """
+    strategies = list(strategies)
+    unknown = [s for s in strategies if s not in DISCOVERY_STRATEGIES]
+    if unknown:
+        raise ValueError(f"Unknown discovery strategies: {', '.join(unknown)}")
+
+    result = Discovery(follow_links="links" in strategies)
+
+    if "llms-full" in strategies:
+        found = fetch_text_file(client, base_url, "llms-full.txt")
+        if found is not None:
+            logger.info(f"Using {found[0]} as the full documentation ({len(found[1])} characters).")
+            result.full_text = found
+            return result
+
+    entries: List[SitemapEntry] = []
+    if "llms" in strategies:
+        found = fetch_text_file(client, base_url, "llms.txt")
+        if found is not None:
+            links = [url for url in parse_llms_links(found[1], found[0]) if accept(url)]
+            logger.info(f"Found {len(links)} page(s) in {found[0]}.")
+            entries += [SitemapEntry(url) for url in links]
+
+    if "sitemap" in strategies:
+        count = 0
+        for sitemap in find_sitemaps(client, base_url):
+            for entry in iter_sitemap(client, sitemap):
+                if accept(entry.url):
+                    entries.append(entry)
+                    count += 1
+        logger.info(f"Found {count} page(s) in the sitemap(s) of {base_url}.")
+
+    # The start URL takes one of the max_pages slots
+    limit = max(max_pages - 1, 0) if max_pages is not None else None
+    for entry in select_seeds(entries, limit):
+        result.seeds.append(entry.url)
+        if entry.lastmod:
+            result.lastmods[entry.url] = entry.lastmod
+    return result
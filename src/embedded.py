@@ -0,0 +1,128 @@
+import json
+import re
+from dataclasses import dataclass
+from typing import Any, Iterator, Optional, Tuple
+
+# Values accepted by a target's "extractors" option:
+#   embedded - read the page content from the data the framework embeds in the page
+#              (Next.js __NEXT_DATA__, Nuxt __NUXT_DATA__), when it holds more than the DOM
+#   markdown - crawl the Markdown version of pages instead of converting their HTML: the URL
+#              advertised by <link rel="alternate" type="text/markdown">, or <url>.md for
+#              pages whose HTML is an empty shell (Mintlify, Fern, GitBook...)
+EXTRACTORS = ("embedded", "markdown")
+DEFAULT_EXTRACTORS = ("embedded",)
+
+# Embedded strings shorter than this are titles or descriptions, not page content
+MIN_EMBEDDED_CHARS = 200
+# Embedded content is used when it has this many times more text than the rendered DOM
+EMBEDDED_RATIO = 1.5
+# A page whose main content has less text than this is an empty shell, rendered client-side
+SHELL_MAX_CHARS = 200
+
+# Keys of embedded JSON whose string values may hold the page, as Markdown or HTML
+MARKDOWN_KEYS = frozenset(["markdown", "rawmarkdown", "md", "mdx", "content", "rawcontent", "body", "source"])
+HTML_KEYS = frozenset(["html", "contenthtml", "bodyhtml", "renderedhtml", "content_html", "body_html"])
+
+_DATA_SCRIPTS = (
+    ("next", re.compile(r"<script\b[^>]*\bid=[\"']__NEXT_DATA__[\"'][^>]*>(.*?)</script>", re.S | re.I)),
+    ("nuxt", re.compile(r"<script\b[^>]*\bid=[\"']__NUXT_DATA__[\"'][^>]*>(.*?)</script>", re.S | re.I)),
+)
+_FRONT_MATTER = re.compile(r"\A---[ \t]*\n.*?\n---[ \t]*(?:\n|\Z)", re.S)
+# Markers of compiled MDX/JSX, which is JavaScript rather than Markdown
+_COMPILED_CODE = ("_jsx(", "_jsxs(", "React.createElement(", "function _createMdxContent")
+# devalue (Nuxt) wrappers whose payload is the wrapped value
+_DEVALUE_WRAPPERS = frozenset(["Reactive", "ShallowReactive", "Ref", "ShallowRef"])
+MAX_DATA_DEPTH = 64
+
+
+@dataclass
+class EmbeddedContent:
+    """Page content found in a framework's embedded data: Markdown, or HTML to convert."""
+    framework: str
+    text: str
+    is_html: bool = False
+
+
+def find_embedded_content(html: str) -> Optional[EmbeddedContent]:
+    """
+    Looks for the page data embedded by a JavaScript framework and returns the
+    longest string in it that holds the page content, or None. The raw HTML is
+    searched directly, so pages without such data cost a substring search.
+    """
+    for framework, pattern in _DATA_SCRIPTS:
+        if f"__{framework.upper()}_DATA__" not in html:
+            continue
+        match = pattern.search(html)
+        if match is None:
+            continue
+        try:
+            data = json.loads(match.group(1))
+        except ValueError:
+            continue
+        if framework == "nuxt":
+            data = revive_devalue(data)
+        best = max(_candidates(data), key=lambda candidate: len(candidate[0]), default=None)
+        if best is not None:
+            text, is_html = best
+            return EmbeddedContent(framework=framework, text=strip_front_matter(text) if not is_html else text,
+                                   is_html=is_html)
+    return None
+
+
+def _candidates(data: Any, key: str = "", depth: int = 0) -> Iterator[Tuple[str, bool]]:
+    """Yields (text, is_html) for every string under a content key that looks like page content."""
+    if depth > MAX_DATA_DEPTH:
+        return
+    if isinstance(data, dict):
+        for child_key, value in data.items():
+            yield from _candidates(value, str(child_key).lower(), depth + 1)
+    elif isinstance(data, list):
+        for value in data:
+            yield from _candidates(value, key, depth + 1)
+    elif isinstance(data, str) and len(data) >= MIN_EMBEDDED_CHARS:
+        if any(marker in data for marker in _COMPILED_CODE):
+            return
+        if key in HTML_KEYS:
+            yield data, True
+        elif key in MARKDOWN_KEYS:
+            stripped = data.lstrip()
+            # Some CMSs keep rendered HTML under generic keys such as "content"
+            yield data, stripped.startswith("<") and "</" in stripped
+
+
+def revive_devalue(data: Any) -> Any:
+    """
+    Rebuilds the value serialized by devalue (Nuxt's payload format): a flat
+    list whose first item is the root, where objects and lists refer to other
+    items by index. Types JSON has no equivalent for (dates, sets...) become None.
+    """
+    if not isinstance(data, list) or not data:
+        return data
+    revived = {}
+
+    def revive(index: Any, depth: int) -> Any:
+        if not isinstance(index, int) or isinstance(index, bool) or not 0 <= index < len(data):
+            return None
+        if index in revived:
+            return revived[index]
+        if depth > MAX_DATA_DEPTH:
+            return None
+        value = data[index]
+        if isinstance(value, dict):
+            result = {key: revive(child, depth + 1) for key, child in value.items()}
+        elif isinstance(value, list):
+            if value and isinstance(value[0], str):
+                result = revive(value[1], depth + 1) if value[0] in _DEVALUE_WRAPPERS and len(value) > 1 else None
+            else:
+                result = [revive(child, depth + 1) for child in value]
+        else:
+            result = value
+        revived[index] = result
+        return result
+
+    return revive(0, 0)
+
+
+def strip_front_matter(markdown: str) -> str:
+    """Removes a leading YAML front matter block (--- ... ---)."""
+    return _FRONT_MATTER.sub("", markdown.lstrip("\ufeff"), count=1)
@@ -0,0 +1,249 @@
+import re
+from itertools import repeat
+from typing import Callable, Dict, Optional
+import markdownify
+from bs4 import Comment, Doctype, NavigableString, Tag
+
+# The conversion markdownify is configured with, and falls back to
+_fallback = markdownify.MarkdownConverter(heading_style="ATX")
+
+_whitespace_re = re.compile(r"[\t ]+")
+_line_beginning_re = re.compile(r"^", re.MULTILINE)
+
+# Tags whose whitespace-only text children markdownify drops
+NESTED_TAGS = frozenset(["ol", "ul", "li", "table", "thead", "tbody", "tfoot", "tr", "td", "th"])
+HEADING_TAGS = frozenset(["h1", "h2", "h3", "h4", "h5", "h6"])
+CELL_TAGS = frozenset(["td", "th"])
+
+Handler = Callable[[Tag, str, bool], str]
+
+
+def _inline(markup: str) -> Handler:
+    """Wraps the stripped text in markup, keeping a leading and trailing space outside of it."""
+    def convert(el: Tag, text: str, inline: bool) -> str:
+        stripped = text.strip()
+        if not stripped:
+            return ""
+        return ("" if text[0] != " " else " ") + markup + stripped + markup + ("" if text[-1] != " " else " ")
+    return convert
+
+
+def _heading(level: int) -> Handler:
+    hashes = "#" * level
+
+    def convert(el: Tag, text: str, inline: bool) -> str:
+        return text if inline else f"{hashes} {text.rstrip()}\n\n"
+    return convert
+
+
+_strong = _inline("**")
+_em = _inline("*")
+_code_span = _inline("`")
+
+
+def _a(el: Tag, text: str, inline: bool) -> str:
+    stripped = text.strip()
+    if not stripped:
+        return ""
+    href = el.get("href")
+    title = el.get("title")
+    if stripped.replace(r"\_", "_") == href and not title:
+        return f"<{href}>"
+    if not href:
+        return stripped
+    title_part = ' "%s"' % title.replace('"', r'\"') if title else ""
+    return ("" if text[0] != " " else " ") + f"[{stripped}]({href}{title_part})" + ("" if text[-1] != " " else " ")
+
+
+def _blockquote(el: Tag, text: str, inline: bool) -> str:
+    if inline:
+        return text
+    return "\n" + _line_beginning_re.sub("> ", text) + "\n\n" if text else ""
+
+
+def _br(el: Tag, text: str, inline: bool) -> str:
+    return "" if inline else "  \n"
+
+
+def _code(el: Tag, text: str, inline: bool) -> str:
+    return text if el.parent.name == "pre" else _code_span(el, text, inline)
+
+
+def _hr(el: Tag, text: str, inline: bool) -> str:
+    return "\n\n---\n\n"
+
+
+def _img(el: Tag, text: str, inline: bool) -> str:
+    alt = el.attrs.get("alt") or ""
+    if inline:
+        return alt
+    src = el.attrs.get("src") or ""
+    title = el.attrs.get("title") or ""
+    title_part = ' "%s"' % title.replace('"', r'\"') if title else ""
+    return f"![{alt}]({src}{title_part})"
+
+
+def _list(el: Tag, text: str, inline: bool) -> str:
+    next_sibling = el.next_sibling
+    before_paragraph = bool(next_sibling) and next_sibling.name not in ("ul", "ol")
+    parent = el
+    while parent:
+        if parent.name == "li":
+            return "\n" + (_line_beginning_re.sub("\t", text) if text else "").rstrip()
+        parent = parent.parent
+    return text + "\n" if before_paragraph else text
+
+
+def _li(el: Tag, text: str, inline: bool) -> str:
+    parent = el.parent
+    if parent is not None and parent.name == "ol":
+        start = parent.get("start")
+        bullet = f"{(int(start) if start else 1) + parent.index(el)}."
+    else:
+        depth = -1
+        while el:
+            if el.name == "ul":
+                depth += 1
+            el = el.parent
+        bullet = "*+-"[depth % 3]
+    return f"{bullet} {text.strip()}\n"
+
+
+def _p(el: Tag, text: str, inline: bool) -> str:
+    if inline:
+        return text
+    return text + "\n\n" if text else ""
+
+
+def _pre(el: Tag, text: str, inline: bool) -> str:
+    return f"\n```\n{text}\n```\n" if text else ""
+
+
+def _table(el: Tag, text: str, inline: bool) -> str:
+    return "\n\n" + text + "\n"
+
+
+def _cell(el: Tag, text: str, inline: bool) -> str:
+    return " " + text + " |"
+
+
+def _tr(el: Tag, text: str, inline: bool) -> str:
+    cells = el.find_all(["td", "th"])
+    first = not el.previous_sibling
+    if first and all(cell.name == "th" for cell in cells):
+        return "|" + text + "\n| " + " | ".join(["---"] * len(cells)) + " |\n"
+    parent = el.parent
+    if first and (parent.name == "table" or (parent.name == "tbody" and not parent.previous_sibling)):
+        return ("| " + " | ".join([""] * len(cells)) + " |\n| " + " | ".join(["---"] * len(cells)) + " |\n"
+                + "|" + text + "\n")
+    return "|" + text + "\n"
+
+
+# Tag name -> conversion of its converted children, None to pass them through unchanged
+_HANDLERS: Dict[str, Optional[Handler]] = {
+    "a": _a, "b": _strong, "strong": _strong, "em": _em, "i": _em, "code": _code,
+    "blockquote": _blockquote, "br": _br, "hr": _hr, "img": _img,
+    "ul": _list, "ol": _list, "li": _li, "p": _p, "pre": _pre,
+    "table": _table, "td": _cell, "th": _cell, "tr": _tr,
+    **{f"h{level}": _heading(level) for level in range(1, 7)},
+    "thead": None, "tbody": None, "tfoot": None,
+}
+_FALLBACK = object()
+
+
+def _handler(name: str):
+    """
+    Returns the handler of a tag name: _HANDLERS, None for a tag markdownify
+    passes through (div, span, section, custom elements...), or _FALLBACK for
+    a tag markdownify converts in a way this module does not (del, kbd, sub...).
+    """
+    if name in _HANDLERS:
+        return _HANDLERS[name]
+    attribute = f"convert_{name}"
+    # markdownify converts h<digits> (and treats h1..h6 prefixes as headings) dynamically
+    converts = (hasattr(markdownify.MarkdownConverter, attribute) or markdownify.convert_heading_re.match(attribute)
+                or markdownify.html_heading_re.match(name))
+    handler = _HANDLERS[name] = _FALLBACK if converts else None
+    return handler
+
+
+def _drop_nested_whitespace(node: Tag):
+    """Extracts whitespace-only text children of a list or table node, exactly as markdownify does."""
+    for el in node.children:
+        can_extract = (not el.previous_sibling
+                       or not el.next_sibling
+                       or _is_nested(el.previous_sibling)
+                       or _is_nested(el.next_sibling))
+        if isinstance(el, NavigableString) and str(el).strip() == "" and can_extract:
+            el.extract()
+
+
+def _is_nested(el) -> bool:
+    return bool(el) and el.name in NESTED_TAGS
+
+
+def _text(el: NavigableString) -> str:
+    text = str(el)
+    parent = el.parent
+    name = parent.name
+    if ("\t" in text or "  " in text) and not (name == "pre" or (name == "code" and parent.parent.name == "pre")):
+        text = _whitespace_re.sub(" ", text)
+    if name != "code" and name != "pre" and text:
+        text = text.replace("*", r"\*").replace("_", r"\_")
+    if name == "li":
+        next_sibling = el.next_sibling
+        if not next_sibling or next_sibling.name in ("ul", "ol"):
+            text = text.rstrip()
+    return text
+
+
+_CLOSE = object()
+
+
+def convert_soup(node: Tag) -> str:
+    """
+    Converts the children of node to Markdown, with the same output as
+    markdownify's MarkdownConverter(heading_style="ATX").convert_soup(node).
+
+    The tree is walked iteratively, and the Markdown of every text node and
+    converted tag is appended to a single list of fragments. A tag that wraps
+    its content (p, a, li...) replaces the fragments of its children with its
+    own when it closes; other tags (div, section, span...) cost nothing. Tags
+    markdownify converts but this module does not know are converted by
+    markdownify itself.
+    """
+    parts = []
+    if node.name in NESTED_TAGS:
+        _drop_nested_whitespace(node)
+    stack = list(zip(reversed(node.contents), repeat(False)))
+    while stack:
+        item = stack.pop()
+        el = item[0]
+        if el is _CLOSE:
+            _, tag, handler, inline, start = item
+            text = "".join(parts[start:])
+            del parts[start:]
+            parts.append(handler(tag, text, inline))
+            continue
+        kind = type(el)
+        if kind is NavigableString:
+            parts.append(_text(el))
+            continue
+        if kind is not Tag:
+            if isinstance(el, NavigableString) and not isinstance(el, (Comment, Doctype)):
+                parts.append(_text(el))
+            if not isinstance(el, Tag):
+                continue
+        inline = item[1]
+        name = el.name
+        handler = _handler(name)
+        if handler is _FALLBACK:
+            parts.append(_fallback.process_tag(el, inline))
+            continue
+        if name in NESTED_TAGS:
+            _drop_nested_whitespace(el)
+        if handler is not None:
+            stack.append((_CLOSE, el, handler, inline, len(parts)))
+        children_inline = inline or name in HEADING_TAGS or name in CELL_TAGS
+        stack.extend(zip(reversed(el.contents), repeat(children_inline)))
+    return "".join(parts)
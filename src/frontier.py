@@ -0,0 +1,81 @@
+from collections import deque
+from functools import lru_cache
+from typing import Iterable, List
+from urllib.parse import parse_qsl, urldefrag, urlencode, urlsplit, urlunsplit
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+@lru_cache(maxsize=1 << 16)
+def normalize_url(url: str) -> str:
+    """
+    Returns a canonical key for a URL so equivalent spellings deduplicate.
+    Drops the fragment and default ports, lowercases scheme and host, strips
+    trailing slashes from the path and sorts the query string.
+    """
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if ":" in host:
+        host = f"[{host}]"
+    try:
+        port = parts.port
+    except ValueError:
+        port = None
+    if port and port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{port}"
+    if parts.username or parts.password:
+        userinfo = parts.username or ""
+        if parts.password:
+            userinfo += f":{parts.password}"
+        host = f"{userinfo}@{host}"
+
+    path = parts.path.rstrip("/") or "/"
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, host, path, query, ""))
+
+
+class Frontier:
+    """
+    FIFO crawl frontier with O(1) enqueue, dequeue and membership checks.
+    Every URL ever added is remembered (by its normalized form), so a page is
+    only scheduled once no matter how many pages link to it.
+    """
+
+    def __init__(self, urls: Iterable[str] = ()):
+        self._queue = deque()
+        self._seen = set()
+        for url in urls:
+            self.add(url)
+
+    def add(self, url: str) -> bool:
+        """Enqueues url unless an equivalent URL was already seen. Returns True if added."""
+        key = normalize_url(url)
+        if key in self._seen:
+            return False
+        self._seen.add(key)
+        self._queue.append(urldefrag(url)[0])
+        return True
+
+    def pop(self) -> str:
+        """Removes and returns the oldest queued URL."""
+        return self._queue.popleft()
+
+    def drain(self) -> List[str]:
+        """Removes and returns every queued URL in FIFO order."""
+        urls = list(self._queue)
+        self._queue.clear()
+        return urls
+
+    def __contains__(self, url: str) -> bool:
+        return normalize_url(url) in self._seen
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    def __bool__(self) -> bool:
+        return bool(self._queue)
+
+    @property
+    def seen_count(self) -> int:
+        return len(self._seen)
@@ -1,78 +1,169 @@
 import os
 import io
+import hashlib
 import logging
+import threading
+from typing import Dict, Optional
+import httplib2
+from google_auth_httplib2 import AuthorizedHttp
 from google.oauth2.credentials import Credentials
 from googleapiclient.discovery import build
 from googleapiclient.http import MediaIoBaseUpload
 from googleapiclient.errors import HttpError
+from src.metrics import get_metrics
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 SCOPES = ['https://www.googleapis.com/auth/drive']
 
-def update_drive_file(drive_folder_id: str, nome: str, markdown_content: str):
+# Payloads up to this size are sent as a single multipart request instead of a
+# resumable session (which costs an extra round trip to open)
+RESUMABLE_THRESHOLD = 5 * 1024 * 1024
+
+class DriveClient:
     """
-    Overwrites or creates a plain text file inside the specified Google Drive folder.
+    Long-lived Google Drive client shared by all uploads of a run.
+
+    The Drive service is discovered once and keeps its credentials, so the
+    OAuth access token is only refreshed when it expires. Each folder is
+    listed once; file IDs and checksums are then resolved from that cached
+    listing and kept up to date as files are created or updated.
+
+    The client can be shared between threads: requests go through a
+    per-thread authorized transport, since httplib2 connections are not
+    thread-safe.
+
+    API calls are timed as drive_request_seconds (per operation), and uploads
+    counted as drive_files (per result) and drive_upload_bytes.
     """
-    client_id = os.environ.get('GCP_CLIENT_ID')
-    client_secret = os.environ.get('GCP_CLIENT_SECRET')
-    refresh_token = os.environ.get('GCP_REFRESH_TOKEN')
 
-    if not all([client_id, client_secret, refresh_token]):
-        raise ValueError("Missing OAuth2 environment variables: GCP_CLIENT_ID, GCP_CLIENT_SECRET, or GCP_REFRESH_TOKEN")
+    def __init__(self, client_id: str, client_secret: str, refresh_token: str):
+        try:
+            creds = Credentials(
+                token=None,
+                refresh_token=refresh_token,
+                token_uri='https://oauth2.googleapis.com/token',
+                client_id=client_id,
+                client_secret=client_secret
+            )
+        except Exception as e:
+            raise ValueError(f"Failed to initialize credentials: {e}")
 
-    try:
-        creds = Credentials(
-            token=None,
-            refresh_token=refresh_token,
-            token_uri='https://oauth2.googleapis.com/token',
-            client_id=client_id,
-            client_secret=client_secret
-        )
-    except Exception as e:
-        raise ValueError(f"Failed to initialize credentials: {e}")
+        self.service = build('drive', 'v3', credentials=creds, cache_discovery=False)
+        self._creds = creds
+        self._local = threading.local()
+        self._folders: Dict[str, Dict[str, dict]] = {}
+        self._lock = threading.RLock()
 
-    try:
-        drive_service = build('drive', 'v3', credentials=creds)
+    def _http(self) -> AuthorizedHttp:
+        """Returns this thread's authorized transport, creating it on first use."""
+        http = getattr(self._local, 'http', None)
+        if http is None:
+            http = self._local.http = AuthorizedHttp(self._creds, http=httplib2.Http())
+        return http
+
+    @classmethod
+    def from_env(cls) -> "DriveClient":
+        """Builds a client from the GCP_CLIENT_ID, GCP_CLIENT_SECRET and GCP_REFRESH_TOKEN variables."""
+        client_id = os.environ.get('GCP_CLIENT_ID')
+        client_secret = os.environ.get('GCP_CLIENT_SECRET')
+        refresh_token = os.environ.get('GCP_REFRESH_TOKEN')
+
+        if not all([client_id, client_secret, refresh_token]):
+            raise ValueError("Missing OAuth2 environment variables: GCP_CLIENT_ID, GCP_CLIENT_SECRET, or GCP_REFRESH_TOKEN")
 
-        file_name = f"{nome}.txt"
-        
-        # Step A: Search for the file in the specific folder
-        query = f"name='{file_name}' and '{drive_folder_id}' in parents and trashed=false"
-        response = drive_service.files().list(q=query, spaces='drive', fields='files(id, name)').execute()
-        files = response.get('files', [])
+        return cls(client_id, client_secret, refresh_token)
+
+    def list_folder(self, drive_folder_id: str) -> Dict[str, dict]:
+        """Returns {file name: file metadata} for a folder, listing it only on first use."""
+        with self._lock:
+            if drive_folder_id in self._folders:
+                return self._folders[drive_folder_id]
+
+            files: Dict[str, dict] = {}
+            query = f"'{drive_folder_id}' in parents and trashed=false"
+            page_token = None
+            while True:
+                with get_metrics().timer("drive_request_seconds", operation="list"):
+                    response = self.service.files().list(
+                        q=query,
+                        spaces='drive',
+                        fields='nextPageToken, files(id, name, md5Checksum)',
+                        pageToken=page_token
+                    ).execute(http=self._http())
+                for file in response.get('files', []):
+                    # Keep the first match, as a name lookup would
+                    files.setdefault(file['name'], file)
+                page_token = response.get('nextPageToken')
+                if not page_token:
+                    break
+
+            self._folders[drive_folder_id] = files
+            return files
+
+    def upload(self, drive_folder_id: str, file_name: str, content: str) -> dict:
+        """
+        Creates or overwrites file_name in the folder. Skips the upload when the
+        existing file has the same MD5 checksum, returning its metadata with 'skipped': True.
+        """
+        metrics = get_metrics()
+        payload = content.encode('utf-8')
+        checksum = hashlib.md5(payload).hexdigest()
+        existing = self.list_folder(drive_folder_id).get(file_name)
+
+        if existing and existing.get('md5Checksum') == checksum:
+            logger.info(f"Drive file {file_name} is unchanged. Skipping upload.")
+            metrics.increment("drive_files", result="skipped")
+            return {'id': existing.get('id'), 'skipped': True}
 
-        # Prepare payload as in-memory bytes
         media = MediaIoBaseUpload(
-            io.BytesIO(markdown_content.encode('utf-8')),
+            io.BytesIO(payload),
             mimetype='text/plain',
-            resumable=True
+            resumable=len(payload) > RESUMABLE_THRESHOLD
         )
 
-        if not files:
-            # Step B1: Create a new file
+        if not existing:
             file_metadata = {
                 'name': file_name,
                 'parents': [drive_folder_id]
             }
-            result = drive_service.files().create(
-                body=file_metadata,
-                media_body=media,
-                fields='id'
-            ).execute()
+            with metrics.timer("drive_request_seconds", operation="create"):
+                result = self.service.files().create(
+                    body=file_metadata,
+                    media_body=media,
+                    fields='id'
+                ).execute(http=self._http())
             logger.info(f"Created new Drive file {file_name} with ID: {result.get('id')} in folder: {drive_folder_id}")
-            return result
+            file_id = result.get('id')
         else:
-            # Step B2: Update existing file
-            existing_file_id = files[0].get('id')
-            result = drive_service.files().update(
-                fileId=existing_file_id,
-                media_body=media
-            ).execute()
-            logger.info(f"Successfully updated Drive file {file_name} with ID: {existing_file_id}")
-            return result
+            file_id = existing.get('id')
+            with metrics.timer("drive_request_seconds", operation="update"):
+                result = self.service.files().update(
+                    fileId=file_id,
+                    media_body=media
+                ).execute(http=self._http())
+            logger.info(f"Successfully updated Drive file {file_name} with ID: {file_id}")
 
+        metrics.increment("drive_files", result="updated" if existing else "created")
+        metrics.increment("drive_upload_bytes", len(payload))
+        with self._lock:
+            self._folders[drive_folder_id][file_name] = {'id': file_id, 'name': file_name, 'md5Checksum': checksum}
+        return result
+
+def update_drive_file(drive_folder_id: str, nome: str, markdown_content: str, client: Optional[DriveClient] = None,
+                      extension: str = "txt"):
+    """
+    Overwrites or creates a plain text file (nome.extension) inside the specified Google Drive folder.
+    If the file already exists with the same content (same MD5 checksum), the upload
+    is skipped and the existing file's metadata is returned with 'skipped': True.
+    Pass a shared DriveClient to reuse its service and folder listings across calls.
+    """
+    client = client or DriveClient.from_env()
+    file_name = f"{nome}.{extension}"
+
+    try:
+        return client.upload(drive_folder_id, file_name, markdown_content)
     except HttpError as error:
         logger.error(f"Google Drive API error: {error}")
         raise
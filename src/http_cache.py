@@ -0,0 +1,116 @@
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Optional
+
+DEFAULT_MAX_ENTRIES = 50000
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+@dataclass
+class CacheEntry:
+    body: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+
+class HttpCache:
+    """
+    On-disk cache of fetched pages used for conditional GETs.
+
+    Each URL maps to its last body (zlib-compressed) plus the ETag and
+    Last-Modified validators the server sent. The cache is bounded by entry
+    count and by stored bytes; the least recently used entries are evicted
+    first. It is a single SQLite file so CI jobs can persist it between runs.
+    """
+
+    def __init__(self, path: str, max_entries: int = DEFAULT_MAX_ENTRIES,
+                 max_bytes: int = DEFAULT_MAX_BYTES):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.stores = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                url TEXT PRIMARY KEY,
+                body BLOB NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                size INTEGER NOT NULL,
+                last_used REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used)")
+        self._conn.commit()
+        count, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        self._count = count
+        self._total_bytes = total
+
+    def get(self, url: str) -> Optional[CacheEntry]:
+        """Returns the cached entry for url, or None if it is not cached."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body, etag, last_modified FROM entries WHERE url = ?", (url,)
+            ).fetchone()
+        if row is None:
+            return None
+        body, etag, last_modified = row
+        return CacheEntry(body=zlib.decompress(body).decode("utf-8"), etag=etag, last_modified=last_modified)
+
+    def touch(self, url: str):
+        """Marks url as recently used after a successful revalidation (304)."""
+        with self._lock:
+            self.hits += 1
+            self._conn.execute("UPDATE entries SET last_used = ? WHERE url = ?", (time.time(), url))
+            self._conn.commit()
+
+    def put(self, url: str, body: str, etag: Optional[str] = None, last_modified: Optional[str] = None):
+        """Stores a freshly downloaded body together with its validators."""
+        blob = zlib.compress(body.encode("utf-8"))
+        with self._lock:
+            self.stores += 1
+            previous = self._conn.execute("SELECT size FROM entries WHERE url = ?", (url,)).fetchone()
+            if previous:
+                self._count -= 1
+                self._total_bytes -= previous[0]
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (url, body, etag, last_modified, size, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (url, blob, etag, last_modified, len(blob), time.time()),
+            )
+            self._count += 1
+            self._total_bytes += len(blob)
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        """Drops least recently used entries until the cache is within its limits."""
+        while self._count > self.max_entries or self._total_bytes > self.max_bytes:
+            row = self._conn.execute(
+                "SELECT url, size FROM entries ORDER BY last_used ASC LIMIT 1"
+            ).fetchone()
+            if row is None:
+                break
+            self._conn.execute("DELETE FROM entries WHERE url = ?", (row[0],))
+            self._count -= 1
+            self._total_bytes -= row[1]
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total_bytes
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
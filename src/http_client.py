@@ -0,0 +1,285 @@
+import logging
+import threading
+import time
+from typing import Optional
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.retry import Retry
+from src.http_cache import HttpCache
+from src.metrics import get_metrics
+from src.rate_limit import RateLimiter, THROTTLE_STATUSES
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT = 10
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF_FACTOR = 0.5
+DEFAULT_POOL_HOSTS = 16
+DEFAULT_POOL_SIZE = 16
+# With a rate limiter, pages still throttled after the retries are fetched again this many times
+DEFAULT_THROTTLE_RETRIES = 2
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+USER_AGENT = "DocScraper/1.0 (+https://github.com/wakespace/docscraper)"
+
+
+class CappedRetry(Retry):
+    """Retry policy that honours Retry-After but never waits longer than MAX_RETRY_AFTER seconds."""
+    MAX_RETRY_AFTER = 60
+
+    def get_retry_after(self, response):
+        retry_after = super().get_retry_after(response)
+        if retry_after is None:
+            return None
+        return min(retry_after, self.MAX_RETRY_AFTER)
+
+
+class _TimedConnection:
+    """
+    Connection mixin that records how long new connections take per host:
+    http_connect_seconds (DNS resolution and TCP connect) and, for HTTPS,
+    http_tls_seconds (the TLS handshake).
+    """
+    _connect_seconds = 0.0
+
+    def _new_conn(self):
+        started = time.perf_counter()
+        try:
+            return super()._new_conn()
+        finally:
+            self._connect_seconds = time.perf_counter() - started
+            get_metrics().observe("http_connect_seconds", self._connect_seconds, host=self.host)
+
+    def connect(self):
+        started = time.perf_counter()
+        super().connect()
+        if isinstance(self, HTTPSConnection):
+            handshake = time.perf_counter() - started - self._connect_seconds
+            get_metrics().observe("http_tls_seconds", handshake, host=self.host)
+
+
+class _TimedHTTPConnection(_TimedConnection, HTTPConnection):
+    pass
+
+
+class _TimedHTTPSConnection(_TimedConnection, HTTPSConnection):
+    pass
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class _TimedAdapter(HTTPAdapter):
+    """HTTPAdapter whose pools open _TimedConnections."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _TimedHTTPConnectionPool,
+            "https": _TimedHTTPSConnectionPool,
+        }
+
+
+class HttpClient:
+    """
+    Shared HTTP session for the fetch path.
+
+    Connections are kept alive in a pool per host (pool_hosts hosts, up to
+    pool_size connections each), so pages of the same site reuse TCP/TLS
+    connections. Transient failures (connection errors and 429/5xx responses)
+    are retried with exponential backoff, honouring Retry-After headers.
+
+    With an HttpCache, fetch() sends If-None-Match / If-Modified-Since for
+    pages seen on a previous run and reuses the cached body on a 304.
+
+    max_connections caps the requests in flight across every thread using the
+    client, e.g. when several documentation targets are crawled at once.
+
+    With a RateLimiter, requests are paced per host (see HostLimiter) and the
+    limiter is told about every throttled (429/503) response, including those
+    retried inside urllib3. A page that is still throttled is fetched again
+    up to throttle_retries times, once the host has been backed off.
+
+    Requests are recorded in the metrics registry (see src.metrics), per host:
+    time waiting for the rate limiter and the connection cap, connection and
+    TLS setup, request latency, response statuses and bytes, and failures.
+    """
+
+    def __init__(self, timeout: float = DEFAULT_TIMEOUT, retries: int = DEFAULT_RETRIES,
+                 backoff_factor: float = DEFAULT_BACKOFF_FACTOR,
+                 pool_hosts: int = DEFAULT_POOL_HOSTS, pool_size: int = DEFAULT_POOL_SIZE,
+                 cache: Optional[HttpCache] = None, max_connections: Optional[int] = None,
+                 rate_limiter: Optional[RateLimiter] = None,
+                 throttle_retries: int = DEFAULT_THROTTLE_RETRIES):
+        self.timeout = timeout
+        self.cache = cache
+        self.rate_limiter = rate_limiter
+        self.throttle_retries = throttle_retries
+        self._connections = threading.BoundedSemaphore(max_connections) if max_connections else None
+        retry = CappedRetry(
+            total=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=frozenset({"GET", "HEAD"}),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        self._retry = retry
+        adapter = _TimedAdapter(pool_connections=pool_hosts, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = USER_AGENT
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """Performs a GET through the pooled session. Raises requests.RequestException on failure."""
+        kwargs.setdefault("timeout", self.timeout)
+        limiter = self.rate_limiter.host(url, self._robots_txt) if self.rate_limiter is not None else None
+        if limiter is None:
+            response = self._send(url, **kwargs)
+        else:
+            with get_metrics().timer("http_rate_limit_wait_seconds", host=_host(url)):
+                limiter.acquire()
+            latency = throttled = status = None
+            try:
+                started = time.monotonic()
+                response = self._send(url, **kwargs)
+                latency = time.monotonic() - started
+                throttled = throttle_count(response)
+                status = response.status_code
+            finally:
+                limiter.release(latency, throttled or 0, kind=status)
+        response.raise_for_status()
+        return response
+
+    def _send(self, url: str, **kwargs) -> requests.Response:
+        if self._connections is None:
+            return self._timed_get(url, **kwargs)
+        with get_metrics().timer("http_connection_wait_seconds"):
+            self._connections.acquire()
+        try:
+            return self._timed_get(url, **kwargs)
+        finally:
+            self._connections.release()
+
+    def _timed_get(self, url: str, **kwargs) -> requests.Response:
+        metrics = get_metrics()
+        host = _host(url)
+        started = time.perf_counter()
+        try:
+            response = self.session.get(url, **kwargs)
+        except requests.RequestException as e:
+            metrics.increment("http_errors", host=host, error=type(e).__name__)
+            raise
+        metrics.observe("http_request_seconds", time.perf_counter() - started, host=host)
+        metrics.increment("http_responses", host=host, status=response.status_code)
+        return response
+
+    def _robots_txt(self, url: str) -> Optional[str]:
+        """Fetches robots.txt for the rate limiter, outside of rate limiting. Returns None if unavailable."""
+        try:
+            response = self._send(url, timeout=self.timeout)
+        except requests.RequestException:
+            return None
+        return response.text if response.status_code == 200 else None
+
+    def _throttle_delay(self, response: requests.Response, attempt: int) -> float:
+        """Seconds to wait before fetching a throttled page again: Retry-After, else exponential backoff."""
+        header = response.headers.get("Retry-After")
+        if header:
+            try:
+                return min(self._retry.parse_retry_after(header), CappedRetry.MAX_RETRY_AFTER)
+            except Exception:
+                pass
+        return min(2.0 ** attempt, CappedRetry.MAX_RETRY_AFTER)
+
+    def fetch(self, url: str) -> Optional[str]:
+        """Fetches a URL and returns its body as text, or None if the request failed."""
+        cached = self.cache.get(url) if self.cache is not None else None
+        headers = {}
+        if cached is not None:
+            if cached.etag:
+                headers["If-None-Match"] = cached.etag
+            if cached.last_modified:
+                headers["If-Modified-Since"] = cached.last_modified
+
+        throttle_retries = self.throttle_retries if self.rate_limiter is not None else 0
+        for attempt in range(throttle_retries + 1):
+            try:
+                response = self.get(url, headers=headers)
+                break
+            except requests.HTTPError as e:
+                throttled = e.response is not None and e.response.status_code in THROTTLE_STATUSES
+                if not throttled or attempt == throttle_retries:
+                    logger.warning(f"Failed to fetch {url}: {e}")
+                    get_metrics().increment("fetch_failures", host=_host(url))
+                    return None
+                delay = self._throttle_delay(e.response, attempt)
+                logger.info(f"Still throttled on {url} ({e.response.status_code}); fetching again in {delay:.1f}s")
+                time.sleep(delay)
+            except requests.RequestException as e:
+                logger.warning(f"Failed to fetch {url}: {e}")
+                get_metrics().increment("fetch_failures", host=_host(url))
+                return None
+
+        if response.status_code == 304 and cached is not None:
+            self.cache.touch(url)
+            get_metrics().increment("http_cache_revalidated", host=_host(url))
+            return cached.body
+
+        get_metrics().increment("http_response_bytes", len(response.content), host=_host(url))
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if self.cache is not None and (etag or last_modified):
+            self.cache.put(url, response.text, etag=etag, last_modified=last_modified)
+        return response.text
+
+    def close(self):
+        self.session.close()
+        if self.cache is not None:
+            self.cache.close()
+
+
+def _host(url: str) -> str:
+    """Host name used to label the metrics of a request (the same as connections report)."""
+    return urlsplit(url).hostname or ""
+
+
+def throttle_count(response: requests.Response) -> int:
+    """How many 429/503 responses a request got, counting those urllib3 retried transparently."""
+    retries = getattr(response.raw, "retries", None)
+    history = getattr(retries, "history", None) or ()
+    count = sum(1 for attempt in history if attempt.status in THROTTLE_STATUSES)
+    return count + (1 if response.status_code in THROTTLE_STATUSES else 0)
+
+
+_default_client: Optional[HttpClient] = None
+_default_client_lock = threading.Lock()
+
+
+def get_default_client() -> HttpClient:
+    """Returns the process-wide HttpClient, creating it on first use."""
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = HttpClient()
+        return _default_client
+
+
+def set_default_client(client: Optional[HttpClient]):
+    """Replaces the process-wide HttpClient (None resets it to a fresh default on next use)."""
+    global _default_client
+    with _default_client_lock:
+        _default_client = client
+
+
+def fetch(url: str) -> Optional[str]:
+    """Fetches a URL through the shared HttpClient. Returns None on failure."""
+    return get_default_client().fetch(url)
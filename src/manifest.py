@@ -0,0 +1,137 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import zlib
+from typing import Optional
+from src.crawler import PageResult
+
+
+def target_slug(nome: str) -> str:
+    """Returns a file name safe form of the documentation target name nome."""
+    return re.sub(r"[^a-z0-9]+", "-", nome.lower()).strip("-") or "target"
+
+
+def manifest_path_for(state_dir: str, nome: str) -> str:
+    """Returns the manifest file used for the documentation target named nome."""
+    return os.path.join(state_dir, "manifests", f"{target_slug(nome)}.sqlite")
+
+
+def _result(url: str, row: tuple) -> PageResult:
+    markdown, links, canonical = row
+    return PageResult(url=url, markdown=zlib.decompress(markdown).decode("utf-8"), links=json.loads(links),
+                      canonical=canonical)
+
+
+class PageManifest:
+    """
+    Per-target record of processed pages, used for incremental scrapes.
+
+    Maps URL -> hash of the fetched HTML -> (converted Markdown, outgoing links,
+    canonical URL).
+    When a page's HTML hashes the same as on the previous run, its stored
+    result is reused and parsing/conversion is skipped entirely.
+
+    Pages discovered through a sitemap also record their `lastmod`; when the
+    sitemap reports the same lastmod again, the page is not even fetched.
+
+    `version` identifies the page-processing logic; a manifest written by a
+    different version is discarded so stale conversions are never reused.
+    """
+
+    def __init__(self, path: str, version: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.reused = 0
+        self.converted = 0
+        self._seen = set()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                content_hash TEXT NOT NULL,
+                markdown BLOB NOT NULL,
+                links TEXT NOT NULL,
+                lastmod TEXT,
+                canonical TEXT
+            )
+        """)
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(pages)")]
+        for column in ("lastmod", "canonical"):
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE pages ADD COLUMN {column} TEXT")
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        if row is None or row[0] != version:
+            self._conn.execute("DELETE FROM pages")
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('version', ?)", (version,))
+        self._conn.commit()
+
+    def lookup(self, url: str, content_hash: str, lastmod: Optional[str] = None) -> Optional[PageResult]:
+        """
+        Returns the stored result for url if its HTML hash is unchanged, else None.
+        On a hit, the page's recorded lastmod is updated to lastmod.
+        """
+        with self._lock:
+            self._seen.add(url)
+            row = self._conn.execute(
+                "SELECT markdown, links, canonical FROM pages WHERE url = ? AND content_hash = ?", (url, content_hash)
+            ).fetchone()
+            if row is None:
+                return None
+            self.reused += 1
+            if lastmod is not None:
+                self._conn.execute("UPDATE pages SET lastmod = ? WHERE url = ?", (lastmod, url))
+                self._conn.commit()
+        return _result(url, row)
+
+    def lookup_lastmod(self, url: str, lastmod: str) -> Optional[PageResult]:
+        """Returns the stored result for url if it was stored with the same lastmod, else None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT markdown, links, canonical FROM pages WHERE url = ? AND lastmod = ?", (url, lastmod)
+            ).fetchone()
+            if row is None:
+                return None
+            self._seen.add(url)
+            self.reused += 1
+        return _result(url, row)
+
+    def store(self, result: PageResult, content_hash: str, lastmod: Optional[str] = None):
+        """Records the processed result of a page (and its sitemap lastmod, if any) for future runs."""
+        blob = zlib.compress(result.markdown.encode("utf-8"))
+        with self._lock:
+            self._seen.add(result.url)
+            self.converted += 1
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages (url, content_hash, markdown, links, lastmod, canonical) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (result.url, content_hash, blob, json.dumps(result.links), lastmod, result.canonical),
+            )
+            self._conn.commit()
+
+    def keep(self, url: str):
+        """Marks url as encountered in this run without looking it up, so prune() keeps it."""
+        with self._lock:
+            self._seen.add(url)
+
+    def prune(self) -> int:
+        """Removes pages that were not encountered in this run. Returns how many were removed."""
+        with self._lock:
+            urls = [row[0] for row in self._conn.execute("SELECT url FROM pages")]
+            stale = [(url,) for url in urls if url not in self._seen]
+            self._conn.executemany("DELETE FROM pages WHERE url = ?", stale)
+            self._conn.commit()
+        return len(stale)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
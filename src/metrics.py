@@ -0,0 +1,268 @@
+import cProfile
+import json
+import math
+import pstats
+import sys
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Upper bounds, in seconds, of the histogram buckets (an implicit +Inf bucket follows)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+PROMETHEUS_PREFIX = "docscraper_"
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: dict) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+class Histogram:
+    """Distribution of observed values (e.g. latencies) over fixed buckets."""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-quantile (the maximum for the last bucket)."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                return self.buckets[index] if index < len(self.buckets) else self.max
+        return self.max
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "mean": round(self.sum / self.count, 6) if self.count else 0.0,
+            "max": round(self.max, 6),
+            "p50": self.quantile(0.5),
+            "p90": self.quantile(0.9),
+            "p99": self.quantile(0.99),
+        }
+
+
+class Metrics:
+    """
+    Thread-safe registry of the counters and histograms of a run.
+
+    Components record through get_metrics():
+      - increment(name, value, **labels) adds to a counter (pages, bytes...),
+      - observe(name, value, **labels) adds a value to a histogram,
+      - timer(name, **labels) observes the duration of a with block.
+    Labels (e.g. host=..., stage=...) split a metric into series.
+
+    report() returns a JSON-serializable snapshot and to_prometheus() the
+    Prometheus text exposition format. To send metrics elsewhere (StatsD,
+    OpenTelemetry...), subclass and override increment() and observe(), and
+    install the instance with set_metrics().
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.started = time.time()
+        self._counters: Dict[str, Dict[Labels, float]] = {}
+        self._histograms: Dict[str, Dict[Labels, Histogram]] = {}
+        self._lock = threading.Lock()
+
+    def increment(self, name: str, value: float = 1, **labels):
+        key = _labels(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        key = _labels(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram(self.buckets)
+            histogram.observe(value)
+
+    @contextmanager
+    def timer(self, name: str, **labels) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def counter(self, name: str, **labels) -> float:
+        """Current value of a counter series (0 if never incremented)."""
+        with self._lock:
+            return self._counters.get(name, {}).get(_labels(labels), 0)
+
+    def histogram(self, name: str, **labels) -> Optional[Histogram]:
+        with self._lock:
+            return self._histograms.get(name, {}).get(_labels(labels))
+
+    def totals(self, name: str, label: str) -> Dict[str, float]:
+        """Sum of a histogram's observations (or of a counter) grouped by one label, e.g. time by stage."""
+        totals: Dict[str, float] = {}
+        with self._lock:
+            if name in self._histograms:
+                values = [(key, histogram.sum) for key, histogram in self._histograms[name].items()]
+            else:
+                values = list(self._counters.get(name, {}).items())
+        for key, value in values:
+            group = dict(key).get(label, "")
+            totals[group] = totals.get(group, 0) + value
+        return totals
+
+    def report(self) -> dict:
+        """Snapshot of every metric, as plain JSON-serializable data."""
+        with self._lock:
+            counters = {
+                name: [{"labels": dict(key), "value": value} for key, value in sorted(series.items())]
+                for name, series in sorted(self._counters.items())
+            }
+            histograms = {
+                name: [{"labels": dict(key), **histogram.summary()} for key, histogram in sorted(series.items())]
+                for name, series in sorted(self._histograms.items())
+            }
+        return {
+            "started": datetime.fromtimestamp(self.started, timezone.utc).isoformat(),
+            "duration_seconds": round(time.time() - self.started, 3),
+            "counters": counters,
+            "histograms": histograms,
+        }
+
+    def to_prometheus(self) -> str:
+        """Every metric in the Prometheus text exposition format (counters get a _total suffix)."""
+        lines: List[str] = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                metric = PROMETHEUS_PREFIX + (name if name.endswith("_total") else name + "_total")
+                lines.append(f"# TYPE {metric} counter")
+                for key, value in sorted(series.items()):
+                    lines.append(f"{metric}{_format_labels(key)} {_format_value(value)}")
+            for name, series in sorted(self._histograms.items()):
+                metric = PROMETHEUS_PREFIX + name
+                lines.append(f"# TYPE {metric} histogram")
+                for key, histogram in sorted(series.items()):
+                    cumulative = 0
+                    for bound, count in zip(list(histogram.buckets) + [math.inf], histogram.counts):
+                        cumulative += count
+                        le = "+Inf" if bound == math.inf else _format_value(bound)
+                        lines.append(f"{metric}_bucket{_format_labels(key + (('le', le),))} {cumulative}")
+                    lines.append(f"{metric}_sum{_format_labels(key)} {_format_value(histogram.sum)}")
+                    lines.append(f"{metric}_count{_format_labels(key)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(key: Labels) -> str:
+    if not key:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for _, value in key)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(key, escaped)) + "}"
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def write_json_report(path: str, report: dict):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+
+# Since Python 3.12, cProfile is built on the process-wide sys.monitoring: a profiler sees
+# every thread, and a second one cannot be enabled while it runs
+PROFILER_SEES_ALL_THREADS = sys.version_info >= (3, 12)
+
+
+class ThreadProfiler:
+    """
+    cProfile hook for a run whose work is spread over threads: each thread of
+    interest runs in a profile() block. Before Python 3.12, cProfile only sees
+    the thread it is enabled in, so each block has its own profiler and the
+    profiles are merged by dump(). From 3.12 on, the outermost block enables
+    a single profiler that sees every thread, and blocks entered while it runs
+    share it.
+    """
+
+    def __init__(self):
+        self._profiles: List[cProfile.Profile] = []
+        self._lock = threading.Lock()
+        self._shared: Optional[cProfile.Profile] = None
+        self._depth = 0
+
+    @contextmanager
+    def profile(self) -> Iterator[None]:
+        if PROFILER_SEES_ALL_THREADS:
+            with self._shared_profile():
+                yield
+            return
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            with self._lock:
+                self._profiles.append(profiler)
+
+    @contextmanager
+    def _shared_profile(self) -> Iterator[None]:
+        with self._lock:
+            if self._depth == 0:
+                self._shared = cProfile.Profile()
+                self._shared.enable()
+            self._depth += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._depth -= 1
+                if self._depth == 0:
+                    self._shared.disable()
+                    self._profiles.append(self._shared)
+                    self._shared = None
+
+    def dump(self, path: str) -> Optional[pstats.Stats]:
+        """Writes the merged profile to path (readable with pstats or snakeviz). Returns the stats."""
+        with self._lock:
+            profiles = list(self._profiles)
+        if not profiles:
+            return None
+        stats = pstats.Stats(profiles[0])
+        for profile in profiles[1:]:
+            stats.add(profile)
+        stats.dump_stats(path)
+        return stats
+
+
+_metrics = Metrics()
+_metrics_lock = threading.Lock()
+
+
+def get_metrics() -> Metrics:
+    """Returns the process-wide metrics registry."""
+    return _metrics
+
+
+def set_metrics(metrics: Optional[Metrics]):
+    """Replaces the process-wide metrics registry (None installs a fresh one)."""
+    global _metrics
+    with _metrics_lock:
+        _metrics = metrics if metrics is not None else Metrics()
@@ -0,0 +1,102 @@
+import os
+import struct
+import tempfile
+import threading
+import zlib
+from typing import Dict, Iterator, Optional, Tuple
+
+# Record header: URL length and compressed Markdown length, in bytes
+_HEADER = struct.Struct(">II")
+
+
+class PageStore:
+    """
+    Append-only file of converted pages, so a crawl does not keep every page's
+    Markdown in memory until it is emitted.
+
+    Each record is a header, the page URL (UTF-8) and its zlib-compressed UTF-8
+    Markdown. An in-memory index maps every URL to its latest record; reads go
+    straight to the record's offset (os.pread), so any page can be read back
+    at any time, from any thread, while the crawl keeps appending.
+
+    Without a path the store lives in an anonymous temporary file, deleted on
+    close(). With a path the file is kept: opening it again rebuilds the index,
+    so the pages of a previous run can be read back by URL. A record cut short
+    by a crash is discarded.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        if path is None:
+            self._file = tempfile.TemporaryFile()
+        else:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # Not opened for appending: records are written at explicit offsets
+            self._file = os.fdopen(os.open(path, os.O_RDWR | os.O_CREAT, 0o644), "r+b")
+        self._fd = self._file.fileno()
+        self._lock = threading.Lock()
+        self._index: Dict[str, Tuple[int, int]] = {}
+        self._end = 0
+        self.bytes_written = 0
+        self._load()
+
+    def _load(self):
+        """Rebuilds the index from the records on disk, dropping a truncated last record."""
+        size = os.fstat(self._fd).st_size
+        offset = 0
+        while offset + _HEADER.size <= size:
+            url_length, length = _HEADER.unpack(os.pread(self._fd, _HEADER.size, offset))
+            end = offset + _HEADER.size + url_length + length
+            if end > size:
+                break
+            url = os.pread(self._fd, url_length, offset + _HEADER.size).decode("utf-8")
+            self._index[url] = (offset, end - offset)
+            offset = end
+        if offset < size:
+            os.ftruncate(self._fd, offset)
+        self._end = offset
+
+    def put(self, url: str, markdown: str) -> int:
+        """Appends the Markdown of url, replacing any earlier record of it. Returns the record's offset."""
+        url_bytes = url.encode("utf-8")
+        blob = zlib.compress(markdown.encode("utf-8"))
+        record = _HEADER.pack(len(url_bytes), len(blob)) + url_bytes + blob
+        with self._lock:
+            offset = self._end
+            os.pwrite(self._fd, record, offset)
+            self._end += len(record)
+            self._index[url] = (offset, len(record))
+            self.bytes_written += len(record)
+        return offset
+
+    def read(self, offset: int) -> str:
+        """Returns the Markdown of the record at offset (as returned by put)."""
+        url_length, length = _HEADER.unpack(os.pread(self._fd, _HEADER.size, offset))
+        blob = os.pread(self._fd, length, offset + _HEADER.size + url_length)
+        return zlib.decompress(blob).decode("utf-8")
+
+    def get(self, url: str) -> Optional[str]:
+        """Returns the latest Markdown stored for url, or None."""
+        with self._lock:
+            entry = self._index.get(url)
+        return self.read(entry[0]) if entry is not None else None
+
+    def pages(self) -> Iterator[Tuple[str, str]]:
+        """Yields (url, markdown) for every stored URL, in the order they were first stored."""
+        with self._lock:
+            entries = list(self._index.items())
+        for url, (offset, _) in entries:
+            yield url, self.read(offset)
+
+    def __contains__(self, url: str) -> bool:
+        with self._lock:
+            return url in self._index
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._index)
+
+    def close(self):
+        self._file.close()
@@ -0,0 +1,254 @@
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, fields
+from typing import Callable, Dict, Optional
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REQUESTS_PER_SECOND = 8.0
+DEFAULT_BURST = 8
+DEFAULT_MAX_CONCURRENCY = 6
+
+# Responses that mean "slow down"
+THROTTLE_STATUSES = (429, 503)
+
+# Floor of the adaptive request rate, in requests per second
+MIN_REQUESTS_PER_SECOND = 0.2
+# A host is backed off at most once per interval, however many throttled responses arrive at once
+BACKOFF_INTERVAL = 1.0
+# Responses slower than this multiple of the baseline latency count as congestion
+LATENCY_FACTOR = 3.0
+# The baseline follows faster responses at once, and slower ones by this fraction of the
+# difference, so it tracks the host's usual fast responses and forgets one-off outliers
+BASELINE_WEIGHT = 0.1
+
+
+@dataclass
+class RateLimit:
+    """
+    Politeness settings of a host. Targets may override them with the
+    "rate_limit" object of docs_links.json (same keys).
+    """
+    requests_per_second: float = DEFAULT_REQUESTS_PER_SECOND
+    burst: int = DEFAULT_BURST
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY
+    respect_crawl_delay: bool = True
+
+    @classmethod
+    def keys(cls):
+        return [f.name for f in fields(cls)]
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: `rate` tokens per second, holding at most `burst`.
+    acquire() reserves a token, sleeping until it is available, so waiting
+    callers are spaced 1/rate seconds apart.
+    """
+
+    def __init__(self, rate: float, burst: int, clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.rate = rate
+        self.burst = burst
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = float(burst)
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def set_rate(self, rate: float):
+        with self._lock:
+            self._refill(self._clock())
+            self.rate = rate
+
+    def acquire(self) -> float:
+        """Takes one token, waiting if none is available. Returns the time waited."""
+        with self._lock:
+            self._refill(self._clock())
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait:
+            self._sleep(wait)
+        return wait
+
+
+def parse_crawl_delay(robots_txt: str, user_agent: str) -> Optional[float]:
+    """
+    Returns the Crawl-delay that robots.txt sets for user_agent (or for *), in
+    seconds. Groups naming the agent take precedence over the * group.
+    """
+    token = user_agent.split("/")[0].lower()
+    delays: Dict[str, float] = {}
+    agents, in_rules = [], False
+    for line in robots_txt.splitlines():
+        key, _, value = line.split("#", 1)[0].partition(":")
+        key, value = key.strip().lower(), value.strip()
+        if key == "user-agent":
+            if in_rules:
+                agents, in_rules = [], False
+            agents.append(value.lower())
+        elif key:
+            in_rules = True
+            if key == "crawl-delay":
+                try:
+                    delay = float(value)
+                except ValueError:
+                    continue
+                for agent in agents:
+                    delays.setdefault(agent, delay)
+    specific = [delay for agent, delay in delays.items() if agent not in ("", "*") and agent in token]
+    if specific:
+        return specific[0]
+    return delays.get("*")
+
+
+class HostLimiter:
+    """
+    Rate and concurrency control for one host.
+
+    Requests take a token from a token bucket (requests_per_second, capped to
+    1/Crawl-delay when robots.txt sets one) and a slot in a concurrency window
+    of up to max_concurrency requests. The window and the rate adapt AIMD
+    style: throttled responses (429/503) halve both, responses much slower
+    than the baseline latency shrink the window by one, and other successful
+    responses grow them back gradually. The baseline is kept per kind of
+    response (e.g. per status code), since a 304 from a revalidated cache
+    entry says nothing about how fast a 200 should be.
+    """
+
+    def __init__(self, host: str, settings: RateLimit, crawl_delay: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic, sleep: Callable[[float], None] = time.sleep):
+        rate, burst = settings.requests_per_second, settings.burst
+        if crawl_delay and settings.respect_crawl_delay:
+            rate, burst = min(rate, 1.0 / crawl_delay), 1
+        self.host = host
+        self.max_rate = rate
+        self.max_concurrency = settings.max_concurrency
+        self.limit = float(settings.max_concurrency)
+        self.in_flight = 0
+        self.throttled = 0
+        self.bucket = TokenBucket(rate, burst, clock=clock, sleep=sleep)
+        self._clock = clock
+        self._baselines: Dict[object, float] = {}
+        self._last_backoff = float("-inf")
+        self._condition = threading.Condition()
+
+    def acquire(self):
+        """Waits for a concurrency slot and a token."""
+        with self._condition:
+            while self.in_flight >= int(self.limit):
+                self._condition.wait()
+            self.in_flight += 1
+        self.bucket.acquire()
+
+    def release(self, latency: Optional[float], throttled: int = 0, kind: object = None):
+        """
+        Frees the slot taken by acquire(). latency is the response time, or None
+        if the request failed; throttled is how many 429/503 responses it received;
+        kind (e.g. the status code) groups the responses whose latencies compare.
+        """
+        with self._condition:
+            self.in_flight -= 1
+            if throttled:
+                self.throttled += throttled
+                self._back_off()
+            elif latency is not None:
+                baseline = self._baselines.get(kind, latency)
+                if latency > LATENCY_FACTOR * baseline and self.limit > 1:
+                    self.limit = max(1.0, self.limit - 1)
+                else:
+                    self._ramp_up()
+                self._baselines[kind] = min(latency, baseline + BASELINE_WEIGHT * (latency - baseline))
+            self._condition.notify_all()
+
+    def _back_off(self):
+        now = self._clock()
+        if now - self._last_backoff < BACKOFF_INTERVAL:
+            return
+        self._last_backoff = now
+        self.limit = max(1.0, self.limit / 2)
+        rate = max(MIN_REQUESTS_PER_SECOND, self.bucket.rate / 2)
+        self.bucket.set_rate(rate)
+        logger.info(f"Throttled by {self.host}: concurrency {int(self.limit)}, {rate:.2f} requests/s")
+
+    def _ramp_up(self):
+        # Additive increase: about one more slot per window of successful responses
+        self.limit = min(float(self.max_concurrency), self.limit + 1 / self.limit)
+        if self.bucket.rate < self.max_rate:
+            self.bucket.set_rate(min(self.max_rate, self.bucket.rate + self.max_rate / 20))
+
+
+class RateLimiter:
+    """
+    Per-host HostLimiters, created on first request to a host. robots.txt is
+    read once per host (through load_robots) for its Crawl-delay, without
+    holding up requests to other hosts; other requests to the same host wait
+    for it.
+    """
+
+    def __init__(self, default: Optional[RateLimit] = None, user_agent: str = "*"):
+        self.default = default or RateLimit()
+        self.user_agent = user_agent
+        self._overrides: Dict[str, RateLimit] = {}
+        self._hosts: Dict[str, HostLimiter] = {}
+        # Limiters being created, while their robots.txt is read
+        self._loading: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def configure(self, url: str, settings: RateLimit):
+        """Sets the settings of url's host (a target override); applies from the next request on."""
+        host = urlsplit(url).netloc.lower()
+        with self._lock:
+            self._overrides[host] = settings
+            self._hosts.pop(host, None)
+            self._loading.pop(host, None)
+
+    def host(self, url: str, load_robots: Callable[[str], Optional[str]]) -> HostLimiter:
+        """Returns the limiter of url's host. load_robots(robots_url) returns robots.txt or None."""
+        parts = urlsplit(url)
+        host = parts.netloc.lower()
+        with self._lock:
+            limiter = self._hosts.get(host)
+            if limiter is not None:
+                return limiter
+            loading = self._loading.get(host)
+            if loading is None:
+                loading = self._loading[host] = Future()
+                settings = self._overrides.get(host, self.default)
+            else:
+                settings = None
+        if settings is None:
+            return loading.result()
+
+        try:
+            crawl_delay = None
+            if settings.respect_crawl_delay:
+                robots_txt = load_robots(f"{parts.scheme}://{parts.netloc}/robots.txt")
+                crawl_delay = parse_crawl_delay(robots_txt, self.user_agent) if robots_txt else None
+                if crawl_delay:
+                    logger.info(f"{host} sets Crawl-delay: {crawl_delay}s")
+            limiter = HostLimiter(host, settings, crawl_delay)
+        except BaseException as e:
+            with self._lock:
+                if self._loading.get(host) is loading:
+                    del self._loading[host]
+            loading.set_exception(e)
+            raise
+        with self._lock:
+            # Unless configure() changed the host's settings in the meantime
+            if self._loading.get(host) is loading:
+                del self._loading[host]
+                self._hosts[host] = limiter
+        loading.set_result(limiter)
+        return limiter
+
+    def hosts(self) -> Dict[str, HostLimiter]:
+        with self._lock:
+            return dict(self._hosts)
@@ -1,45 +1,194 @@
+import os
 import re
-import requests
-from bs4 import BeautifulSoup
+import hashlib
+import time
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import replace
+from functools import partial
+from typing import Callable, Iterator, Optional
+from bs4 import BeautifulSoup, NavigableString, Tag
 from urllib.parse import urljoin, urlparse
 import markdownify
 import logging
+from src import fast_markdown
+from src.boilerplate import BoilerplateFilter
+from src.checkpoint import CrawlCheckpoint
+from src.crawler import CrawlEngine, Fetcher, Lookup, PageResult, Processor, DEFAULT_CONCURRENCY, DEFAULT_PER_HOST_LIMIT
+from src.dedup import Deduplicator
+from src.discovery import Discovery, discover, is_plain_text, parse_llms_links
+from src.embedded import DEFAULT_EXTRACTORS, EMBEDDED_RATIO, SHELL_MAX_CHARS, EmbeddedContent, find_embedded_content
+from src.frontier import normalize_url
+from src.http_client import HttpClient, fetch, get_default_client
+from src.manifest import PageManifest
+from src.metrics import get_metrics
+from src.page_store import PageStore
+from src.rate_limit import RateLimit
+from src.url_filter import UrlFilter
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = "lxml"
+except ImportError:
+    HTML_PARSER = "html.parser"
+
+# Bump whenever process_page output changes, so incremental manifests are rebuilt.
+# The parser is part of the version since lxml and html.parser can build different trees.
+PROCESSING_VERSION = f"7-{HTML_PARSER}"
+
+# Tags removed from every page before conversion (navigation, scripts, media, forms...)
+NON_CONTENT_TAGS = frozenset([
+    "nav", "footer", "header", "aside", "script", "style", "svg", "img", "noscript", "form",
+    "iframe", "video", "audio", "canvas", "map", "area", "button", "input", "select", "textarea",
+])
+
+# Pages with these extensions are already Markdown/plain text (e.g. pages listed in llms.txt)
+TEXT_EXTENSIONS = (".md", ".txt")
+# Content types of <link rel="alternate"> Markdown versions of a page
+MARKDOWN_TYPES = ("text/markdown", "text/x-markdown")
+
+# Main content containers, in order of preference
+CONTENT_TAGS = ("main", "article", "body")
+
+PAGE_SEPARATOR = "\n\n---\n\n"
+
 def clean_text(text: str) -> str:
     """Condenses 3 or more consecutive newlines into exactly 2."""
     return re.sub(r'\n{3,}', '\n\n', text)
 
-def chunk_text(text: str, max_words: int = 400000) -> list[str]:
+def count_words(text: str) -> int:
     """
-    Splits text into chunks, ensuring no chunk exceeds max_words words.
+    Counts whitespace-separated words (same result as len(text.split())) in a
+    single pass, line by line, so only one line's words exist at a time.
+    """
+    total = 0
+    position = 0
+    while True:
+        end = text.find('\n', position)
+        if end == -1:
+            return total + len(text[position:].split())
+        total += len(text[position:end].split())
+        position = end + 1
+
+def chunk_text(text: str, max_words: int = 400000, max_bytes: Optional[int] = None) -> list[str]:
+    """
+    Splits text into chunks, ensuring no chunk exceeds max_words words
+    (and, if given, max_bytes bytes of UTF-8).
     Splits at line breaks to preserve code blocks and formatting.
     """
-    if len(text.split()) <= max_words:
-        return [text]
-
-    chunks = []
-    current_chunk = []
-    current_word_count = 0
-
-    for line in text.split('\n'):
-        line_word_count = len(line.split())
-        
-        # If a single line is impossibly large, we just have to include it (very rare)
-        if current_word_count + line_word_count > max_words and current_chunk:
-            chunks.append('\n'.join(current_chunk))
-            current_chunk = [line]
-            current_word_count = line_word_count
+    assembler = ChunkAssembler(max_words=max_words, max_bytes=max_bytes)
+    chunks = list(assembler.feed(text))
+    chunks.extend(assembler.finish())
+    return chunks
+
+class ChunkAssembler:
+    """
+    Packs streamed text into chunks at line breaks.
+
+    Text is fed in pieces and scanned once: complete lines are counted in
+    place (words, and UTF-8 bytes when max_bytes is set) and runs of lines are
+    copied as single slices. A chunk is yielded as soon as the next line would
+    push it past max_words or max_bytes, so only the chunk being assembled is
+    held in memory. A single line larger than the limits becomes its own chunk.
+    """
+
+    def __init__(self, max_words: int = 400000, max_bytes: Optional[int] = None):
+        self.max_words = max_words
+        self.max_bytes = max_bytes
+        self.chunk_count = 0
+        self.total_words = 0
+        self.total_chars = 0
+        self._partial = None
+        self._parts = []
+        self._has_line = False
+        self._words = 0
+        self._bytes = 0
+
+    def feed(self, text: str) -> Iterator[str]:
+        """Adds text to the document, yielding every chunk that became full."""
+        self.total_chars += len(text)
+        start = 0
+        if self._partial is not None:
+            # Complete the line left open by the previous piece
+            end = text.find('\n')
+            if end == -1:
+                self._partial += text
+                return
+            line = self._partial + text[:end]
+            self._partial = None
+            if self._add(len(line.split()), self._size(line, line.isascii())):
+                yield self._flush()
+            self._append(line)
+            start = end + 1
+        yield from self._scan(text, start)
+
+    def finish(self) -> Iterator[str]:
+        """Flushes the last chunk. Yields nothing if no text was fed."""
+        if self._partial is None:
+            return
+        line = self._partial
+        self._partial = None
+        if self._add(len(line.split()), self._size(line, line.isascii())):
+            yield self._flush()
+        self._append(line)
+        yield self._flush()
+
+    def _scan(self, text: str, start: int) -> Iterator[str]:
+        is_ascii = text.isascii()
+        run_start = position = start
+        while True:
+            end = text.find('\n', position)
+            if end == -1:
+                break
+            line = text[position:end]
+            if self._add(len(line.split()), self._size(line, is_ascii)):
+                if position > run_start:
+                    self._append(text[run_start:position - 1])
+                yield self._flush()
+                run_start = position
+            position = end + 1
+
+        if position > run_start:
+            self._append(text[run_start:position - 1])
+        self._partial = text[position:]
+
+    @staticmethod
+    def _size(line: str, is_ascii: bool) -> int:
+        return len(line) if is_ascii else len(line.encode('utf-8'))
+
+    def _add(self, words: int, size: int) -> bool:
+        """
+        Accounts a line of the given word count and byte size. Returns True if
+        the current chunk must be flushed before the line (the line then starts
+        the next chunk).
+        """
+        self.total_words += words
+        overflow = self._has_line and (
+            self._words + words > self.max_words
+            or (self.max_bytes is not None and self._bytes + 1 + size > self.max_bytes)
+        )
+        if overflow:
+            self._words, self._bytes = words, size
         else:
-            current_chunk.append(line)
-            current_word_count += line_word_count
+            self._words += words
+            self._bytes += size + (1 if self._has_line else 0)
+        self._has_line = True
+        return overflow
 
-    if current_chunk:
-        chunks.append('\n'.join(current_chunk))
+    def _append(self, segment: str):
+        """Appends one or more complete lines (without trailing newline) to the current chunk."""
+        if self._parts:
+            self._parts.append('\n')
+        self._parts.append(segment)
 
-    return chunks
+    def _flush(self) -> str:
+        chunk = ''.join(self._parts)
+        self._parts = []
+        self.chunk_count += 1
+        return chunk
 
 def is_internal_link(base_url: str, link_url: str) -> bool:
     """Check if a given link belongs to the same domain as the base URL."""
@@ -49,22 +198,11 @@ def is_internal_link(base_url: str, link_url: str) -> bool:
 
 def fetch_and_clean_html(url: str) -> str:
     """Fetches a URL and removes semantic non-content tags."""
-    try:
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-    except requests.RequestException as e:
-        logger.warning(f"Failed to fetch {url}: {e}")
+    html = fetch(url)
+    if html is None:
         return ""
 
-    soup = BeautifulSoup(response.text, 'html.parser')
-
-    # Remove unwanted tags aggressively to avoid base64 data and SVG noise
-    for tag in soup(["nav", "footer", "header", "aside", "script", "style", "svg", "img", "noscript", "form", "iframe", "video", "audio", "canvas", "map", "area", "button", "input", "select", "textarea"]):
-        tag.decompose()
-
-    # Try to find a main content container, fallback to body
-    main_content = soup.find("main") or soup.find("article") or soup.find("body") or soup
-
+    _, main_content, _ = _extract(BeautifulSoup(html, HTML_PARSER), url)
     return str(main_content)
 
 def convert_to_markdown(html_content: str) -> str:
@@ -74,52 +212,472 @@ def convert_to_markdown(html_content: str) -> str:
     # Strip whitespace, ignore images/links if needed, but keeping simple for now
     return markdownify.markdownify(html_content, heading_style="ATX").strip()
 
-def scrape_documentation(base_url: str) -> str:
+def _extract(soup: BeautifulSoup, url: str) -> tuple[list[str], Tag, Optional[str]]:
     """
-    Crawls the documentation starting at base_url.
-    Finds internal links, visits them, and aggregates their Markdown content.
+    Walks the parsed page once. Collects the absolute URLs of all links (anchors
+    excluded, including links inside removed tags), decomposes NON_CONTENT_TAGS
+    and returns (links, main content container, absolute canonical URL or None).
     """
-    visited = set()
-    to_visit = [base_url]
-    aggregated_markdown = []
+    links = []
+    canonical = None
+    removed = []
+    containers = {}
+    split_text = {}
+    # Pre-order walk, so links and containers are found in document order
+    stack = [(soup, False)]
+    while stack:
+        tag, in_removed = stack.pop()
+        name = tag.name
+        if name == "a":
+            href = tag.get("href")
+            # Ignore anchor links
+            if href is not None and not href.startswith('#'):
+                links.append(urljoin(url, href))
+        elif name == "link" and canonical is None:
+            href = tag.get("href")
+            if href and "canonical" in [rel.lower() for rel in tag.get_attribute_list("rel")]:
+                canonical = urljoin(url, href.strip())
+        if not in_removed:
+            if name in NON_CONTENT_TAGS:
+                removed.append(tag)
+                in_removed = True
+            elif name in CONTENT_TAGS and name not in containers:
+                containers[name] = tag
+        children = []
+        previous_is_text = False
+        for child in tag.contents:
+            if type(child) is NavigableString:
+                if previous_is_text:
+                    split_text[id(tag)] = tag
+                previous_is_text = True
+            else:
+                previous_is_text = False
+                if isinstance(child, Tag):
+                    children.append(child)
+        stack.extend((child, in_removed) for child in reversed(children))
 
-    while to_visit:
-        current_url = to_visit.pop(0)
-        if current_url in visited:
+    # Clean HTML aggressively
+    for tag in removed:
+        parent = tag.parent
+        tag.decompose()
+        split_text[id(parent)] = parent
+    for tag in split_text.values():
+        _join_strings(soup, tag)
+
+    main_content = next((containers[name] for name in CONTENT_TAGS if name in containers), soup)
+    return links, main_content, canonical
+
+def _join_strings(soup: BeautifulSoup, tag: Tag):
+    """
+    Joins adjacent text nodes of tag into one, collapsing whitespace-only text
+    the way the parser does, so the tree matches a fresh parse of its HTML.
+    """
+    run = []
+    for child in tag.contents + [None]:
+        if type(child) is NavigableString:
+            run.append(child)
             continue
-            
-        visited.add(current_url)
-        logger.info(f"Scraping: {current_url}")
+        if len(run) > 1:
+            text = "".join(run)
+            if not text.strip(BeautifulSoup.ASCII_SPACES) and not _preserves_whitespace(soup, tag):
+                text = '\n' if '\n' in text else ' '
+            run[0].replace_with(NavigableString(text))
+            for string in run[1:]:
+                string.extract()
+        run = []
+
+def _preserves_whitespace(soup: BeautifulSoup, tag: Tag) -> bool:
+    """Whether tag is, or is inside, a tag whose whitespace the parser keeps as is (e.g. <pre>)."""
+    preserved = soup.builder.preserve_whitespace_tags
+    return tag.name in preserved or any(parent.name in preserved for parent in tag.parents)
+
+def _markdown_alternate(soup: BeautifulSoup, url: str) -> Optional[str]:
+    """Returns the absolute URL of the page's <link rel="alternate" type="text/markdown">, or None."""
+    head = soup.head
+    for tag in head.find_all("link") if head is not None else ():
+        href = tag.get("href")
+        if (href and tag.get("type", "").lower() in MARKDOWN_TYPES
+                and "alternate" in [rel.lower() for rel in tag.get_attribute_list("rel")]):
+            return urljoin(url, href.strip())
+    return None
+
+def _markdown_url(url: str) -> str:
+    """The conventional Markdown endpoint of a page: its path with a .md suffix."""
+    parts = urlparse(url)
+    return parts._replace(path=(parts.path.rstrip("/") or "/index") + ".md", params="", query="", fragment="").geturl()
+
+def _convert_embedded(content: EmbeddedContent, url: str) -> tuple[str, list[str]]:
+    """Returns the Markdown of embedded page content and the links found in it."""
+    if not content.is_html:
+        return content.text.strip(), parse_llms_links(content.text, url)
+    soup = BeautifulSoup(content.text, HTML_PARSER)
+    links, main_content, _ = _extract(soup, url)
+    container = main_content.extract()
+    markdown = fast_markdown.convert_soup(container)
+    container.decompose()
+    soup.decompose()
+    return markdown.strip(), links
+
+def process_page(url: str, html: str, canonical_filter: Optional[UrlFilter] = None, embedded: bool = False,
+                 markdown_filter: Optional[UrlFilter] = None) -> PageResult:
+    """
+    Extracts the outgoing links of a page and converts its main content to Markdown.
+    The page is parsed once; the Markdown is produced from the parsed tree directly,
+    by src.fast_markdown (markdownify's output, faster).
+
+    With a canonical_filter, a page whose <link rel="canonical"> names another
+    URL accepted by the filter is not converted: that URL is to be crawled
+    instead (the caller makes sure it is), and the result only links to it.
+
+    With embedded, the content is taken from the data a JavaScript framework
+    embedded in the page (see src.embedded) when it holds clearly more text
+    than the rendered DOM, e.g. for pages rendered client-side.
+
+    With a markdown_filter, the page's Markdown version is to be crawled
+    instead of converting its HTML (the caller makes sure it is), if the
+    filter accepts it: the URL advertised by
+    <link rel="alternate" type="text/markdown">, or <url>.md when the page is an
+    empty shell. The result then links to it, and to the page's own links.
+    """
+    logger.info(f"Scraping: {url}")
+    # A single-page app may answer any path, .md ones included, with its HTML shell
+    if urlparse(url).path.endswith(TEXT_EXTENSIONS) and is_plain_text(html):
+        return PageResult(url=url, markdown=html.strip())
+    started = time.thread_time()
+    soup = BeautifulSoup(html, HTML_PARSER)
+    try:
+        parsed = time.thread_time()
+        links, main_content, canonical = _extract(soup, url)
+        extracted = time.thread_time()
+        timings = {"parse": parsed - started, "extract": extracted - parsed}
+        if (canonical_filter is not None and canonical is not None
+                and normalize_url(canonical) != normalize_url(url) and canonical_filter(canonical)):
+            return PageResult(url=url, links=[canonical], canonical=canonical, timings=timings)
+        if markdown_filter is not None:
+            alternate = _markdown_alternate(soup, url)
+            if alternate is not None and normalize_url(alternate) != normalize_url(url) and markdown_filter(alternate):
+                return PageResult(url=url, links=[alternate] + links, canonical=canonical, timings=timings)
+
+        dom_chars = None
+        if embedded:
+            content = find_embedded_content(html)
+            if content is not None:
+                markdown, content_links = _convert_embedded(content, url)
+                dom_chars = len(main_content.get_text(" ", strip=True))
+                if len(markdown) > EMBEDDED_RATIO * dom_chars:
+                    timings["convert"] = time.thread_time() - extracted
+                    return PageResult(url=url, markdown=markdown, links=links + content_links, canonical=canonical,
+                                      timings=timings)
+        if markdown_filter is not None:
+            if dom_chars is None:
+                dom_chars = len(main_content.get_text(" ", strip=True))
+            markdown_url = _markdown_url(url)
+            if dom_chars < SHELL_MAX_CHARS and markdown_filter(markdown_url):
+                return PageResult(url=url, links=[markdown_url] + links, canonical=canonical, timings=timings)
 
+        # Detached, the container converts exactly as it would as a standalone document
+        container = main_content.extract()
+        md_content = fast_markdown.convert_soup(container)
+        container.decompose()
+        timings["convert"] = time.thread_time() - extracted
+        return PageResult(url=url, markdown=md_content.strip(), links=links, canonical=canonical, timings=timings)
+    finally:
+        # Parse trees are reference cycles: free them now rather than at the next garbage collection
+        soup.decompose()
+
+def create_parse_pool(workers: Optional[int] = None) -> ProcessPoolExecutor:
+    """
+    Creates a process pool for the parse/clean/convert stage of iter_pages,
+    with one worker per CPU core unless workers is given. Workers are spawned
+    rather than forked, since the scraper runs several threads.
+    """
+    return ProcessPoolExecutor(max_workers=workers or os.cpu_count(),
+                               mp_context=multiprocessing.get_context("spawn"))
+
+def _in_pool(process: Processor, pool: Executor) -> Processor:
+    """Wraps a page processor so it runs on pool; the wrapper blocks until the page is done."""
+    def process_in_pool(url: str, html: str) -> PageResult:
+        return pool.submit(process, url, html).result()
+    return process_in_pool
+
+def _deferring(process: Processor, converting: Processor, can_defer: Callable[[], bool]) -> Processor:
+    """
+    Wraps two page processors: process, which may leave a page's content to
+    another URL the crawl visits instead, while can_defer() is true, and
+    converting, which always converts the page, otherwise.
+    """
+    def process_deferring(url: str, html: str) -> PageResult:
+        return (process if can_defer() else converting)(url, html)
+    return process_deferring
+
+def _incremental(process: Processor, manifest: PageManifest, lastmods: Optional[dict] = None) -> Processor:
+    """
+    Wraps a page processor so unchanged pages are served from the manifest.
+    Only pages with Markdown are recorded; the others are processed again.
+    lastmods maps URLs to their sitemap lastmod, recorded alongside each page.
+    """
+    lastmods = lastmods or {}
+
+    def process_with_manifest(url: str, html: str) -> PageResult:
+        content_hash = hashlib.sha256(html.encode("utf-8")).hexdigest()
+        lastmod = lastmods.get(url)
+        result = manifest.lookup(url, content_hash, lastmod)
+        if result is None:
+            result = process(url, html)
+            # A page left to another URL (its canonical or Markdown version) is so only under this crawl's limits
+            if result.markdown:
+                manifest.store(result, content_hash, lastmod)
+        return result
+    return process_with_manifest
+
+def _timed(process: Processor, target: str) -> Processor:
+    """
+    Wraps a page processor so the stage timings of the pages it converts are
+    recorded as stage_seconds and the pages are counted as pages_converted
+    (or as failed pages when processing raises).
+    """
+    def process_timed(url: str, html: str) -> PageResult:
+        metrics = get_metrics()
         try:
-            response = requests.get(current_url, timeout=10)
-            response.raise_for_status()
-        except requests.RequestException as e:
-            logger.warning(f"Failed to fetch {current_url}: {e}")
-            continue
+            result = process(url, html)
+        except Exception:
+            metrics.increment("pages", target=target, outcome="failed")
+            raise
+        for stage, seconds in result.timings.items():
+            metrics.observe("stage_seconds", seconds, stage=stage, target=target)
+        metrics.increment("pages_converted", target=target)
+        return result
+    return process_timed
 
-        soup = BeautifulSoup(response.text, 'html.parser')
+def _counted(fetch_page: Fetcher, target: str) -> Fetcher:
+    """Wraps a fetcher so pages that could not be fetched are counted as failed."""
+    def fetch_counted(url: str) -> Optional[str]:
+        html = fetch_page(url)
+        if html is None:
+            get_metrics().increment("pages", target=target, outcome="failed")
+        return html
+    return fetch_counted
 
-        # Find new links before decomposing tags
-        for a_tag in soup.find_all("a", href=True):
-            href = a_tag['href']
-            # Ignore anchor links
-            if href.startswith('#'):
-                continue
-                
-            full_url = urljoin(current_url, href)
-            # Ensure it's part of the base documentation (not just same domain, but under the base path)
-            if full_url.startswith(base_url) and full_url not in visited and full_url not in to_visit:
-                to_visit.append(full_url)
-
-        # Clean HTML aggressively
-        for tag in soup(["nav", "footer", "header", "aside", "script", "style", "svg", "img", "noscript", "form", "iframe", "video", "audio", "canvas", "map", "area", "button", "input", "select", "textarea"]):
-            tag.decompose()
-
-        main_content = soup.find("main") or soup.find("article") or soup.find("body") or soup
-        
-        md_content = markdownify.markdownify(str(main_content), heading_style="ATX")
-        if md_content.strip():
-            aggregated_markdown.append(f"<!-- Source: {current_url} -->\n" + md_content.strip())
-
-    return "\n\n---\n\n".join(aggregated_markdown)
+def _resumed(checkpoint: CrawlCheckpoint, lookup: Optional[Lookup],
+             manifest: Optional[PageManifest] = None) -> Lookup:
+    """
+    Wraps a lookup hook so pages stored in the checkpoint are served first.
+    They also count as encountered for the manifest, which stored them before.
+    """
+    def lookup_checkpoint(url: str) -> Optional[PageResult]:
+        result = checkpoint.lookup(url)
+        if result is None:
+            return lookup(url) if lookup is not None else None
+        if manifest is not None:
+            manifest.keep(url)
+        return result
+    return lookup_checkpoint
+
+def _spill(result: Optional[PageResult], page_store: PageStore) -> Optional[PageResult]:
+    """Moves the Markdown of result to page_store; the returned copy reads it back on demand."""
+    if result is None or not result.markdown:
+        return result
+    offset = page_store.put(result.url, result.markdown)
+    return replace(result, markdown="", stored=partial(page_store.read, offset))
+
+def _spilled(process: Processor, page_store: PageStore) -> Processor:
+    """Wraps a page processor so the Markdown of each page waits in page_store until it is emitted."""
+    def process_spilled(url: str, html: str) -> PageResult:
+        return _spill(process(url, html), page_store)
+    return process_spilled
+
+def _spilled_lookup(lookup: Lookup, page_store: PageStore) -> Lookup:
+    """Wraps a lookup hook so the Markdown of the pages it serves waits in page_store too."""
+    def lookup_spilled(url: str) -> Optional[PageResult]:
+        return _spill(lookup(url), page_store)
+    return lookup_spilled
+
+def iter_pages(base_url: str, ignore_paths: Optional[list[str]] = None,
+               include: Optional[list[str]] = None, exclude: Optional[list[str]] = None,
+               max_depth: Optional[int] = None, max_pages: Optional[int] = None,
+               concurrency: int = DEFAULT_CONCURRENCY,
+               per_host_limit: int = DEFAULT_PER_HOST_LIMIT,
+               client: Optional[HttpClient] = None,
+               manifest: Optional[PageManifest] = None,
+               parse_pool: Optional[Executor] = None,
+               discovery: Optional[list[str]] = None,
+               rate_limit: Optional[dict] = None,
+               dedupe: bool = True,
+               deduplicator: Optional[Deduplicator] = None,
+               checkpoint: Optional[CrawlCheckpoint] = None,
+               extractors: Optional[list[str]] = None,
+               page_store: Optional[PageStore] = None,
+               strip_boilerplate: bool = True) -> Iterator[PageResult]:
+    """
+    Crawls the documentation starting at base_url and yields the pages that
+    make up its document: every kept page with Markdown, Markdown loaded.
+
+    Pages are visited concurrently but yielded in a stable (breadth-first
+    discovery) order. Links are only followed if they pass the target's URL
+    rules (see UrlFilter). Pages are fetched through client, or the shared
+    HttpClient if omitted. With a manifest (incremental mode), pages whose HTML
+    is unchanged since the previous run reuse their stored Markdown instead of
+    being parsed again.
+
+    With a parse_pool (see create_parse_pool), pages are parsed and converted
+    on that pool while fetching continues; the output is identical to the
+    in-process path. The pool may be shared by concurrent crawls.
+
+    discovery lists how pages are found (see src.discovery); by default only
+    links are followed. With "llms-full", a site's llms-full.txt is used as
+    the whole document when it exists. With "llms" and "sitemap", the pages
+    listed there are crawled right after base_url; in incremental mode, pages
+    whose sitemap lastmod is unchanged are not even fetched.
+
+    rate_limit overrides the RateLimit settings of base_url's host, if the
+    client has a rate limiter.
+
+    Unless dedupe is False, duplicate pages are dropped (see src.dedup):
+    identical HTML is parsed only once, pages whose canonical URL is crawled
+    are left out (and not even converted when their links are followed), and
+    pages with identical or near-identical Markdown are left out. Pass a deduplicator to read its counts afterwards.
+
+    With a checkpoint, the seeds and every processed page are saved as the
+    crawl goes. If the checkpoint holds a previous, interrupted crawl, its
+    pages are replayed without being fetched and the crawl continues where it
+    stopped; the output is the same as for an uninterrupted crawl.
+
+    extractors lists how content is read besides the rendered HTML (see
+    src.embedded): by default from the page data embedded by JavaScript
+    frameworks; with "markdown", from the pages' Markdown versions.
+
+    With a page_store (see src.page_store), each page's Markdown is written to
+    it as soon as the page is processed and read back when the page is
+    yielded, so the pages waiting for their turn (a whole BFS level, for
+    sitemap-seeded crawls) are held on disk rather than in memory.
+
+    Unless strip_boilerplate is False, blocks repeated on most of the site's
+    pages (sidebars, banners, feedback widgets...) are removed from every page
+    as the crawl goes (see src.boilerplate).
+    """
+    # Ensure it's part of the base documentation (not just same domain, but under the base path)
+    url_filter = UrlFilter(base_url, ignore_paths=ignore_paths, include=include, exclude=exclude,
+                           max_depth=max_depth, max_pages=max_pages)
+    client = client or get_default_client()
+    if rate_limit and client.rate_limiter is not None:
+        client.rate_limiter.configure(base_url, RateLimit(**rate_limit))
+
+    seeds, lastmods, depth_limit = [], {}, url_filter.max_depth
+    found = checkpoint.discovery() if checkpoint is not None else None
+    if found is None and discovery:
+        found = discover(client, base_url, discovery, url_filter, max_pages=url_filter.max_pages)
+        if found.full_text is not None:
+            source_url, text = found.full_text
+            yield PageResult(url=source_url, markdown=text.strip())
+            return
+    if found is not None:
+        seeds, lastmods = found.seeds, found.lastmods
+        if not found.follow_links:
+            depth_limit = 0
+    if checkpoint is not None:
+        checkpoint.save_discovery(found or Discovery())
+
+    extractors = DEFAULT_EXTRACTORS if extractors is None else extractors
+    if dedupe:
+        deduplicator = deduplicator if deduplicator is not None else Deduplicator()
+    else:
+        deduplicator = None
+    defers = dedupe or "markdown" in extractors
+    process = converting = partial(process_page, embedded="embedded" in extractors)
+    if defers:
+        process = partial(converting, canonical_filter=url_filter if dedupe else None,
+                          markdown_filter=url_filter if "markdown" in extractors else None)
+    if parse_pool is not None:
+        process, converting = _in_pool(process, parse_pool), _in_pool(converting, parse_pool)
+    if defers:
+        # Only while the canonical or Markdown URL is sure to be scheduled: links are followed and no page
+        # budget can run out. Otherwise the page's own HTML is converted.
+        process = _deferring(process, converting, lambda: engine.follows_links and url_filter.max_pages is None)
+    # Timings travel back from the pool with each result; pages served from a cache are not timed
+    process = _timed(process, base_url)
+    lookup = None
+    if manifest is not None:
+        # Manifest lookups stay in this process; only changed pages go to the pool
+        process = _incremental(process, manifest, lastmods)
+        if lastmods:
+            def lookup(url: str) -> Optional[PageResult]:
+                return manifest.lookup_lastmod(url, lastmods[url]) if url in lastmods else None
+    if page_store is not None:
+        # Inside the deduplicator, so the results it holds on to for identical HTML are spilled too
+        process = _spilled(process, page_store)
+    if deduplicator is not None:
+        # Outside the manifest, so HTML already kept is neither looked up nor parsed again
+        process = deduplicator.wrap(process)
+    if checkpoint is not None:
+        process = checkpoint.wrap(process)
+        lookup = _resumed(checkpoint, lookup, manifest)
+    if page_store is not None and lookup is not None:
+        lookup = _spilled_lookup(lookup, page_store)
+    engine = CrawlEngine(_counted(client.fetch, base_url), process, concurrency=concurrency, per_host_limit=per_host_limit,
+                         offload_process=parse_pool is not None, lookup=lookup)
+
+    def kept_pages() -> Iterator[PageResult]:
+        for page in engine.iter_pages(base_url, accept=url_filter, max_depth=depth_limit,
+                                      max_pages=url_filter.max_pages, seeds=seeds):
+            if page.stored is not None:
+                page = replace(page, markdown=page.load_markdown(), stored=None)
+            if deduplicator is None or deduplicator.accept_exact(page, engine.scheduled):
+                yield page
+
+    metrics = get_metrics()
+    pages = kept_pages()
+    boilerplate = BoilerplateFilter() if strip_boilerplate else None
+    if boilerplate is not None:
+        # After exact deduplication, so copies of a page do not make its content look repeated
+        pages = boilerplate.strip(pages)
+    if deduplicator is not None:
+        # Near-duplicates are compared on what is left once the boilerplate is gone
+        pages = (page for page in pages if deduplicator.accept_near(page))
+    for page in pages:
+        if page.markdown:
+            metrics.increment("pages", target=base_url, outcome="emitted")
+            metrics.increment("markdown_bytes", len(page.markdown.encode("utf-8")), target=base_url)
+            yield page
+        else:
+            metrics.increment("pages", target=base_url, outcome="empty")
+
+    if checkpoint is not None:
+        checkpoint.flush()
+        metrics.increment("pages_reused", checkpoint.restored, target=base_url, source="checkpoint")
+        if checkpoint.restored:
+            logger.info(f"Resumed from checkpoint: {checkpoint.restored} page(s) restored, "
+                        f"{checkpoint.stored} processed in this run.")
+    if deduplicator is not None:
+        metrics.increment("pages", deduplicator.dropped, target=base_url, outcome="duplicate")
+    if deduplicator is not None and deduplicator.dropped:
+        logger.info(f"Dropped {deduplicator.dropped} duplicate page(s): {deduplicator.exact} exact, "
+                    f"{deduplicator.canonical} canonical, {deduplicator.near} near-duplicate.")
+    if boilerplate is not None and boilerplate.removed_blocks:
+        metrics.increment("boilerplate_bytes", boilerplate.removed_bytes, target=base_url)
+        logger.info(f"Removed {boilerplate.removed_blocks} boilerplate block(s) ({boilerplate.learned} distinct, "
+                    f"repeated on most pages): {boilerplate.removed_bytes} bytes saved.")
+    if manifest is not None:
+        removed = manifest.prune()
+        metrics.increment("pages_reused", manifest.reused, target=base_url, source="manifest")
+        logger.info(f"Incremental scrape: {manifest.reused} page(s) unchanged, "
+                    f"{manifest.converted} converted, {removed} removed from manifest.")
+
+def iter_documentation(base_url: str, **options) -> Iterator[str]:
+    """
+    Crawls the documentation starting at base_url and yields the aggregated
+    Markdown document piece by piece (one piece per page, separators included),
+    so concatenating the pieces gives exactly what scrape_documentation returns.
+    Accepts the same options as iter_pages.
+    """
+    separator = ""
+    for page in iter_pages(base_url, **options):
+        yield f"{separator}<!-- Source: {page.url} -->\n" + page.markdown
+        separator = PAGE_SEPARATOR
+
+def scrape_documentation(base_url: str, **options) -> str:
+    """
+    Crawls the documentation starting at base_url.
+    Finds internal links, visits them, and aggregates their Markdown content.
+    Accepts the same options as iter_documentation.
+    """
+    return "".join(iter_documentation(base_url, **options))
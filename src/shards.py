@@ -0,0 +1,135 @@
+import hashlib
+import json
+from collections import defaultdict
+from typing import Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlparse
+from src.manifest import target_slug
+from src.page_store import PageStore
+from src.scraper import PAGE_SEPARATOR
+
+# Values accepted by a target's "output" option:
+#   document - one document per target, split into "Parte N" files by size
+#   shards   - pages grouped into size-bounded shard files by URL path prefix,
+#              plus a JSON manifest locating every page
+OUTPUT_LAYOUTS = ("document", "shards")
+DEFAULT_SHARD_BYTES = 512 * 1024
+# Shard group of pages that are not under a section of the base path
+INDEX_SECTION = "index"
+# Extensions the shards and the manifest are uploaded with
+SHARD_EXTENSION = "txt"
+MANIFEST_EXTENSION = "json"
+MANIFEST_VERSION = 1
+
+
+def path_segments(url: str, base_url: str) -> List[str]:
+    """
+    Returns the path segments of url below base_url's path (["api", "errors"]
+    for /docs/api/errors under /docs); empty if url is not under base_url.
+    """
+    base = urlparse(base_url)
+    base_path = base.path.rstrip("/")
+    parts = urlparse(url)
+    if parts.netloc != base.netloc or not (parts.path + "/").startswith(base_path + "/"):
+        return []
+    return [segment for segment in parts.path[len(base_path):].split("/") if segment]
+
+
+class ShardBuilder:
+    """
+    Lays out a target's pages as shard files plus a manifest, instead of one
+    document.
+
+    Pages are grouped by their section, the first path segment below the base
+    URL (/docs/api/errors and /docs/api go to "api"); pages without a section
+    of their own, such as the home page and top-level leaf pages, go to
+    "index". Within a section, pages are ordered by URL and packed into shards
+    of at most max_bytes (a larger page gets a shard to itself). So a page only
+    moves when pages of its own section change, and unchanged shards are
+    uploaded with the same content (which Drive skips).
+
+    Each page is written as in the aggregated document: a Source comment and
+    its Markdown, pages separated by PAGE_SEPARATOR. manifest() lists the shard
+    files and maps every URL to its shard file, and the UTF-8 byte offset and
+    length of its entry there.
+
+    Pages are kept in a PageStore until finish(), so only URLs stay in memory.
+    """
+
+    def __init__(self, nome: str, base_url: str, max_bytes: int = DEFAULT_SHARD_BYTES,
+                 page_store: Optional[PageStore] = None):
+        if max_bytes < 1:
+            raise ValueError("max_bytes must be at least 1")
+        self.nome = nome
+        self.base_url = base_url
+        self.max_bytes = max_bytes
+        self._store = page_store if page_store is not None else PageStore()
+        self._owns_store = page_store is None
+        self._urls: List[str] = []
+        self._shards: Dict[str, dict] = {}
+        self._pages: Dict[str, dict] = {}
+
+    def add(self, url: str, markdown: str):
+        if url not in self._store:
+            self._urls.append(url)
+        self._store.put(url, markdown)
+
+    def shard_name(self, section: str, number: int) -> str:
+        """Name (without extension) of a section's shard file."""
+        return f"{self.nome} - {section} - Parte {number}"
+
+    def manifest_name(self) -> str:
+        """Name (without extension) of the manifest file."""
+        return f"{self.nome} - manifest"
+
+    def _sections(self) -> Dict[str, List[str]]:
+        """Returns {section: URLs sorted}, sorted by section."""
+        segments = {url: path_segments(url, self.base_url) for url in self._urls}
+        # Only segments with pages below them are sections; /docs/api joins them, /docs/quickstart does not
+        nested = {path[0] for path in segments.values() if len(path) > 1}
+        groups = defaultdict(list)
+        for url, path in segments.items():
+            groups[target_slug(path[0]) if path and path[0] in nested else INDEX_SECTION].append(url)
+        return {section: sorted(urls) for section, urls in sorted(groups.items())}
+
+    def finish(self) -> Iterator[Tuple[str, str]]:
+        """Yields (name, content) for every shard, in section order. manifest() is complete afterwards."""
+        for section, urls in self._sections().items():
+            number, entries, size = 1, [], 0
+            for url in urls:
+                entry = f"<!-- Source: {url} -->\n" + self._store.get(url)
+                length = len(entry.encode("utf-8"))
+                if entries and size + len(PAGE_SEPARATOR) + length > self.max_bytes:
+                    yield self._shard(section, number, entries)
+                    number, entries, size = number + 1, [], 0
+                offset = size + len(PAGE_SEPARATOR) if entries else 0
+                entries.append((url, entry, offset, length))
+                size = offset + length
+            if entries:
+                yield self._shard(section, number, entries)
+
+    def _shard(self, section: str, number: int, entries: list) -> Tuple[str, str]:
+        name = self.shard_name(section, number)
+        content = PAGE_SEPARATOR.join(entry for _, entry, _, _ in entries)
+        file_name = f"{name}.{SHARD_EXTENSION}"
+        for url, _, offset, length in entries:
+            self._pages[url] = {"shard": file_name, "offset": offset, "length": length}
+        payload = content.encode("utf-8")
+        self._shards[file_name] = {"section": section, "pages": len(entries), "bytes": len(payload),
+                              "sha256": hashlib.sha256(payload).hexdigest()}
+        return name, content
+
+    def manifest(self) -> str:
+        """The JSON manifest of the shards built by finish(): shards, and URL -> shard, offset, length."""
+        return json.dumps({"version": MANIFEST_VERSION, "target": self.nome, "url_base": self.base_url,
+                           "shards": self._shards, "pages": self._pages}, indent=1, sort_keys=True)
+
+    @property
+    def shard_count(self) -> int:
+        return len(self._shards)
+
+    def __len__(self) -> int:
+        return len(self._urls)
+
+    def close(self):
+        if self._owns_store:
+            self._store.close()
@@ -0,0 +1,291 @@
+import hashlib
+import hmac
+import logging
+import os
+import tempfile
+import threading
+import xml.etree.ElementTree as ElementTree
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+from urllib.parse import parse_qsl, quote, urlsplit
+import requests
+from src.metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+# Values accepted by --sink: where run_scraper uploads the files of each target
+#   drive - Google Drive (see src.gdrive_client.DriveClient), in the target's drive_folder_id
+#   local - a local directory, in <output dir>/<drive_folder_id>/
+#   s3    - a bucket of an S3-compatible object store, under <prefix><drive_folder_id>/
+SINKS = ("drive", "local", "s3")
+DEFAULT_UPLOAD_WORKERS = 4
+# Files submitted but not uploaded yet, beyond which producers wait (each holds a whole file in memory)
+DEFAULT_MAX_PENDING_UPLOADS = 8
+
+S3_TIMEOUT = 60
+S3_DEFAULT_REGION = "us-east-1"
+_EMPTY_SHA256 = hashlib.sha256(b"").hexdigest()
+
+
+class LocalDirSink:
+    """
+    Writes files to <root>/<folder>/<file name>, for offline runs and benchmarks.
+    A file whose content is unchanged is not written again. Files are replaced
+    atomically, so readers never see a partial file.
+
+    Writes are counted as sink_files (per result) and sink_upload_bytes.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def upload(self, folder: str, file_name: str, content: str) -> dict:
+        if not folder or os.path.basename(folder) != folder or folder in (".", ".."):
+            raise ValueError(f"Invalid folder name: {folder!r}")
+        if os.path.basename(file_name) != file_name or file_name in ("", ".", ".."):
+            raise ValueError(f"Invalid file name: {file_name!r}")
+        metrics = get_metrics()
+        directory = os.path.join(self.root, folder)
+        path = os.path.join(directory, file_name)
+        payload = content.encode("utf-8")
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                if f.read() == payload:
+                    metrics.increment("sink_files", sink="local", result="skipped")
+                    return {"id": path, "skipped": True}
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".upload-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(payload)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+        logger.info(f"Wrote {path}")
+        metrics.increment("sink_files", sink="local", result="updated")
+        metrics.increment("sink_upload_bytes", len(payload), sink="local")
+        return {"id": path}
+
+
+def sign_v4(method: str, url: str, headers: Dict[str, str], payload_hash: str, access_key: str,
+            secret_key: str, region: str, service: str = "s3", now: Optional[datetime] = None) -> Dict[str, str]:
+    """
+    Returns headers with the AWS Signature Version 4 headers added (x-amz-date,
+    x-amz-content-sha256 and Authorization). Every given header is signed,
+    along with the Host of url. The URL path must already be percent-encoded.
+    """
+    now = now or datetime.now(timezone.utc)
+    amz_date = now.strftime("%Y%m%dT%H%M%SZ")
+    date = amz_date[:8]
+    parts = urlsplit(url)
+    signed = {key.lower(): " ".join(str(value).split()) for key, value in headers.items()}
+    signed.update({"host": parts.netloc, "x-amz-date": amz_date, "x-amz-content-sha256": payload_hash})
+    names = sorted(signed)
+    query = sorted((quote(key, safe="-_.~"), quote(value, safe="-_.~"))
+                   for key, value in parse_qsl(parts.query, keep_blank_values=True))
+    canonical_request = "\n".join([
+        method,
+        parts.path or "/",
+        "&".join(f"{key}={value}" for key, value in query),
+        "".join(f"{name}:{signed[name]}\n" for name in names),
+        ";".join(names),
+        payload_hash,
+    ])
+    scope = f"{date}/{region}/{service}/aws4_request"
+    string_to_sign = "\n".join(["AWS4-HMAC-SHA256", amz_date, scope,
+                                hashlib.sha256(canonical_request.encode("utf-8")).hexdigest()])
+    key = ("AWS4" + secret_key).encode("utf-8")
+    for part in (date, region, service, "aws4_request"):
+        key = hmac.new(key, part.encode("utf-8"), hashlib.sha256).digest()
+    signature = hmac.new(key, string_to_sign.encode("utf-8"), hashlib.sha256).hexdigest()
+    result = dict(headers)
+    result.update({
+        "x-amz-date": amz_date,
+        "x-amz-content-sha256": payload_hash,
+        "Authorization": f"AWS4-HMAC-SHA256 Credential={access_key}/{scope}, "
+                         f"SignedHeaders={';'.join(names)}, Signature={signature}",
+    })
+    return result
+
+
+class S3Sink:
+    """
+    Uploads files to a bucket of an S3-compatible object store (AWS S3, MinIO,
+    Cloudflare R2...) as objects named <prefix><folder>/<file name>, with plain
+    HTTP requests signed with AWS Signature Version 4. Buckets are addressed in
+    path style (<endpoint>/<bucket>/<key>), which every implementation supports.
+
+    Like DriveClient, each folder is listed once (ListObjectsV2) and an upload
+    whose MD5 matches the stored object's ETag is skipped. The sink can be
+    shared between threads; each thread has its own HTTP session.
+
+    Requests are timed as sink_request_seconds (per operation), and uploads
+    counted as sink_files (per result) and sink_upload_bytes.
+    """
+
+    def __init__(self, endpoint: str, bucket: str, access_key: str, secret_key: str,
+                 region: str = S3_DEFAULT_REGION, prefix: str = ""):
+        self.endpoint = endpoint.rstrip("/")
+        self.bucket = bucket
+        self.region = region
+        self.prefix = prefix
+        self._access_key = access_key
+        self._secret_key = secret_key
+        self._local = threading.local()
+        self._folders: Dict[str, Dict[str, str]] = {}
+        self._lock = threading.RLock()
+
+    @classmethod
+    def from_env(cls) -> "S3Sink":
+        """
+        Builds a sink from S3_BUCKET, AWS_ACCESS_KEY_ID and AWS_SECRET_ACCESS_KEY, plus
+        the optional S3_ENDPOINT_URL (default: AWS for the region), AWS_REGION and S3_PREFIX.
+        """
+        bucket = os.environ.get("S3_BUCKET")
+        access_key = os.environ.get("AWS_ACCESS_KEY_ID")
+        secret_key = os.environ.get("AWS_SECRET_ACCESS_KEY")
+        if not all([bucket, access_key, secret_key]):
+            raise ValueError("Missing S3 environment variables: S3_BUCKET, AWS_ACCESS_KEY_ID, or AWS_SECRET_ACCESS_KEY")
+        region = os.environ.get("AWS_REGION") or S3_DEFAULT_REGION
+        endpoint = os.environ.get("S3_ENDPOINT_URL") or f"https://s3.{region}.amazonaws.com"
+        return cls(endpoint, bucket, access_key, secret_key, region=region, prefix=os.environ.get("S3_PREFIX", ""))
+
+    def _session(self) -> requests.Session:
+        """Returns this thread's HTTP session, creating it on first use."""
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = requests.Session()
+        return session
+
+    def _request(self, method: str, key: str = "", query: str = "", body: bytes = b"",
+                 headers: Optional[Dict[str, str]] = None, operation: str = "") -> requests.Response:
+        url = f"{self.endpoint}/{quote(self.bucket)}/{quote(key, safe='/-_.~')}"
+        if query:
+            url += "?" + query
+        payload_hash = hashlib.sha256(body).hexdigest() if body else _EMPTY_SHA256
+        signed = sign_v4(method, url, headers or {}, payload_hash, self._access_key, self._secret_key, self.region)
+        with get_metrics().timer("sink_request_seconds", sink="s3", operation=operation):
+            response = self._session().request(method, url, data=body or None, headers=signed, timeout=S3_TIMEOUT)
+        response.raise_for_status()
+        return response
+
+    def list_folder(self, folder: str) -> Dict[str, str]:
+        """Returns {file name: ETag} for the objects under a folder, listing it only on first use."""
+        with self._lock:
+            if folder in self._folders:
+                return self._folders[folder]
+            prefix = f"{self.prefix}{folder}/"
+            files: Dict[str, str] = {}
+            token = None
+            while True:
+                query = f"list-type=2&prefix={quote(prefix, safe='')}"
+                if token:
+                    query += f"&continuation-token={quote(token, safe='')}"
+                root = ElementTree.fromstring(self._request("GET", query=query, operation="list").content)
+                for contents in _children(root, "Contents"):
+                    key, etag = _text(contents, "Key"), _text(contents, "ETag")
+                    if key and key.startswith(prefix):
+                        files[key[len(prefix):]] = (etag or "").strip('"')
+                token = _text(root, "NextContinuationToken")
+                if _text(root, "IsTruncated") != "true" or not token:
+                    break
+            self._folders[folder] = files
+            return files
+
+    def upload(self, folder: str, file_name: str, content: str) -> dict:
+        """
+        Creates or overwrites <prefix><folder>/<file name>. Skips the upload when
+        the stored object has the same MD5 (its ETag), returning 'skipped': True.
+        """
+        metrics = get_metrics()
+        key = f"{self.prefix}{folder}/{file_name}"
+        payload = content.encode("utf-8")
+        checksum = hashlib.md5(payload).hexdigest()
+        existing = self.list_folder(folder).get(file_name)
+        if existing == checksum:
+            logger.info(f"S3 object {key} is unchanged. Skipping upload.")
+            metrics.increment("sink_files", sink="s3", result="skipped")
+            return {"id": key, "skipped": True}
+
+        response = self._request("PUT", key, body=payload, operation="put",
+                                 headers={"Content-Type": "text/plain; charset=utf-8"})
+        logger.info(f"Uploaded s3://{self.bucket}/{key}")
+        metrics.increment("sink_files", sink="s3", result="updated" if existing is not None else "created")
+        metrics.increment("sink_upload_bytes", len(payload), sink="s3")
+        with self._lock:
+            self._folders[folder][file_name] = response.headers.get("ETag", checksum).strip('"')
+        return {"id": key}
+
+
+def _children(element: ElementTree.Element, name: str) -> List[ElementTree.Element]:
+    """Child elements named name, whatever their XML namespace."""
+    return [child for child in element if child.tag.rsplit("}", 1)[-1] == name]
+
+
+def _text(element: ElementTree.Element, name: str) -> Optional[str]:
+    children = _children(element, name)
+    return children[0].text if children else None
+
+
+class UploadQueue:
+    """
+    Runs uploads on a pool of worker threads, so a target's files are uploaded
+    while it (or the next target) is still being scraped.
+
+    The queue is bounded: submit() blocks while max_pending uploads are waiting
+    or running, which keeps the files held in memory bounded when the sink is
+    slower than the scrape.
+    """
+
+    def __init__(self, workers: int = DEFAULT_UPLOAD_WORKERS, max_pending: int = DEFAULT_MAX_PENDING_UPLOADS):
+        if workers < 1 or max_pending < 1:
+            raise ValueError("workers and max_pending must be at least 1")
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="upload")
+        self._slots = threading.BoundedSemaphore(max_pending)
+
+    def submit(self, upload: Callable, *args, **kwargs) -> Future:
+        """Schedules upload(*args, **kwargs), waiting for a free slot first. Returns its future."""
+        self._slots.acquire()
+        try:
+            future = self._executor.submit(upload, *args, **kwargs)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def close(self):
+        """Waits for every submitted upload to finish."""
+        self._executor.shutdown(wait=True)
+
+
+def when_all(futures: List[Future], then: Callable[[List[Future]], object]) -> Future:
+    """
+    Returns a future for then(futures), called once every future is done (on
+    the thread that finished the last one). It fails if then raises, e.g. when
+    it reads the result of a failed upload.
+    """
+    result: Future = Future()
+    remaining = [len(futures)]
+    lock = threading.Lock()
+
+    def finish():
+        try:
+            result.set_result(then(futures))
+        except BaseException as e:
+            result.set_exception(e)
+
+    def done(_):
+        with lock:
+            remaining[0] -= 1
+            last = remaining[0] == 0
+        if last:
+            finish()
+
+    if not futures:
+        finish()
+    for future in futures:
+        future.add_done_callback(done)
+    return result
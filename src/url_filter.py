@@ -0,0 +1,61 @@
+import re
+from fnmatch import translate
+from typing import Iterable, Optional
+from urllib.parse import urlsplit
+
+REGEX_PREFIX = "re:"
+
+
+def _pattern_to_regex(pattern: str) -> str:
+    """
+    Converts an include/exclude rule to a regex matched against the URL path.
+    Rules prefixed with 're:' are regular expressions searched anywhere in the
+    path; anything else is a glob that must match the whole path.
+    """
+    if pattern.startswith(REGEX_PREFIX):
+        expression = pattern[len(REGEX_PREFIX):]
+        try:
+            re.compile(expression)
+        except re.error as e:
+            raise ValueError(f"Invalid regular expression in URL rule {pattern!r}: {e}")
+        return f".*?(?:{expression})"
+    return translate(pattern)
+
+
+class UrlFilter:
+    """
+    All link rules of a documentation target, compiled once into a single matcher.
+
+    A URL is accepted when it starts with base_url and its path
+      - contains none of the ignore_paths substrings,
+      - matches none of the exclude rules, and
+      - matches at least one include rule (if any are given).
+
+    max_depth and max_pages are crawl limits carried alongside the rules and
+    enforced by the crawl engine.
+    """
+
+    def __init__(self, base_url: str, ignore_paths: Iterable[str] = (),
+                 include: Iterable[str] = (), exclude: Iterable[str] = (),
+                 max_depth: Optional[int] = None, max_pages: Optional[int] = None):
+        self.base_url = base_url
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+
+        rejected = [f".*?{re.escape(path)}" for path in ignore_paths or ()]
+        rejected += [_pattern_to_regex(p) for p in exclude or ()]
+        accepted = [_pattern_to_regex(p) for p in include or ()]
+
+        expression = ""
+        if rejected:
+            expression += "(?!" + "|".join(f"(?:{r})" for r in rejected) + ")"
+        if accepted:
+            expression += "(?=" + "|".join(f"(?:{a})" for a in accepted) + ")"
+        self._path_rules = re.compile(expression) if expression else None
+
+    def __call__(self, url: str) -> bool:
+        if not url.startswith(self.base_url):
+            return False
+        if self._path_rules is None:
+            return True
+        return self._path_rules.match(urlsplit(url).path) is not None
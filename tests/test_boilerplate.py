@@ -0,0 +1,55 @@
+from src.boilerplate import BUCKET_PAGES, BoilerplateFilter, block_fingerprint, split_blocks
+from src.crawler import PageResult
+
+SIDEBAR = "* [Guide](/docs/guide)\n* [API](/docs/api)\n* [FAQ](/docs/faq)"
+FEEDBACK = "Was this helpful? Yes No"
+
+
+def page(index, extra=()):
+    blocks = [SIDEBAR, f"# Page {index}", f"Content of page {index}.", "```\nclient.run()\n\nclient.stop()\n```",
+              "## Parameters", *extra, FEEDBACK]
+    return PageResult(f"https://test.com/docs/{index}", "\n\n".join(blocks))
+
+
+def test_split_blocks_keeps_text_and_fenced_code_whole():
+    markdown = "Intro\n\n\n* a\n* b\n \n```\ncode\n\nmore\n```\n\n\tnested\n\nEnd"
+    blocks = split_blocks(markdown)
+    assert "".join(block + separator for block, separator in blocks) == markdown
+    assert [block for block, _ in blocks] == ["Intro", "* a\n* b", "```\ncode\n\nmore\n```", "\tnested", "End"]
+    assert block_fingerprint("Was  this\nhelpful?") == block_fingerprint("Was this helpful?")
+    assert [block_fingerprint(block) for block in ("## Parameters", "```\nx\n```", "| --- | --- |", "---")] == [None] * 4
+
+
+def test_strip_removes_blocks_repeated_on_most_pages():
+    boilerplate = BoilerplateFilter(min_pages=4)
+    pages = [page(i, extra=["Shared by a few pages."] if i % 4 == 0 else []) for i in range(12)]
+    pages.insert(5, PageResult("https://test.com/docs/empty"))
+
+    stripped = list(boilerplate.strip(pages))
+
+    assert [result.url for result in stripped] == [result.url for result in pages]
+    for result in stripped[:5] + stripped[6:]:
+        assert SIDEBAR not in result.markdown and FEEDBACK not in result.markdown
+        # Headings and code are kept even though every page has them
+        assert result.markdown.startswith("# Page ")
+        assert "## Parameters" in result.markdown and "client.stop()" in result.markdown
+    assert "Shared by a few pages." in stripped[0].markdown
+    assert stripped[5].markdown == ""
+    assert boilerplate.learned == 2
+    assert boilerplate.removed_blocks == 24
+    assert boilerplate.removed_bytes == sum(len(a.markdown) - len(b.markdown) for a, b in zip(pages, stripped))
+
+
+def test_strip_leaves_small_sites_alone():
+    pages = [page(i) for i in range(3)]
+    boilerplate = BoilerplateFilter(min_pages=4)
+    assert list(boilerplate.strip(pages)) == pages
+    assert boilerplate.removed_bytes == 0
+
+
+def test_counts_of_rare_blocks_are_pruned():
+    boilerplate = BoilerplateFilter()
+    pages = [page(i, extra=[f"Unique paragraph {i}."]) for i in range(3 * BUCKET_PAGES)]
+    assert all(SIDEBAR not in result.markdown for result in boilerplate.strip(pages))
+    # The blocks of the last bucket, and the repeated ones
+    assert len(boilerplate._counts) <= 2 * BUCKET_PAGES + 2
@@ -0,0 +1,61 @@
+import sqlite3
+from src.checkpoint import CrawlCheckpoint, checkpoint_path_for
+from src.crawler import PageResult
+from src.discovery import Discovery
+
+def test_checkpoint_path_for():
+    assert checkpoint_path_for("state", "OpenAI API").endswith("checkpoints/openai-api.sqlite")
+
+def test_checkpoint_round_trip(tmp_path):
+    path = str(tmp_path / "c.sqlite")
+    checkpoint = CrawlCheckpoint(path, key="k")
+    page = PageResult(url="https://test.com/docs/a", markdown="A", links=["https://test.com/docs/b"],
+                      canonical="https://test.com/docs/a", content_hash="h")
+    checkpoint.store(page)
+    checkpoint.save_discovery(Discovery(seeds=["https://test.com/docs/b"], lastmods={"https://test.com/docs/b": "2024-05-01"},
+                                        follow_links=False))
+    checkpoint.close()
+
+    resumed = CrawlCheckpoint(path, key="k", resume=True)
+    assert resumed.resumed
+    assert resumed.lookup("https://test.com/docs/a") == page
+    assert resumed.lookup("https://test.com/docs/b") is None
+    assert resumed.discovery() == Discovery(seeds=["https://test.com/docs/b"],
+                                            lastmods={"https://test.com/docs/b": "2024-05-01"}, follow_links=False)
+    assert resumed.restored == 1
+    resumed.close()
+
+def test_checkpoint_discarded_without_resume_on_key_change_or_when_old(tmp_path):
+    path = str(tmp_path / "c.sqlite")
+    checkpoint = CrawlCheckpoint(path, key="k")
+    checkpoint.store(PageResult(url="https://test.com/docs/a", markdown="A"))
+    checkpoint.close()
+
+    for key, resume, max_age in (("other", True, 60), ("k", False, 60), ("k", True, -1)):
+        checkpoint = CrawlCheckpoint(path, key=key, resume=resume, max_age=max_age)
+        assert not checkpoint.resumed
+        checkpoint.store(PageResult(url="https://test.com/docs/a", markdown="A"))
+        checkpoint.close()
+
+def test_checkpoint_commits_periodically(tmp_path):
+    path = str(tmp_path / "c.sqlite")
+    now = [0.0]
+    checkpoint = CrawlCheckpoint(path, key="k", interval=10, clock=lambda: now[0])
+
+    def committed():
+        with sqlite3.connect(path) as reader:
+            return reader.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+
+    checkpoint.store(PageResult(url="https://test.com/docs/a"))
+    assert committed() == 0
+    now[0] = 10.0
+    checkpoint.store(PageResult(url="https://test.com/docs/b"))
+    assert committed() == 2
+    checkpoint.close()
+
+def test_checkpoint_remove(tmp_path):
+    path = tmp_path / "checkpoints" / "c.sqlite"
+    checkpoint = CrawlCheckpoint(str(path), key="k")
+    checkpoint.close()
+    checkpoint.remove()
+    assert not path.exists()
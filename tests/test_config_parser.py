@@ -1,7 +1,7 @@
 import pytest
 import json
 import os
-from src.config_parser import load_config
+from src.config_parser import load_config, get_crawl_options
 
 def test_load_config_success(tmp_path):
     # Create a temporary valid config file
@@ -52,3 +52,109 @@ def test_load_config_invalid_document_schema(tmp_path):
 
     with pytest.raises(ValueError, match="Invalid document schema"):
         load_config(str(config_file))
+
+def test_load_config_invalid_ignore_paths(tmp_path):
+    config_data = {
+        "documentacoes": [
+            {"nome": "Test Doc", "url_base": "https://test.com", "drive_folder_id": "12345", "ignore_paths": "/sdks/"}
+        ]
+    }
+    config_file = tmp_path / "docs_links.json"
+    config_file.write_text(json.dumps(config_data))
+
+    with pytest.raises(ValueError, match="Invalid 'ignore_paths'"):
+        load_config(str(config_file))
+
+def test_load_config_invalid_max_pages(tmp_path):
+    config_data = {
+        "documentacoes": [
+            {"nome": "Test Doc", "url_base": "https://test.com", "drive_folder_id": "12345", "max_pages": -1}
+        ]
+    }
+    config_file = tmp_path / "docs_links.json"
+    config_file.write_text(json.dumps(config_data))
+
+    with pytest.raises(ValueError, match="Invalid 'max_pages'"):
+        load_config(str(config_file))
+
+def test_load_config_invalid_discovery(tmp_path):
+    config_data = {
+        "documentacoes": [
+            {"nome": "Test Doc", "url_base": "https://test.com", "drive_folder_id": "12345", "discovery": ["robots"]}
+        ]
+    }
+    config_file = tmp_path / "docs_links.json"
+    config_file.write_text(json.dumps(config_data))
+
+    with pytest.raises(ValueError, match="Invalid 'discovery'"):
+        load_config(str(config_file))
+
+def test_load_config_invalid_extractors(tmp_path):
+    config_data = {
+        "documentacoes": [
+            {"nome": "Test Doc", "url_base": "https://test.com", "drive_folder_id": "12345", "extractors": ["headless"]}
+        ]
+    }
+    config_file = tmp_path / "docs_links.json"
+    config_file.write_text(json.dumps(config_data))
+
+    with pytest.raises(ValueError, match="Invalid 'extractors'"):
+        load_config(str(config_file))
+
+@pytest.mark.parametrize("option, match", [
+    ({"output": "pdf"}, "Invalid 'output'"),
+    ({"output": "shards", "shard_bytes": 0}, "Invalid 'shard_bytes'"),
+])
+def test_load_config_invalid_output(tmp_path, option, match):
+    config_data = {
+        "documentacoes": [
+            {"nome": "Test Doc", "url_base": "https://test.com", "drive_folder_id": "12345", **option}
+        ]
+    }
+    config_file = tmp_path / "docs_links.json"
+    config_file.write_text(json.dumps(config_data))
+
+    with pytest.raises(ValueError, match=match):
+        load_config(str(config_file))
+
+@pytest.mark.parametrize("rate_limit", [
+    {"requests_per_second": 0},
+    {"burst": 1.5},
+    {"respect_crawl_delay": "yes"},
+    {"rps": 2},
+    [2],
+])
+def test_load_config_invalid_rate_limit(tmp_path, rate_limit):
+    config_data = {
+        "documentacoes": [
+            {"nome": "Test Doc", "url_base": "https://test.com", "drive_folder_id": "12345", "rate_limit": rate_limit}
+        ]
+    }
+    config_file = tmp_path / "docs_links.json"
+    config_file.write_text(json.dumps(config_data))
+
+    with pytest.raises(ValueError, match="Invalid 'rate_limit'"):
+        load_config(str(config_file))
+
+@pytest.mark.parametrize("key", ["dedupe", "strip_boilerplate"])
+def test_load_config_invalid_boolean_option(tmp_path, key):
+    config_data = {
+        "documentacoes": [
+            {"nome": "Test Doc", "url_base": "https://test.com", "drive_folder_id": "12345", key: "no"}
+        ]
+    }
+    config_file = tmp_path / "docs_links.json"
+    config_file.write_text(json.dumps(config_data))
+
+    with pytest.raises(ValueError, match=f"Invalid '{key}'"):
+        load_config(str(config_file))
+
+def test_get_crawl_options():
+    doc = {
+        "nome": "Test Doc",
+        "url_base": "https://test.com",
+        "drive_folder_id": "12345",
+        "ignore_paths": ["/sdks/"],
+        "max_depth": 3
+    }
+    assert get_crawl_options(doc) == {"ignore_paths": ["/sdks/"], "max_depth": 3}
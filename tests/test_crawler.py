@@ -0,0 +1,144 @@
+import threading
+import time
+import pytest
+from src.crawler import CrawlEngine, PageResult
+
+SITE = {
+    "https://test.com/docs": ["https://test.com/docs/a", "https://test.com/docs/b", "https://test.com/docs/c"],
+    "https://test.com/docs/a": ["https://test.com/docs/a/1", "https://test.com/docs/b"],
+    "https://test.com/docs/b": ["https://test.com/docs/b/1", "https://test.com/docs/a/1"],
+    "https://test.com/docs/c": ["https://external.com/x"],
+    "https://test.com/docs/a/1": [],
+    "https://test.com/docs/b/1": [],
+}
+
+def make_engine(delays=None, **kwargs):
+    delays = delays or {}
+
+    def fetch(url):
+        time.sleep(delays.get(url, 0))
+        return "<html></html>" if url in SITE else None
+
+    def process(url, html):
+        return PageResult(url=url, markdown=f"# {url}", links=SITE[url])
+
+    return CrawlEngine(fetch, process, **kwargs)
+
+def accept(link):
+    return link.startswith("https://test.com/docs")
+
+def test_crawl_visits_each_internal_page_once_in_bfs_order():
+    pages = make_engine().run("https://test.com/docs", accept)
+    assert [p.url for p in pages] == [
+        "https://test.com/docs",
+        "https://test.com/docs/a",
+        "https://test.com/docs/b",
+        "https://test.com/docs/c",
+        "https://test.com/docs/a/1",
+        "https://test.com/docs/b/1",
+    ]
+
+def test_crawl_order_is_independent_of_fetch_completion_order():
+    # Earlier pages finish last, so completion order is reversed within each level
+    delays = {
+        "https://test.com/docs/a": 0.06,
+        "https://test.com/docs/b": 0.03,
+        "https://test.com/docs/a/1": 0.04,
+    }
+    serial = make_engine(concurrency=1, per_host_limit=1).run("https://test.com/docs", accept)
+    concurrent = make_engine(delays, concurrency=8, per_host_limit=8).run("https://test.com/docs", accept)
+    assert [p.url for p in concurrent] == [p.url for p in serial]
+
+@pytest.mark.parametrize("concurrency,per_host_limit,expected", [(8, 2, 2), (3, 8, 3)])
+def test_crawl_respects_concurrency_limits(concurrency, per_host_limit, expected):
+    links = [f"https://test.com/docs/{i}" for i in range(12)]
+    lock = threading.Lock()
+    state = {"active": 0, "peak": 0}
+
+    def fetch(url):
+        with lock:
+            state["active"] += 1
+            state["peak"] = max(state["peak"], state["active"])
+        time.sleep(0.02)
+        with lock:
+            state["active"] -= 1
+        return "<html></html>"
+
+    def process(url, html):
+        return PageResult(url=url, links=links if url == "https://test.com/docs" else [])
+
+    engine = CrawlEngine(fetch, process, concurrency=concurrency, per_host_limit=per_host_limit)
+    pages = engine.run("https://test.com/docs", accept)
+
+    assert len(pages) == 13
+    assert state["peak"] == expected
+
+def test_crawl_skips_failed_pages():
+    def fetch(url):
+        return None if url.endswith("/a") else "<html></html>"
+
+    def process(url, html):
+        return PageResult(url=url, links=SITE[url])
+
+    pages = CrawlEngine(fetch, process).run("https://test.com/docs", accept)
+    urls = [p.url for p in pages]
+    assert "https://test.com/docs/a" not in urls
+    # a/1 is still reachable through b
+    assert "https://test.com/docs/a/1" in urls
+
+def test_crawl_engine_rejects_invalid_limits():
+    with pytest.raises(ValueError):
+        CrawlEngine(lambda u: None, lambda u, h: PageResult(u), concurrency=0)
+
+def test_crawl_max_depth():
+    pages = make_engine().run("https://test.com/docs", accept, max_depth=1)
+    assert [p.url for p in pages] == [
+        "https://test.com/docs",
+        "https://test.com/docs/a",
+        "https://test.com/docs/b",
+        "https://test.com/docs/c",
+    ]
+
+def test_crawl_tells_processors_whether_links_are_followed():
+    engine = make_engine()
+    process = engine.process
+    following = {}
+
+    def process_recording(url, html):
+        following[url] = engine.follows_links
+        return process(url, html)
+    engine.process = process_recording
+
+    pages = engine.run("https://test.com/docs", accept, max_depth=1)
+    assert following == {page.url: page.url == "https://test.com/docs" for page in pages}
+    assert engine.scheduled("https://test.com/docs/b/")
+    assert not engine.scheduled("https://test.com/docs/a/1")
+
+def test_crawl_max_pages():
+    pages = make_engine().run("https://test.com/docs", accept, max_pages=3)
+    assert [p.url for p in pages] == [
+        "https://test.com/docs",
+        "https://test.com/docs/a",
+        "https://test.com/docs/b",
+    ]
+
+def test_crawl_seeds_and_lookup():
+    fetched = []
+
+    def fetch(url):
+        fetched.append(url)
+        return "<html></html>"
+
+    def process(url, html):
+        return PageResult(url=url, links=SITE.get(url, []))
+
+    def lookup(url):
+        return PageResult(url=url, markdown="known") if url == "https://test.com/docs/b/1" else None
+
+    engine = CrawlEngine(fetch, process, lookup=lookup)
+    pages = engine.run("https://test.com/docs", accept, max_depth=0,
+                       seeds=["https://test.com/docs/b/1", "https://test.com/docs/c", "https://test.com/docs"])
+
+    assert [p.url for p in pages] == ["https://test.com/docs", "https://test.com/docs/b/1", "https://test.com/docs/c"]
+    assert pages[1].markdown == "known"
+    assert "https://test.com/docs/b/1" not in fetched
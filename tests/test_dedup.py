@@ -0,0 +1,89 @@
+import random
+from src.crawler import PageResult
+from src.dedup import Deduplicator, SimHashIndex, page_features, simhash
+
+def prose(seed, paragraphs=20):
+    rng = random.Random(seed)
+    words = [f"word{i}" for i in range(2000)]
+    return "\n\n".join(" ".join(rng.choice(words) for _ in range(30)) for _ in range(paragraphs))
+
+def distance(a, b):
+    return (simhash(page_features(a)) ^ simhash(page_features(b))).bit_count()
+
+def test_simhash_distance_reflects_similarity():
+    page = prose(1)
+    assert distance(page, page.upper()) == 0
+    assert distance(page, page.replace("word", "term", 1)) <= 3
+    assert distance(page, prose(2)) > 10
+
+def test_simhash_index_finds_fingerprints_within_distance():
+    index = SimHashIndex(max_distance=3)
+    fingerprint = 0x0123456789ABCDEF
+    index.add(fingerprint)
+    assert index.find(fingerprint ^ 0b111) == fingerprint
+    assert index.find(fingerprint ^ (1 << 63) ^ (1 << 40) ^ (1 << 20)) == fingerprint
+    assert index.find(fingerprint ^ 0b1111) is None
+
+def test_accept_drops_exact_near_and_canonical_duplicates():
+    deduplicator = Deduplicator()
+    follows = lambda url: url.startswith("https://test.com/docs")
+    page = prose(1)
+
+    assert deduplicator.accept(PageResult("https://test.com/docs/a", page), follows)
+    assert not deduplicator.accept(PageResult("https://test.com/docs/a?lang=en", page), follows)
+    assert not deduplicator.accept(PageResult("https://test.com/docs/v2/a", page + "\n\nVersion 2"), follows)
+    assert not deduplicator.accept(PageResult("https://test.com/docs/print/a",
+                                              canonical="https://test.com/docs/a"), follows)
+    # A canonical URL that is itself, or is not crawled, does not make a page a duplicate
+    assert deduplicator.accept(PageResult("https://test.com/docs/b", prose(2),
+                                          canonical="https://test.com/docs/b/"), follows)
+    assert deduplicator.accept(PageResult("https://test.com/docs/c", prose(3),
+                                          canonical="https://other.com/c"), follows)
+    # Short pages are only compared exactly
+    assert deduplicator.accept(PageResult("https://test.com/docs/d", "# Install"), follows)
+    assert deduplicator.accept(PageResult("https://test.com/docs/e", "# Installs"), follows)
+
+    assert (deduplicator.exact, deduplicator.near, deduplicator.canonical) == (1, 1, 1)
+    assert deduplicator.dropped == 3
+
+def test_wrap_processes_identical_html_once():
+    deduplicator = Deduplicator()
+    calls = []
+
+    def process(url, html):
+        calls.append(url)
+        return PageResult(url, markdown=html)
+
+    process_unique = deduplicator.wrap(process)
+    first = process_unique("https://test.com/a", "<p>same</p>")
+    # Processed concurrently with the first copy: the conversion is reused
+    second = process_unique("https://test.com/b", "<p>same</p>")
+    assert calls == ["https://test.com/a"]
+    assert (second.url, second.markdown) == ("https://test.com/b", "<p>same</p>")
+
+    assert deduplicator.accept(first, lambda url: True)
+    assert not deduplicator.accept(second, lambda url: True)
+    # Once a copy is kept, later copies are not processed at all
+    third = process_unique("https://test.com/c", "<p>same</p>")
+    assert calls == ["https://test.com/a"] and third.markdown == ""
+    assert not deduplicator.accept(third, lambda url: True)
+    assert deduplicator.exact == 2
+
+def test_wrap_processes_identical_html_again_when_it_was_not_converted():
+    deduplicator = Deduplicator()
+    calls = []
+
+    def process(url, html):
+        calls.append(url)
+        # An empty shell, left to its own Markdown version
+        return PageResult(url, links=[url + ".md"])
+
+    process_unique = deduplicator.wrap(process)
+    first = process_unique("https://test.com/a", "<div id='root'></div>")
+    second = process_unique("https://test.com/b", "<div id='root'></div>")
+    assert deduplicator.accept(first, lambda url: True)
+    third = process_unique("https://test.com/c", "<div id='root'></div>")
+
+    assert calls == ["https://test.com/a", "https://test.com/b", "https://test.com/c"]
+    assert [page.links for page in (second, third)] == [["https://test.com/b.md"], ["https://test.com/c.md"]]
+    assert deduplicator.accept(second, lambda url: True) and deduplicator.accept(third, lambda url: True)
@@ -0,0 +1,120 @@
+import gzip
+import pytest
+import responses
+from src.discovery import SitemapEntry, discover, find_sitemaps, iter_sitemap, parse_lastmod, parse_llms_links, select_seeds
+from src.http_client import HttpClient
+
+SITEMAP_INDEX = """<?xml version="1.0" encoding="UTF-8"?>
+<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <sitemap><loc>https://test.com/sitemap-docs.xml.gz</loc></sitemap>
+  <sitemap><loc>https://test.com/sitemap-blog.xml</loc></sitemap>
+</sitemapindex>"""
+
+DOCS_SITEMAP = """<?xml version="1.0" encoding="UTF-8"?>
+<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <url><loc>https://test.com/docs/a</loc><lastmod>2024-05-01</lastmod></url>
+  <url><loc> https://test.com/docs/b </loc><lastmod>2024-06-01T10:00:00Z</lastmod></url>
+  <url><loc>https://test.com/docs/c</loc></url>
+</urlset>"""
+
+BLOG_SITEMAP = """<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <url><loc>https://test.com/blog/post</loc></url>
+</urlset>"""
+
+def client():
+    return HttpClient(retries=0)
+
+def add_sitemaps(rsps):
+    rsps.add(responses.GET, "https://test.com/robots.txt",
+             body="User-agent: *\nDisallow: /private\nSitemap: https://test.com/sitemap_index.xml\n")
+    rsps.add(responses.GET, "https://test.com/sitemap_index.xml", body=SITEMAP_INDEX)
+    rsps.add(responses.GET, "https://test.com/sitemap-docs.xml.gz", body=gzip.compress(DOCS_SITEMAP.encode()),
+             content_type="application/x-gzip")
+    rsps.add(responses.GET, "https://test.com/sitemap-blog.xml", body=BLOG_SITEMAP)
+
+def test_iter_sitemap_follows_index_and_gzip():
+    with responses.RequestsMock() as rsps:
+        add_sitemaps(rsps)
+        rsps.remove(responses.GET, "https://test.com/robots.txt")
+        entries = list(iter_sitemap(client(), "https://test.com/sitemap_index.xml"))
+
+    assert entries == [
+        SitemapEntry("https://test.com/docs/a", "2024-05-01"),
+        SitemapEntry("https://test.com/docs/b", "2024-06-01T10:00:00Z"),
+        SitemapEntry("https://test.com/docs/c", None),
+        SitemapEntry("https://test.com/blog/post", None),
+    ]
+
+def test_iter_sitemap_skips_missing_and_malformed():
+    with responses.RequestsMock() as rsps:
+        rsps.add(responses.GET, "https://test.com/missing.xml", status=404)
+        rsps.add(responses.GET, "https://test.com/broken.xml", body="<urlset><url><loc>https://test.com/x</loc></url>")
+        assert list(iter_sitemap(client(), "https://test.com/missing.xml")) == []
+        # Entries before the error are kept
+        assert list(iter_sitemap(client(), "https://test.com/broken.xml")) == [SitemapEntry("https://test.com/x")]
+
+def test_find_sitemaps_falls_back_to_conventional_locations():
+    with responses.RequestsMock() as rsps:
+        rsps.add(responses.GET, "https://test.com/robots.txt", body="User-agent: *\n")
+        assert find_sitemaps(client(), "https://test.com/docs") == [
+            "https://test.com/docs/sitemap.xml", "https://test.com/sitemap.xml"
+        ]
+
+def test_parse_llms_links():
+    text = """# Test
+> Summary
+
+## Docs
+- [Quickstart](https://test.com/docs/quickstart.md): Start here
+- [Models](/docs/models.md "Models")
+- [Relative](guides/auth.md)
+"""
+    assert parse_llms_links(text, "https://test.com/docs/llms.txt") == [
+        "https://test.com/docs/quickstart.md",
+        "https://test.com/docs/models.md",
+        "https://test.com/docs/guides/auth.md",
+    ]
+
+def test_parse_lastmod():
+    assert parse_lastmod("2024-05-01") < parse_lastmod("2024-06-01T10:00:00Z")
+    assert parse_lastmod("2024-06-01T12:00:00+02:00") < parse_lastmod("2024-06-01T10:30:00Z")
+    assert parse_lastmod("yesterday") is None
+
+def test_select_seeds_keeps_most_recent_in_order():
+    entries = [
+        SitemapEntry("https://test.com/docs/a", "2024-01-01"),
+        SitemapEntry("https://test.com/docs/b"),
+        SitemapEntry("https://test.com/docs/c", "2024-03-01"),
+        SitemapEntry("https://test.com/docs/a"),
+        SitemapEntry("https://test.com/docs/b", "2024-02-01"),
+    ]
+    assert [e.url for e in select_seeds(entries)] == [
+        "https://test.com/docs/a", "https://test.com/docs/b", "https://test.com/docs/c"
+    ]
+    assert [e.url for e in select_seeds(entries, limit=2)] == ["https://test.com/docs/b", "https://test.com/docs/c"]
+
+def test_discover_sitemap_seeds_accepted_pages():
+    with responses.RequestsMock() as rsps:
+        add_sitemaps(rsps)
+        found = discover(client(), "https://test.com/docs", ["sitemap"], lambda url: url.startswith("https://test.com/docs"))
+
+    assert found.seeds == ["https://test.com/docs/a", "https://test.com/docs/b", "https://test.com/docs/c"]
+    assert found.lastmods == {"https://test.com/docs/a": "2024-05-01", "https://test.com/docs/b": "2024-06-01T10:00:00Z"}
+    assert found.full_text is None
+    assert not found.follow_links
+
+def test_discover_prefers_llms_full():
+    with responses.RequestsMock() as rsps:
+        # A single-page app answers every path with HTML; that is not an llms-full.txt
+        rsps.add(responses.GET, "https://test.com/docs/llms-full.txt", body="<!doctype html><html></html>",
+                 content_type="text/html")
+        rsps.add(responses.GET, "https://test.com/llms-full.txt", body="# Test\n\nEverything.\n",
+                 content_type="text/plain")
+        found = discover(client(), "https://test.com/docs", ["llms-full", "sitemap", "links"], lambda url: True)
+
+    assert found.full_text == ("https://test.com/llms-full.txt", "# Test\n\nEverything.\n")
+    assert found.seeds == []
+
+def test_discover_rejects_unknown_strategy():
+    with pytest.raises(ValueError):
+        discover(client(), "https://test.com/docs", ["robots"], lambda url: True)
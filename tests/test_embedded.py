@@ -0,0 +1,42 @@
+import json
+from src.embedded import EmbeddedContent, find_embedded_content, revive_devalue, strip_front_matter
+
+ARTICLE = "# Streaming\n\n" + "Responses can be streamed as server-sent events. " * 10
+
+def next_page(data) -> str:
+    return (f'<html><body><div id="__next"></div>'
+            f'<script id="__NEXT_DATA__" type="application/json">{json.dumps(data)}</script></body></html>')
+
+def test_find_embedded_content_in_next_data():
+    data = {"props": {"pageProps": {
+        "title": "Streaming",
+        "description": "How to stream responses. " * 10,
+        "mdxSource": {"compiledSource": "function _createMdxContent(props) { return _jsx('h1', {}) }" * 5},
+        "page": {"markdown": "---\ntitle: Streaming\n---\n" + ARTICLE},
+    }}, "page": "/docs/[slug]"}
+
+    assert find_embedded_content(next_page(data)) == EmbeddedContent(framework="next", text=ARTICLE)
+
+def test_find_embedded_content_detects_html():
+    html_content = "<h1>Streaming</h1>" + "<p>Responses can be streamed.</p>" * 10
+    content = find_embedded_content(next_page({"props": {"pageProps": {"content": html_content}}}))
+    assert content == EmbeddedContent(framework="next", text=html_content, is_html=True)
+
+def test_find_embedded_content_without_data():
+    assert find_embedded_content("<html><body><main>Static page</main></body></html>") is None
+    assert find_embedded_content('<script id="__NEXT_DATA__" type="application/json">{not json</script>') is None
+    # Too short to be page content
+    assert find_embedded_content(next_page({"props": {"pageProps": {"markdown": "Short"}}})) is None
+
+def test_find_embedded_content_in_nuxt_devalue_payload():
+    # {"data": Reactive({"doc": {"body": ARTICLE, "updated": Date}})}
+    payload = [{"data": 1}, ["Reactive", 2], {"doc": 3}, {"body": 4, "updated": 5}, ARTICLE,
+               ["Date", "2024-05-01T00:00:00.000Z"]]
+    html = f'<script type="application/json" id="__NUXT_DATA__" data-ssr="true">{json.dumps(payload)}</script>'
+
+    assert revive_devalue(payload) == {"data": {"doc": {"body": ARTICLE, "updated": None}}}
+    assert find_embedded_content(html) == EmbeddedContent(framework="nuxt", text=ARTICLE)
+
+def test_strip_front_matter():
+    assert strip_front_matter("---\ntitle: A\n---\n# A") == "# A"
+    assert strip_front_matter("# A\n\n---\n\nB") == "# A\n\n---\n\nB"
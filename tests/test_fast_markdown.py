@@ -0,0 +1,88 @@
+import random
+import pytest
+import markdownify
+from unittest.mock import patch
+from bs4 import BeautifulSoup
+from src import fast_markdown
+from src.fast_markdown import convert_soup
+
+DOCS_CORPUS = [
+    "<h1>Title</h1><p>Intro with <code>snake_case</code>, *stars* and <a href='/x' title='Say \"hi\"'>a link</a>.</p>",
+    "<h2>Heading <a href='#h'>#</a> <img src='i.png' alt='icon'><br>end</h2><hr><p><img src='a.png' title='T'></p>",
+    """<ul>
+         <li>One <strong> bold </strong><em></em></li>
+         <li>Two
+           <ol start="3"><li>Three</li>  <li>Four <ul><li>Deep</li></ul></li></ol>
+         </li>
+       </ul>
+       <p>After</p><ol><li>a</li></ol><ul><li>b</li></ul>text""",
+    """<table>
+         <thead><tr><th>Name</th><th>Type</th></tr></thead>
+         <tbody><tr><td>param_1</td><td><code>x | y</code><br><p>block</p></td></tr></tbody>
+       </table>
+       <table><tr><td>no</td><td>header</td></tr><tr><th>mixed</th><td>row</td></tr></table>
+       <table><caption>c</caption><tbody><tr><td>1</td></tr></tbody><tfoot><tr><td>f</td></tr></tfoot></table>""",
+    "<pre><code class='language-py'>def f(a_b):\n\t  return a_b * 2\n</code></pre><pre>  raw\t*pre*  </pre><pre></pre>",
+    """<div class="admonition note"><p class="admonition-title">Note</p><p>Be careful.</p></div>
+       <blockquote><p>Quoted</p><blockquote>twice</blockquote></blockquote>
+       <details><summary>More</summary><p>Hidden</p></details>""",
+    "<docs-tabs><docs-tab label='py'><p>Python</p></docs-tab></docs-tabs><section><span>  spaced \t out </span></section>",
+    "<p><a href='https://x.com/a_b'>https://x.com/a_b</a> <a href=''>empty</a> <a>none</a> <b><i>both</i></b></p>",
+    "<p><del>old</del> <kbd>Ctrl</kbd> <samp>out</samp> <sub>2</sub> <s>x</s></p><h7>seven</h7><h10>ten</h10><!-- c -->",
+]
+
+TAGS = ["p", "div", "span", "a", "b", "strong", "em", "i", "code", "pre", "ul", "ol", "li", "table", "thead", "tbody",
+        "tfoot", "tr", "td", "th", "h1", "h3", "h6", "blockquote", "del", "kbd", "section", "h7", "docs-tab"]
+TEXTS = [" ", "  ", "\n", "a_b", "x*y", " lead", "trail ", "\t tab", "word", "http://x.com/a_b", "<!-- c -->"]
+
+
+def random_html(rng: random.Random, depth: int = 0) -> str:
+    """Random nesting of the tags markdownify treats specially, with the whitespace cases it cares about."""
+    out = []
+    for _ in range(rng.randint(0, 4)):
+        if depth > 4 or rng.random() < 0.35:
+            out.append(rng.choice(TEXTS))
+            continue
+        tag = rng.choice(TAGS + ["br", "hr", "img"])
+        attrs = {"a": rng.choice(["", " href='http://x.com/a_b'", " href='u' title='t'", " href=''"]),
+                 "ol": rng.choice(["", " start='3'"]), "img": " alt='alt' src='s'"}.get(tag, "")
+        if tag in ("br", "hr", "img"):
+            out.append(f"<{tag}{attrs}>")
+        else:
+            out.append(f"<{tag}{attrs}>{random_html(rng, depth + 1)}</{tag}>")
+    return "".join(out)
+
+
+def reference(soup) -> str:
+    return markdownify.MarkdownConverter(heading_style="ATX").convert_soup(soup)
+
+
+@pytest.mark.parametrize("parser", ["lxml", "html.parser"])
+@pytest.mark.parametrize("html", DOCS_CORPUS)
+def test_convert_soup_matches_markdownify(html, parser):
+    expected_soup, soup = BeautifulSoup(html, parser), BeautifulSoup(html, parser)
+    assert convert_soup(soup) == reference(expected_soup)
+    # Whitespace is dropped from the tree the same way
+    assert str(soup) == str(expected_soup)
+
+
+def test_convert_soup_matches_markdownify_on_random_markup():
+    rng = random.Random(7)
+    for _ in range(1000):
+        html = f"<body>{random_html(rng)}</body>"
+        assert convert_soup(BeautifulSoup(html, "lxml")) == reference(BeautifulSoup(html, "lxml")), html
+
+
+def test_convert_soup_falls_back_only_for_unknown_conversions():
+    with patch.object(fast_markdown._fallback, "process_tag", wraps=fast_markdown._fallback.process_tag) as fallback:
+        convert_soup(BeautifulSoup("".join(DOCS_CORPUS[:-1]), "lxml"))
+        assert fallback.call_count == 0
+
+        assert convert_soup(BeautifulSoup("<p>a <del>b <em>c</em></del></p>", "lxml")) == "a ~~b *c*~~\n\n"
+        # markdownify converts the whole subtree
+        assert fallback.call_args_list[0].args[0].name == "del"
+
+
+def test_convert_soup_handles_deep_nesting():
+    html = "<div>" * 5000 + "<p>deep</p>" + "</div>" * 5000
+    assert convert_soup(BeautifulSoup(html, "html.parser")) == "deep\n\n"
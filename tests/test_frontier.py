@@ -0,0 +1,44 @@
+import pytest
+from src.frontier import Frontier, normalize_url
+
+@pytest.mark.parametrize("a,b", [
+    ("https://test.com/docs/page#intro", "https://test.com/docs/page"),
+    ("https://test.com/docs/page/", "https://test.com/docs/page"),
+    ("https://test.com:443/docs", "https://test.com/docs"),
+    ("http://test.com:80/docs", "http://test.com/docs"),
+    ("HTTPS://Test.COM/docs", "https://test.com/docs"),
+    ("https://test.com/docs?b=2&a=1", "https://test.com/docs?a=1&b=2"),
+    ("https://test.com", "https://test.com/"),
+])
+def test_normalize_url_equivalent_spellings(a, b):
+    assert normalize_url(a) == normalize_url(b)
+
+@pytest.mark.parametrize("a,b", [
+    ("https://test.com/docs/Page", "https://test.com/docs/page"),
+    ("https://test.com:8443/docs", "https://test.com/docs"),
+    ("http://test.com/docs", "https://test.com/docs"),
+    ("https://test.com/docs?a=1", "https://test.com/docs?a=2"),
+])
+def test_normalize_url_distinct_urls(a, b):
+    assert normalize_url(a) != normalize_url(b)
+
+def test_frontier_fifo_and_dedup():
+    frontier = Frontier(["https://test.com/docs"])
+    assert frontier.add("https://test.com/docs/a")
+    assert frontier.add("https://test.com/docs/b")
+    assert not frontier.add("https://test.com/docs/a/")
+    assert not frontier.add("https://test.com/docs/#top")
+
+    assert len(frontier) == 3
+    assert frontier.pop() == "https://test.com/docs"
+    assert frontier.pop() == "https://test.com/docs/a"
+    # Popped URLs are still remembered as seen
+    assert "https://test.com/docs/a" in frontier
+    assert not frontier.add("https://test.com/docs/a")
+    assert frontier.seen_count == 3
+
+def test_frontier_strips_fragment_from_queued_url():
+    frontier = Frontier()
+    frontier.add("https://test.com/docs/page#section")
+    assert frontier.drain() == ["https://test.com/docs/page"]
+    assert not frontier
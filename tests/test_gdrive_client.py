@@ -1,8 +1,10 @@
 import pytest
 import io
+import hashlib
 from unittest.mock import MagicMock, patch
 from googleapiclient.errors import HttpError
-from src.gdrive_client import update_drive_file
+from src.gdrive_client import DriveClient, update_drive_file
+from src.metrics import Metrics, set_metrics
 
 def mock_env_vars():
     return {
@@ -31,7 +33,6 @@ def test_update_drive_file_creation(mock_build, mock_credentials, mock_environ_g
     result = update_drive_file("folder_999", "Test Doc", "New Content")
     
     mock_files.list.assert_called_once()
-    assert "name='Test Doc.txt'" in mock_files.list.call_args[1]['q']
     assert "'folder_999' in parents" in mock_files.list.call_args[1]['q']
     
     mock_files.create.assert_called_once()
@@ -57,7 +58,7 @@ def test_update_drive_file_update(mock_build, mock_credentials, mock_environ_get
     mock_service.files.return_value = mock_files
     
     # Mock list() returning an existing file ID
-    mock_files.list.return_value.execute.return_value = {'files': [{'id': 'existing_123'}]}
+    mock_files.list.return_value.execute.return_value = {'files': [{'id': 'existing_123', 'name': 'Test Doc.txt'}]}
     mock_files.update.return_value.execute.return_value = {"id": "existing_123"}
     
     result = update_drive_file("folder_999", "Test Doc", "New Content")
@@ -77,3 +78,103 @@ def test_update_drive_file_missing_credentials(mock_environ_get):
     
     with pytest.raises(ValueError, match="Missing OAuth2 environment variables"):
         update_drive_file("folder_999", "Test Doc", "Text")
+
+@patch('src.gdrive_client.os.environ.get')
+@patch('src.gdrive_client.Credentials')
+@patch('src.gdrive_client.build')
+def test_update_drive_file_skips_unchanged_content(mock_build, mock_credentials, mock_environ_get):
+    env_vars = mock_env_vars()
+    mock_environ_get.side_effect = lambda k: env_vars.get(k)
+
+    mock_service = MagicMock()
+    mock_build.return_value = mock_service
+
+    mock_files = MagicMock()
+    mock_service.files.return_value = mock_files
+
+    content = "Conteúdo inalterado"
+    checksum = hashlib.md5(content.encode('utf-8')).hexdigest()
+    mock_files.list.return_value.execute.return_value = {'files': [{'id': 'existing_123', 'name': 'Test Doc.txt', 'md5Checksum': checksum}]}
+
+    result = update_drive_file("folder_999", "Test Doc", content)
+
+    assert 'md5Checksum' in mock_files.list.call_args[1]['fields']
+    mock_files.create.assert_not_called()
+    mock_files.update.assert_not_called()
+    assert result == {'id': 'existing_123', 'skipped': True}
+
+@patch('src.gdrive_client.os.environ.get')
+@patch('src.gdrive_client.Credentials')
+@patch('src.gdrive_client.build')
+def test_update_drive_file_uploads_changed_content(mock_build, mock_credentials, mock_environ_get):
+    env_vars = mock_env_vars()
+    mock_environ_get.side_effect = lambda k: env_vars.get(k)
+
+    mock_service = MagicMock()
+    mock_build.return_value = mock_service
+
+    mock_files = MagicMock()
+    mock_service.files.return_value = mock_files
+
+    stale_checksum = hashlib.md5(b"Old content").hexdigest()
+    mock_files.list.return_value.execute.return_value = {'files': [{'id': 'existing_123', 'name': 'Test Doc.txt', 'md5Checksum': stale_checksum}]}
+    mock_files.update.return_value.execute.return_value = {"id": "existing_123"}
+
+    result = update_drive_file("folder_999", "Test Doc", "New Content")
+
+    mock_files.update.assert_called_once()
+    assert result == {"id": "existing_123"}
+
+@patch('src.gdrive_client.Credentials')
+@patch('src.gdrive_client.build')
+def test_drive_client_reuses_service_and_folder_listing(mock_build, mock_credentials):
+    mock_service = MagicMock()
+    mock_build.return_value = mock_service
+
+    mock_files = MagicMock()
+    mock_service.files.return_value = mock_files
+
+    # Folder listing spans two pages
+    mock_files.list.return_value.execute.side_effect = [
+        {'files': [{'id': 'p1', 'name': 'Doc - Parte 1.txt'}], 'nextPageToken': 'next'},
+        {'files': [{'id': 'other', 'name': 'Other.txt'}]},
+    ]
+    mock_files.update.return_value.execute.return_value = {"id": "p1"}
+    mock_files.create.return_value.execute.return_value = {"id": "p2"}
+
+    client = DriveClient('id', 'secret', 'refresh')
+    update_drive_file("folder_999", "Doc - Parte 1", "Part one", client=client)
+    update_drive_file("folder_999", "Doc - Parte 2", "Part two", client=client)
+    # Re-uploading identical content is resolved from the cached listing
+    result = update_drive_file("folder_999", "Doc - Parte 2", "Part two", client=client)
+
+    mock_build.assert_called_once()
+    mock_credentials.assert_called_once()
+    assert mock_files.list.call_count == 2
+    assert mock_files.list.call_args_list[1][1]['pageToken'] == 'next'
+    assert mock_files.update.call_args[1]['fileId'] == 'p1'
+    mock_files.create.assert_called_once()
+    assert result == {'id': 'p2', 'skipped': True}
+
+@patch('src.gdrive_client.Credentials')
+@patch('src.gdrive_client.build')
+def test_drive_client_records_metrics(mock_build, mock_credentials):
+    mock_files = mock_build.return_value.files.return_value
+    checksum = hashlib.md5("Same".encode('utf-8')).hexdigest()
+    mock_files.list.return_value.execute.return_value = {'files': [{'id': 'a', 'name': 'A.txt', 'md5Checksum': checksum}]}
+    mock_files.create.return_value.execute.return_value = {'id': 'b'}
+
+    metrics = Metrics()
+    set_metrics(metrics)
+    try:
+        client = DriveClient('id', 'secret', 'token')
+        client.upload('folder', 'A.txt', "Same")
+        client.upload('folder', 'B.txt', "Novo conteúdo")
+    finally:
+        set_metrics(None)
+
+    assert metrics.counter("drive_files", result="skipped") == 1
+    assert metrics.counter("drive_files", result="created") == 1
+    assert metrics.counter("drive_upload_bytes") == len("Novo conteúdo".encode('utf-8'))
+    assert metrics.histogram("drive_request_seconds", operation="list").count == 1
+    assert metrics.histogram("drive_request_seconds", operation="create").count == 1
@@ -0,0 +1,40 @@
+from src.http_cache import HttpCache
+
+def test_cache_roundtrip_persists_between_instances(tmp_path):
+    path = str(tmp_path / "cache" / "http_cache.sqlite")
+    cache = HttpCache(path)
+    cache.put("https://test.com/docs", "<html>Olá</html>", etag='"abc"', last_modified="Mon, 01 Jan 2024 00:00:00 GMT")
+    cache.close()
+
+    reopened = HttpCache(path)
+    entry = reopened.get("https://test.com/docs")
+    assert entry.body == "<html>Olá</html>"
+    assert entry.etag == '"abc"'
+    assert entry.last_modified == "Mon, 01 Jan 2024 00:00:00 GMT"
+    assert len(reopened) == 1
+    assert reopened.get("https://test.com/other") is None
+
+def test_cache_replaces_existing_entry(tmp_path):
+    cache = HttpCache(str(tmp_path / "c.sqlite"))
+    cache.put("https://test.com/docs", "old", etag='"1"')
+    cache.put("https://test.com/docs", "new", etag='"2"')
+    assert len(cache) == 1
+    assert cache.get("https://test.com/docs").body == "new"
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache = HttpCache(str(tmp_path / "c.sqlite"), max_entries=2)
+    cache.put("https://test.com/a", "a", etag='"a"')
+    cache.put("https://test.com/b", "b", etag='"b"')
+    cache.touch("https://test.com/a")
+    cache.put("https://test.com/c", "c", etag='"c"')
+
+    assert len(cache) == 2
+    assert cache.get("https://test.com/b") is None
+    assert cache.get("https://test.com/a") is not None
+    assert cache.get("https://test.com/c") is not None
+
+def test_cache_evicts_by_size(tmp_path):
+    cache = HttpCache(str(tmp_path / "c.sqlite"), max_bytes=1)
+    cache.put("https://test.com/a", "x" * 1000, etag='"a"')
+    assert len(cache) == 0
+    assert cache.total_bytes == 0
@@ -0,0 +1,151 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+import responses
+from unittest.mock import MagicMock
+from src.http_cache import HttpCache
+from src.http_client import CappedRetry, HttpClient, get_default_client, throttle_count
+from src.metrics import Metrics, set_metrics
+from src.rate_limit import RateLimiter
+
+def test_fetch_success():
+    with responses.RequestsMock() as rsps:
+        rsps.add(responses.GET, "https://test.com/docs", body="<html>ok</html>", status=200)
+        assert HttpClient().fetch("https://test.com/docs") == "<html>ok</html>"
+
+def test_fetch_retries_transient_errors():
+    with responses.RequestsMock() as rsps:
+        rsps.add(responses.GET, "https://test.com/docs", status=503)
+        rsps.add(responses.GET, "https://test.com/docs", status=429, headers={"Retry-After": "0"})
+        rsps.add(responses.GET, "https://test.com/docs", body="<html>ok</html>", status=200)
+
+        client = HttpClient(retries=3, backoff_factor=0)
+        assert client.fetch("https://test.com/docs") == "<html>ok</html>"
+        assert len(rsps.calls) == 3
+
+def test_fetch_gives_up_after_retries():
+    with responses.RequestsMock() as rsps:
+        rsps.add(responses.GET, "https://test.com/docs", status=503)
+
+        client = HttpClient(retries=2, backoff_factor=0)
+        assert client.fetch("https://test.com/docs") is None
+        assert len(rsps.calls) == 3
+
+def test_fetch_does_not_retry_client_errors():
+    with responses.RequestsMock() as rsps:
+        rsps.add(responses.GET, "https://test.com/missing", status=404)
+
+        assert HttpClient(retries=3).fetch("https://test.com/missing") is None
+        assert len(rsps.calls) == 1
+
+@pytest.mark.parametrize("header,expected", [("5", 5), ("3600", CappedRetry.MAX_RETRY_AFTER)])
+def test_retry_after_is_capped(header, expected):
+    response = MagicMock()
+    response.headers = {"Retry-After": header}
+    response.getheader.side_effect = lambda name: response.headers.get(name)
+    assert CappedRetry().get_retry_after(response) == expected
+
+def test_default_client_is_shared():
+    assert get_default_client() is get_default_client()
+
+def test_fetch_revalidates_with_cache(tmp_path):
+    cache = HttpCache(str(tmp_path / "http_cache.sqlite"))
+    client = HttpClient(cache=cache)
+
+    with responses.RequestsMock() as rsps:
+        rsps.add(responses.GET, "https://test.com/docs", body="<html>v1</html>", status=200,
+                 headers={"ETag": '"v1"', "Last-Modified": "Mon, 01 Jan 2024 00:00:00 GMT"})
+        assert client.fetch("https://test.com/docs") == "<html>v1</html>"
+        assert "If-None-Match" not in rsps.calls[0].request.headers
+
+    with responses.RequestsMock() as rsps:
+        rsps.add(responses.GET, "https://test.com/docs", status=304)
+        assert client.fetch("https://test.com/docs") == "<html>v1</html>"
+        headers = rsps.calls[0].request.headers
+        assert headers["If-None-Match"] == '"v1"'
+        assert headers["If-Modified-Since"] == "Mon, 01 Jan 2024 00:00:00 GMT"
+
+    assert cache.hits == 1
+
+def test_fetch_updates_cache_when_page_changed(tmp_path):
+    cache = HttpCache(str(tmp_path / "http_cache.sqlite"))
+    cache.put("https://test.com/docs", "<html>v1</html>", etag='"v1"')
+    client = HttpClient(cache=cache)
+
+    with responses.RequestsMock() as rsps:
+        rsps.add(responses.GET, "https://test.com/docs", body="<html>v2</html>", status=200, headers={"ETag": '"v2"'})
+        assert client.fetch("https://test.com/docs") == "<html>v2</html>"
+
+    assert cache.get("https://test.com/docs").etag == '"v2"'
+
+def test_max_connections_caps_requests_in_flight():
+    lock = threading.Lock()
+    state = {"active": 0, "peak": 0}
+
+    def slow_get(url, **kwargs):
+        with lock:
+            state["active"] += 1
+            state["peak"] = max(state["peak"], state["active"])
+        time.sleep(0.02)
+        with lock:
+            state["active"] -= 1
+        return MagicMock(status_code=200, text="ok", headers={})
+
+    client = HttpClient(max_connections=2)
+    client.session.get = slow_get
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        bodies = list(executor.map(client.fetch, [f"https://test.com/docs/{i}" for i in range(8)]))
+
+    assert bodies == ["ok"] * 8
+    assert state["peak"] == 2
+
+def test_throttle_count_includes_retried_responses():
+    history = [MagicMock(status=429), MagicMock(status=None), MagicMock(status=503)]
+    response = MagicMock(status_code=200)
+    response.raw.retries.history = history
+    assert throttle_count(response) == 2
+
+    response = MagicMock(status_code=429)
+    response.raw.retries = None
+    assert throttle_count(response) == 1
+
+def test_fetch_refetches_throttled_page_with_rate_limiter():
+    with responses.RequestsMock() as rsps:
+        rsps.add(responses.GET, "https://test.com/robots.txt", status=404)
+        rsps.add(responses.GET, "https://test.com/docs", status=429, headers={"Retry-After": "0"})
+        rsps.add(responses.GET, "https://test.com/docs", body="<html>ok</html>", status=200)
+
+        limiter = RateLimiter()
+        client = HttpClient(retries=0, rate_limiter=limiter)
+        assert client.fetch("https://test.com/docs") == "<html>ok</html>"
+
+    host = limiter.hosts()["test.com"]
+    assert host.throttled == 1
+    assert host.limit < host.max_concurrency
+    assert host.in_flight == 0
+
+def test_fetch_without_rate_limiter_drops_throttled_page():
+    with responses.RequestsMock() as rsps:
+        rsps.add(responses.GET, "https://test.com/docs", status=429)
+        assert HttpClient(retries=0).fetch("https://test.com/docs") is None
+        assert len(rsps.calls) == 1
+
+def test_fetch_records_metrics_per_host():
+    metrics = Metrics()
+    set_metrics(metrics)
+    try:
+        with responses.RequestsMock() as rsps:
+            rsps.add(responses.GET, "https://test.com/docs", body="<html>ok</html>", status=200)
+            rsps.add(responses.GET, "https://test.com/missing", status=404)
+            client = HttpClient(retries=0)
+            client.fetch("https://test.com/docs")
+            client.fetch("https://test.com/missing")
+    finally:
+        set_metrics(None)
+
+    assert metrics.histogram("http_request_seconds", host="test.com").count == 2
+    assert metrics.counter("http_responses", host="test.com", status=200) == 1
+    assert metrics.counter("http_responses", host="test.com", status=404) == 1
+    assert metrics.counter("http_response_bytes", host="test.com") == len("<html>ok</html>")
+    assert metrics.counter("fetch_failures", host="test.com") == 1
@@ -1,11 +1,21 @@
+import json
+import logging
+import pstats
+import threading
 import pytest
-from unittest.mock import patch, MagicMock
+from unittest.mock import ANY, call, patch, MagicMock
 from main import run_scraper
+from src.crawler import PageResult
+
+@pytest.fixture(autouse=True)
+def drive_client():
+    with patch('main.DriveClient') as mock_drive_client:
+        yield mock_drive_client.from_env.return_value
 
 @patch('main.update_drive_file')
-@patch('main.scrape_documentation')
+@patch('main.iter_documentation')
 @patch('main.load_config')
-def test_main_success(mock_load_config, mock_scrape, mock_gdocs_update):
+def test_main_success(mock_load_config, mock_scrape, mock_gdocs_update, drive_client):
     # Setup mocks
     mock_load_config.return_value = {
         "documentacoes": [
@@ -16,7 +26,7 @@ def test_main_success(mock_load_config, mock_scrape, mock_gdocs_update):
             }
         ]
     }
-    mock_scrape.return_value = "# Extracted Content"
+    mock_scrape.return_value = ["# Extracted Content"]
     mock_gdocs_update.return_value = {"id": "12345"}
     
     # Run
@@ -24,11 +34,11 @@ def test_main_success(mock_load_config, mock_scrape, mock_gdocs_update):
     
     # Verify
     mock_load_config.assert_called_once_with("mock_config.json")
-    mock_scrape.assert_called_once_with("https://test.com")
-    mock_gdocs_update.assert_called_once_with("12345", "Test Doc", "# Extracted Content")
+    mock_scrape.assert_called_once_with("https://test.com", deduplicator=ANY, page_store=ANY)
+    mock_gdocs_update.assert_called_once_with("12345", "Test Doc", "# Extracted Content", client=drive_client)
     
 @patch('main.update_drive_file')
-@patch('main.scrape_documentation')
+@patch('main.iter_documentation')
 @patch('main.load_config')
 def test_main_scrape_failure(mock_load_config, mock_scrape, mock_gdocs_update):
     mock_load_config.return_value = {
@@ -36,7 +46,7 @@ def test_main_scrape_failure(mock_load_config, mock_scrape, mock_gdocs_update):
             {"nome": "Test Doc", "url_base": "https://test.com", "drive_folder_id": "12345"}
         ]
     }
-    mock_scrape.return_value = "" # No content extracted
+    mock_scrape.return_value = [] # No content extracted
     
     run_scraper("mock_config.json")
     
@@ -44,9 +54,9 @@ def test_main_scrape_failure(mock_load_config, mock_scrape, mock_gdocs_update):
     mock_gdocs_update.assert_not_called()
 
 @patch('main.update_drive_file')
-@patch('main.scrape_documentation')
+@patch('main.iter_documentation')
 @patch('main.load_config')
-def test_main_continue_on_error(mock_load_config, mock_scrape, mock_gdocs_update):
+def test_main_continue_on_error(mock_load_config, mock_scrape, mock_gdocs_update, drive_client):
     mock_load_config.return_value = {
         "documentacoes": [
             {"nome": "Fail Doc", "url_base": "https://fail.com", "drive_folder_id": "12345"},
@@ -55,10 +65,10 @@ def test_main_continue_on_error(mock_load_config, mock_scrape, mock_gdocs_update
     }
     
     # Mock scrape to fail on first, succeed on second
-    def scrape_side_effect(url):
+    def scrape_side_effect(url, **options):
         if "fail" in url:
             raise Exception("Scraping failed")
-        return "# Success"
+        return ["# Success"]
         
     mock_scrape.side_effect = scrape_side_effect
     
@@ -67,24 +77,339 @@ def test_main_continue_on_error(mock_load_config, mock_scrape, mock_gdocs_update
     
     # Verify second doc was still processed
     assert mock_scrape.call_count == 2
-    mock_gdocs_update.assert_called_once_with("67890", "Success Doc", "# Success")
+    mock_gdocs_update.assert_called_once_with("67890", "Success Doc", "# Success", client=drive_client)
 
 @patch('main.update_drive_file')
-@patch('main.scrape_documentation')
+@patch('main.iter_documentation')
 @patch('main.load_config')
-def test_main_with_target(mock_load_config, mock_scrape, mock_gdocs_update):
+def test_main_with_target(mock_load_config, mock_scrape, mock_gdocs_update, drive_client):
     mock_load_config.return_value = {
         "documentacoes": [
             {"nome": "Target Doc", "url_base": "https://target.com", "drive_folder_id": "111"},
             {"nome": "Other Doc", "url_base": "https://other.com", "drive_folder_id": "222"}
         ]
     }
-    mock_scrape.return_value = "# Extracted Content"
+    mock_scrape.return_value = ["# Extracted Content"]
     mock_gdocs_update.return_value = {"id": "111"}
     
     # Run with target
     run_scraper("mock_config.json", target="Target Doc")
     
     # Verify only Target Doc was processed
-    mock_scrape.assert_called_once_with("https://target.com")
-    mock_gdocs_update.assert_called_once_with("111", "Target Doc", "# Extracted Content")
+    mock_scrape.assert_called_once_with("https://target.com", deduplicator=ANY, page_store=ANY)
+    mock_gdocs_update.assert_called_once_with("111", "Target Doc", "# Extracted Content", client=drive_client)
+
+@patch('main.update_drive_file')
+@patch('main.iter_documentation')
+@patch('main.load_config')
+def test_main_forwards_crawl_options(mock_load_config, mock_scrape, mock_gdocs_update):
+    mock_load_config.return_value = {
+        "documentacoes": [
+            {
+                "nome": "Test Doc",
+                "url_base": "https://test.com",
+                "drive_folder_id": "12345",
+                "ignore_paths": ["/sdks/"],
+                "max_pages": 50
+            }
+        ]
+    }
+    mock_scrape.return_value = ["# Extracted Content"]
+
+    run_scraper("mock_config.json")
+
+    mock_scrape.assert_called_once_with("https://test.com", ignore_paths=["/sdks/"], max_pages=50, deduplicator=ANY, page_store=ANY)
+
+@patch('main.update_drive_file')
+@patch('main.iter_documentation')
+@patch('main.load_config')
+def test_main_with_cache_dir(mock_load_config, mock_scrape, mock_gdocs_update, tmp_path, drive_client):
+    mock_load_config.return_value = {
+        "documentacoes": [
+            {"nome": "Test Doc", "url_base": "https://test.com", "drive_folder_id": "12345"}
+        ]
+    }
+    mock_scrape.return_value = ["# Extracted Content"]
+
+    run_scraper("mock_config.json", cache_dir=str(tmp_path / "cache"))
+
+    assert (tmp_path / "cache" / "http_cache.sqlite").exists()
+    mock_gdocs_update.assert_called_once_with("12345", "Test Doc", "# Extracted Content", client=drive_client)
+
+@patch('main.MAX_WORDS_PER_FILE', 2)
+@patch('main.update_drive_file')
+@patch('main.iter_documentation')
+@patch('main.load_config')
+def test_main_reports_uploaded_and_skipped(mock_load_config, mock_scrape, mock_gdocs_update, drive_client):
+    mock_load_config.return_value = {
+        "documentacoes": [
+            {"nome": "Test Doc", "url_base": "https://test.com", "drive_folder_id": "12345"}
+        ]
+    }
+    mock_scrape.return_value = ["one two\nthree", " four\nfive six"]
+    mock_gdocs_update.side_effect = [
+        {"id": "1", "skipped": True},
+        {"id": "2"},
+        {"id": "3", "skipped": True},
+    ]
+
+    totals = run_scraper("mock_config.json")
+
+    assert mock_gdocs_update.call_count == 3
+    mock_gdocs_update.assert_any_call("12345", "Test Doc - Parte 1", "one two", client=drive_client)
+    mock_gdocs_update.assert_any_call("12345", "Test Doc - Parte 2", "three four", client=drive_client)
+    mock_gdocs_update.assert_any_call("12345", "Test Doc - Parte 3", "five six", client=drive_client)
+    assert totals == {"uploaded": 1, "skipped": 2, "duplicates": 0}
+
+@patch('main.MAX_WORDS_PER_FILE', 3)
+@patch('main.update_drive_file')
+@patch('main.iter_documentation')
+@patch('main.load_config')
+def test_main_uploads_chunks_while_scraping(mock_load_config, mock_scrape, mock_gdocs_update, drive_client):
+    mock_load_config.return_value = {
+        "documentacoes": [
+            {"nome": "Test Doc", "url_base": "https://test.com", "drive_folder_id": "12345"}
+        ]
+    }
+    uploads = []
+    first_part_uploaded = threading.Event()
+
+    def pages(url, **options):
+        yield "a b c\n"
+        yield "d e f\n"
+        # Part 1 is uploaded as soon as part 2 starts, before the last page is scraped
+        assert first_part_uploaded.wait(timeout=5)
+        yield "g h"
+
+    def upload(folder, name, chunk, client):
+        uploads.append(name)
+        if name == "Test Doc - Parte 1":
+            first_part_uploaded.set()
+
+    mock_scrape.side_effect = pages
+    mock_gdocs_update.side_effect = upload
+
+    totals = run_scraper("mock_config.json")
+
+    assert sorted(uploads) == ["Test Doc - Parte 1", "Test Doc - Parte 2", "Test Doc - Parte 3"]
+    assert totals["uploaded"] == 3
+
+@patch('main.update_drive_file')
+@patch('main.iter_documentation')
+@patch('main.load_config')
+def test_main_missing_drive_credentials(mock_load_config, mock_scrape, mock_gdocs_update):
+    mock_load_config.return_value = {
+        "documentacoes": [
+            {"nome": "Test Doc", "url_base": "https://test.com", "drive_folder_id": "12345"}
+        ]
+    }
+
+    with patch('main.DriveClient.from_env', side_effect=ValueError("Missing OAuth2 environment variables")):
+        run_scraper("mock_config.json")
+
+    # Fail fast instead of scraping content that cannot be uploaded
+    mock_scrape.assert_not_called()
+    mock_gdocs_update.assert_not_called()
+
+@patch('main.update_drive_file')
+@patch('main.iter_documentation')
+@patch('main.load_config')
+def test_main_uploads_through_given_sink(mock_load_config, mock_scrape, mock_gdocs_update, drive_client):
+    mock_load_config.return_value = {
+        "documentacoes": [
+            {"nome": "Test Doc", "url_base": "https://test.com", "drive_folder_id": "12345"}
+        ]
+    }
+    mock_scrape.return_value = ["# Content"]
+    sink = MagicMock()
+
+    with patch('main.DriveClient.from_env') as from_env:
+        run_scraper("mock_config.json", sink=sink)
+
+    from_env.assert_not_called()
+    mock_gdocs_update.assert_called_once_with("12345", "Test Doc", "# Content", client=sink)
+
+@patch('main.update_drive_file')
+@patch('main.iter_documentation')
+@patch('main.load_config')
+def test_main_max_bytes_splits_files(mock_load_config, mock_scrape, mock_gdocs_update, drive_client):
+    mock_load_config.return_value = {
+        "documentacoes": [
+            {"nome": "Test Doc", "url_base": "https://test.com", "drive_folder_id": "12345"}
+        ]
+    }
+    mock_scrape.return_value = ["abc\ndef"]
+
+    run_scraper("mock_config.json", max_bytes=5)
+
+    assert mock_gdocs_update.call_count == 2
+    mock_gdocs_update.assert_any_call("12345", "Test Doc - Parte 1", "abc", client=drive_client)
+    mock_gdocs_update.assert_any_call("12345", "Test Doc - Parte 2", "def", client=drive_client)
+
+@patch('main.update_drive_file')
+@patch('main.iter_documentation')
+@patch('main.load_config')
+def test_main_runs_targets_in_parallel(mock_load_config, mock_scrape, mock_gdocs_update):
+    mock_load_config.return_value = {
+        "documentacoes": [
+            {"nome": f"Doc {i}", "url_base": f"https://doc{i}.com", "drive_folder_id": str(i)}
+            for i in range(3)
+        ]
+    }
+    # Each scrape waits until all three are running, which only happens if they run concurrently
+    barrier = threading.Barrier(3, timeout=5)
+
+    def scrape_side_effect(url, **options):
+        barrier.wait()
+        return [f"# {url}"]
+
+    mock_scrape.side_effect = scrape_side_effect
+
+    totals = run_scraper("mock_config.json", max_targets=3)
+
+    assert totals == {"uploaded": 3, "skipped": 0, "duplicates": 0}
+    assert mock_gdocs_update.call_count == 3
+
+@patch('main.update_drive_file')
+@patch('main.iter_documentation')
+@patch('main.load_config')
+def test_main_summary_isolates_failures(mock_load_config, mock_scrape, mock_gdocs_update, caplog):
+    mock_load_config.return_value = {
+        "documentacoes": [
+            {"nome": "Fail Doc", "url_base": "https://fail.com", "drive_folder_id": "12345"},
+            {"nome": "Success Doc", "url_base": "https://success.com", "drive_folder_id": "67890"}
+        ]
+    }
+
+    def scrape_side_effect(url, **options):
+        if "fail" in url:
+            raise Exception("Scraping failed")
+        return ["# Success"]
+
+    mock_scrape.side_effect = scrape_side_effect
+
+    with caplog.at_level(logging.INFO, logger="main"):
+        totals = run_scraper("mock_config.json", max_targets=2)
+
+    assert totals == {"uploaded": 1, "skipped": 0, "duplicates": 0}
+    summary = [r.getMessage() for r in caplog.records if r.getMessage().startswith(("Summary", "  "))]
+    assert summary[0] == "Summary: 1 target(s) succeeded, 1 failed."
+    # Rows follow config order and the failed target carries its error
+    assert "Fail Doc" in summary[1] and "failed" in summary[1] and "Scraping failed" in summary[1]
+    assert "Success Doc" in summary[2] and "ok" in summary[2]
+
+@patch('main.update_drive_file')
+@patch('main.iter_documentation')
+@patch('main.load_config')
+def test_main_rejects_invalid_max_targets(mock_load_config, mock_scrape, mock_gdocs_update):
+    mock_load_config.return_value = {"documentacoes": []}
+    with pytest.raises(ValueError):
+        run_scraper("mock_config.json", max_targets=0)
+
+@patch('main.create_parse_pool')
+@patch('main.update_drive_file')
+@patch('main.iter_documentation')
+@patch('main.load_config')
+def test_main_shares_parse_pool(mock_load_config, mock_scrape, mock_gdocs_update, mock_create_pool):
+    mock_load_config.return_value = {
+        "documentacoes": [
+            {"nome": "Doc A", "url_base": "https://a.com", "drive_folder_id": "1"},
+            {"nome": "Doc B", "url_base": "https://b.com", "drive_folder_id": "2"}
+        ]
+    }
+    mock_scrape.return_value = ["# Content"]
+    pool = mock_create_pool.return_value
+
+    run_scraper("mock_config.json", parse_workers=0)
+
+    # 0 selects one worker per CPU core
+    mock_create_pool.assert_called_once_with(None)
+    mock_scrape.assert_any_call("https://a.com", parse_pool=pool, deduplicator=ANY, page_store=ANY)
+    mock_scrape.assert_any_call("https://b.com", parse_pool=pool, deduplicator=ANY, page_store=ANY)
+    pool.shutdown.assert_called_once()
+
+@patch('main.update_drive_file')
+@patch('main.iter_documentation')
+@patch('main.load_config')
+def test_main_checkpoint_kept_until_target_uploaded(mock_load_config, mock_scrape, mock_gdocs_update, tmp_path):
+    mock_load_config.return_value = {
+        "documentacoes": [
+            {"nome": "Doc A", "url_base": "https://a.com", "drive_folder_id": "1"},
+            {"nome": "Doc B", "url_base": "https://b.com", "drive_folder_id": "2"}
+        ]
+    }
+
+    def scrape_side_effect(url, checkpoint, **options):
+        assert checkpoint is not None
+        if url == "https://b.com":
+            raise RuntimeError("timed out")
+        return ["# Content"]
+
+    mock_scrape.side_effect = scrape_side_effect
+    run_scraper("mock_config.json", checkpoint_dir=str(tmp_path))
+
+    # Doc B can be resumed with --resume; Doc A is done
+    assert not (tmp_path / "checkpoints" / "doc-a.sqlite").exists()
+    assert (tmp_path / "checkpoints" / "doc-b.sqlite").exists()
+
+@patch('main.update_drive_file')
+@patch('main.iter_documentation')
+@patch('main.load_config')
+def test_main_writes_metrics_and_profile(mock_load_config, mock_scrape, mock_gdocs_update, tmp_path):
+    mock_load_config.return_value = {
+        "documentacoes": [
+            {"nome": "Doc A", "url_base": "https://a.com", "drive_folder_id": "1"},
+            {"nome": "Doc B", "url_base": "https://b.com", "drive_folder_id": "2"}
+        ]
+    }
+
+    def scrape_side_effect(url, **options):
+        if url == "https://b.com":
+            raise RuntimeError("timed out")
+        return ["# Content"]
+
+    mock_scrape.side_effect = scrape_side_effect
+    mock_gdocs_update.return_value = {"id": "1"}
+    paths = {name: tmp_path / name for name in ("run.json", "run.prom", "run.prof")}
+    run_scraper("mock_config.json", metrics_path=str(paths["run.json"]),
+                prometheus_path=str(paths["run.prom"]), profile_path=str(paths["run.prof"]))
+
+    report = json.loads(paths["run.json"].read_text())
+    assert [target["status"] for target in report["targets"]] == ["ok", "failed"]
+    assert report["totals"] == {"uploaded": 1, "skipped": 0, "duplicates": 0}
+    assert report["counters"]["targets"] == [{"labels": {"status": "failed"}, "value": 1},
+                                             {"labels": {"status": "ok"}, "value": 1}]
+    assert [series["labels"] for series in report["histograms"]["target_seconds"]] == [{"target": "Doc A"},
+                                                                                       {"target": "Doc B"}]
+    assert 'docscraper_targets_total{status="ok"} 1' in paths["run.prom"].read_text()
+    # The target threads are profiled along with the main thread
+    profiled = {func[2] for func in pstats.Stats(str(paths["run.prof"])).stats}
+    assert "process_document" in profiled
+
+@patch('main.update_drive_file')
+@patch('main.iter_pages')
+@patch('main.load_config')
+def test_main_uploads_shards_and_manifest(mock_load_config, mock_pages, mock_gdocs_update, drive_client):
+    mock_load_config.return_value = {
+        "documentacoes": [
+            {"nome": "Test Doc", "url_base": "https://test.com/docs", "drive_folder_id": "12345", "output": "shards"}
+        ]
+    }
+    mock_pages.return_value = [PageResult(url="https://test.com/docs", markdown="# Home"),
+                               PageResult(url="https://test.com/docs/api/auth", markdown="# Auth\n\n\n\nKeys")]
+    mock_gdocs_update.side_effect = [{"id": "1", "skipped": True}, {"id": "2"}, {"id": "3"}]
+
+    totals = run_scraper("mock_config.json")
+
+    mock_pages.assert_called_once_with("https://test.com/docs", deduplicator=ANY, page_store=ANY)
+    # Shards are uploaded concurrently, the manifest once they are all done
+    assert sorted(mock_gdocs_update.call_args_list[:2]) == [
+        call("12345", "Test Doc - api - Parte 1", "<!-- Source: https://test.com/docs/api/auth -->\n# Auth\n\nKeys",
+             client=drive_client),
+        call("12345", "Test Doc - index - Parte 1", "<!-- Source: https://test.com/docs -->\n# Home", client=drive_client),
+    ]
+    manifest_call = mock_gdocs_update.call_args_list[2]
+    assert manifest_call.args[:2] == ("12345", "Test Doc - manifest") and manifest_call.kwargs["extension"] == "json"
+    assert json.loads(manifest_call.args[2])["pages"]["https://test.com/docs"] == {
+        "shard": "Test Doc - index - Parte 1.txt", "offset": 0, "length": 45}
+    assert totals == {"uploaded": 2, "skipped": 1, "duplicates": 0}
@@ -0,0 +1,58 @@
+from src.crawler import PageResult
+from src.manifest import PageManifest, manifest_path_for
+
+def test_manifest_path_for():
+    assert manifest_path_for("state", "OpenAI API").endswith("manifests/openai-api.sqlite")
+
+def test_manifest_lookup_requires_matching_hash(tmp_path):
+    path = str(tmp_path / "m.sqlite")
+    manifest = PageManifest(path, version="1")
+    page = PageResult(url="https://test.com/docs", markdown="# Título", links=["https://test.com/docs/a"])
+    manifest.store(page, "hash1")
+    manifest.close()
+
+    reopened = PageManifest(path, version="1")
+    assert reopened.lookup("https://test.com/docs", "hash1") == page
+    assert reopened.lookup("https://test.com/docs", "hash2") is None
+    assert reopened.reused == 1
+
+def test_manifest_discarded_on_version_change(tmp_path):
+    path = str(tmp_path / "m.sqlite")
+    manifest = PageManifest(path, version="1")
+    manifest.store(PageResult(url="https://test.com/docs", markdown="x"), "hash1")
+    manifest.close()
+
+    reopened = PageManifest(path, version="2")
+    assert len(reopened) == 0
+    assert reopened.lookup("https://test.com/docs", "hash1") is None
+
+def test_manifest_prune_removes_unseen_pages(tmp_path):
+    path = str(tmp_path / "m.sqlite")
+    manifest = PageManifest(path, version="1")
+    manifest.store(PageResult(url="https://test.com/a", markdown="a"), "ha")
+    manifest.store(PageResult(url="https://test.com/b", markdown="b"), "hb")
+    manifest.close()
+
+    reopened = PageManifest(path, version="1")
+    reopened.lookup("https://test.com/a", "ha")
+    assert reopened.prune() == 1
+    assert len(reopened) == 1
+
+def test_manifest_lookup_by_lastmod(tmp_path):
+    manifest = PageManifest(str(tmp_path / "m.sqlite"), version="1")
+    page = PageResult(url="https://test.com/docs/a", markdown="A")
+    manifest.store(page, "hash1", lastmod="2024-05-01")
+
+    assert manifest.lookup_lastmod("https://test.com/docs/a", "2024-05-01") == page
+    assert manifest.lookup_lastmod("https://test.com/docs/a", "2024-06-01") is None
+    # A hash hit records the new lastmod, so the next run can skip the fetch
+    assert manifest.lookup("https://test.com/docs/a", "hash1", lastmod="2024-06-01") == page
+    assert manifest.lookup_lastmod("https://test.com/docs/a", "2024-06-01") == page
+
+def test_manifest_keeps_canonical_url(tmp_path):
+    manifest = PageManifest(str(tmp_path / "m.sqlite"), version="1")
+    page = PageResult(url="https://test.com/docs/print/a", links=["https://test.com/docs/a"],
+                      canonical="https://test.com/docs/a")
+    manifest.store(page, "hash1")
+
+    assert manifest.lookup("https://test.com/docs/print/a", "hash1") == page
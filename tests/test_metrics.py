@@ -0,0 +1,111 @@
+import json
+import pstats
+import threading
+from src.metrics import Histogram, Metrics, ThreadProfiler, get_metrics, set_metrics, write_json_report
+
+def test_histogram_quantiles_and_summary():
+    histogram = Histogram(buckets=(0.1, 1.0))
+    for value in (0.05, 0.05, 0.5, 3.0):
+        histogram.observe(value)
+    assert histogram.counts == [2, 1, 1]
+    assert histogram.quantile(0.5) == 0.1
+    assert histogram.quantile(0.75) == 1.0
+    # Values past the last bucket report the maximum seen
+    assert histogram.quantile(0.99) == 3.0
+    assert histogram.summary() == {"count": 4, "sum": 3.6, "mean": 0.9, "max": 3.0, "p50": 0.1, "p90": 3.0, "p99": 3.0}
+    assert Histogram().quantile(0.5) == 0.0
+
+def test_metrics_counters_histograms_and_report(tmp_path):
+    metrics = Metrics()
+    metrics.increment("pages", target="a", outcome="emitted")
+    metrics.increment("pages", 2, outcome="emitted", target="a")
+    metrics.increment("pages", target="b", outcome="failed")
+    metrics.observe("stage_seconds", 0.5, stage="parse")
+    metrics.observe("stage_seconds", 0.25, stage="convert")
+    with metrics.timer("stage_seconds", stage="convert"):
+        pass
+
+    assert metrics.counter("pages", target="a", outcome="emitted") == 3
+    assert metrics.counter("pages", target="c") == 0
+    assert metrics.histogram("stage_seconds", stage="convert").count == 2
+    assert metrics.totals("pages", "outcome") == {"emitted": 3, "failed": 1}
+    assert metrics.totals("stage_seconds", "stage")["parse"] == 0.5
+
+    path = tmp_path / "report.json"
+    write_json_report(str(path), metrics.report())
+    report = json.loads(path.read_text())
+    assert report["counters"]["pages"] == [
+        {"labels": {"outcome": "emitted", "target": "a"}, "value": 3},
+        {"labels": {"outcome": "failed", "target": "b"}, "value": 1},
+    ]
+    assert report["histograms"]["stage_seconds"][1]["labels"] == {"stage": "parse"}
+
+def test_metrics_prometheus_format():
+    metrics = Metrics(buckets=(0.1, 1.0))
+    metrics.increment("http_response_bytes", 512, host="test.com")
+    metrics.observe("http_request_seconds", 0.5, host='a"b')
+
+    assert metrics.to_prometheus().splitlines() == [
+        "# TYPE docscraper_http_response_bytes_total counter",
+        'docscraper_http_response_bytes_total{host="test.com"} 512',
+        "# TYPE docscraper_http_request_seconds histogram",
+        'docscraper_http_request_seconds_bucket{host="a\\"b",le="0.1"} 0',
+        'docscraper_http_request_seconds_bucket{host="a\\"b",le="1"} 1',
+        'docscraper_http_request_seconds_bucket{host="a\\"b",le="+Inf"} 1',
+        'docscraper_http_request_seconds_sum{host="a\\"b"} 0.5',
+        'docscraper_http_request_seconds_count{host="a\\"b"} 1',
+    ]
+
+def test_set_metrics_replaces_registry():
+    metrics = Metrics()
+    set_metrics(metrics)
+    try:
+        get_metrics().increment("pages")
+        assert metrics.counter("pages") == 1
+    finally:
+        set_metrics(None)
+    assert get_metrics() is not metrics and get_metrics().counter("pages") == 0
+
+def test_thread_profiler_merges_threads(tmp_path):
+    profiler = ThreadProfiler()
+    assert profiler.dump(str(tmp_path / "empty.prof")) is None
+
+    def work():
+        with profiler.profile():
+            sorted(range(1000), key=lambda n: -n)
+
+    threads = [threading.Thread(target=work) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    path = tmp_path / "run.prof"
+    profiler.dump(str(path))
+    calls = {func[2]: stat[1] for func, stat in pstats.Stats(str(path)).stats.items()}
+    assert calls["<built-in method builtins.sorted>"] == 2
+
+def test_thread_profiler_allows_overlapping_blocks(tmp_path):
+    profiler = ThreadProfiler()
+    started = threading.Barrier(3)
+
+    def work():
+        with profiler.profile():
+            started.wait(5)
+            sorted(range(1000), key=lambda n: -n)
+
+    with profiler.profile():
+        threads = [threading.Thread(target=work) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        # Every block is active at once
+        started.wait(5)
+        for thread in threads:
+            thread.join()
+        with profiler.profile():
+            sorted(range(10))
+
+    path = tmp_path / "run.prof"
+    profiler.dump(str(path))
+    calls = {func[2]: stat[1] for func, stat in pstats.Stats(str(path)).stats.items()}
+    assert calls["<built-in method builtins.sorted>"] == 3
@@ -0,0 +1,33 @@
+import os
+from src.page_store import PageStore
+
+def test_page_store_round_trip():
+    store = PageStore()
+    offset = store.put("https://test.com/docs/a", "# A\n\nPage A")
+    store.put("https://test.com/docs/b", "# B ünïcode")
+    assert store.read(offset) == "# A\n\nPage A"
+    assert store.get("https://test.com/docs/b") == "# B ünïcode"
+    assert store.get("https://test.com/docs/c") is None
+    assert "https://test.com/docs/a" in store and len(store) == 2
+    # A page stored again replaces the earlier record but keeps its place
+    store.put("https://test.com/docs/a", "# A v2")
+    assert list(store.pages()) == [("https://test.com/docs/a", "# A v2"), ("https://test.com/docs/b", "# B ünïcode")]
+    store.close()
+
+def test_page_store_reopens_and_drops_truncated_record(tmp_path):
+    path = str(tmp_path / "pages" / "target.bin")
+    store = PageStore(path)
+    store.put("https://test.com/docs/a", "Page A" * 100)
+    store.put("https://test.com/docs/b", "Page B")
+    store.close()
+    # The last record was cut short, e.g. by a crash
+    os.truncate(path, os.path.getsize(path) - 3)
+
+    reopened = PageStore(path)
+    assert reopened.get("https://test.com/docs/a") == "Page A" * 100
+    assert "https://test.com/docs/b" not in reopened
+    reopened.put("https://test.com/docs/c", "Page C")
+    reopened.close()
+
+    assert list(PageStore(path).pages()) == [("https://test.com/docs/a", "Page A" * 100),
+                                             ("https://test.com/docs/c", "Page C")]
@@ -0,0 +1,155 @@
+import random
+import threading
+import time
+import pytest
+from src.rate_limit import HostLimiter, RateLimit, RateLimiter, TokenBucket, parse_crawl_delay
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+def test_token_bucket_allows_burst_then_paces():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2, burst=3, clock=clock, sleep=clock.sleep)
+    waits = [bucket.acquire() for _ in range(5)]
+    assert waits[:3] == [0, 0, 0]
+    assert waits[3:] == [pytest.approx(0.5), pytest.approx(0.5)]
+
+def test_parse_crawl_delay():
+    robots = """
+User-agent: Googlebot
+Crawl-delay: 1
+
+User-agent: DocScraper
+User-agent: OtherBot
+Disallow: /private
+Crawl-delay: 2.5
+
+User-agent: *
+Crawl-delay: 10
+"""
+    assert parse_crawl_delay(robots, "DocScraper/1.0 (+https://example.com)") == 2.5
+    assert parse_crawl_delay(robots, "SomethingElse/2.0") == 10
+    assert parse_crawl_delay("User-agent: *\nDisallow:\n", "DocScraper/1.0") is None
+
+def test_host_limiter_respects_crawl_delay():
+    limiter = HostLimiter("test.com", RateLimit(requests_per_second=10, burst=5), crawl_delay=2)
+    assert limiter.bucket.rate == 0.5
+    assert limiter.bucket.burst == 1
+
+def test_host_limiter_backs_off_and_ramps_up():
+    clock = FakeClock()
+    limiter = HostLimiter("test.com", RateLimit(requests_per_second=8, max_concurrency=8),
+                          clock=clock, sleep=clock.sleep)
+
+    limiter.acquire()
+    limiter.release(0.1, throttled=1)
+    assert limiter.limit == 4
+    assert limiter.bucket.rate == 4
+
+    # Throttled responses arriving together count as one congestion event
+    limiter.acquire()
+    limiter.release(0.1, throttled=1)
+    assert limiter.limit == 4
+
+    for _ in range(40):
+        limiter.acquire()
+        limiter.release(0.1)
+    assert limiter.limit == 8
+    assert limiter.bucket.rate == 8
+
+def test_host_limiter_shrinks_window_on_slow_responses():
+    limiter = HostLimiter("test.com", RateLimit(max_concurrency=4))
+    limiter.acquire()
+    limiter.release(0.1)
+    limiter.acquire()
+    limiter.release(1.0)
+    assert limiter.limit == 3
+
+def test_host_limiter_baseline_forgets_fast_outliers():
+    limiter = HostLimiter("test.com", RateLimit(requests_per_second=1000, burst=1000, max_concurrency=6))
+    rng = random.Random(0)
+    # A revalidated cache entry answers fast, but is not compared with full responses
+    limiter.acquire()
+    limiter.release(0.005, kind=304)
+    # Nor does a one-off fast full response make every later one look slow
+    limiter.acquire()
+    limiter.release(0.02, kind=200)
+    for _ in range(500):
+        limiter.acquire()
+        limiter.release(rng.uniform(0.05, 0.12), kind=200)
+    assert limiter.limit == 6
+
+def test_host_limiter_caps_concurrency():
+    limiter = HostLimiter("test.com", RateLimit(requests_per_second=1000, burst=1000, max_concurrency=2))
+    lock = threading.Lock()
+    state = {"active": 0, "peak": 0}
+
+    def request():
+        limiter.acquire()
+        with lock:
+            state["active"] += 1
+            state["peak"] = max(state["peak"], state["active"])
+        time.sleep(0.01)
+        with lock:
+            state["active"] -= 1
+        limiter.release(None)
+
+    threads = [threading.Thread(target=request) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert state["peak"] == 2
+
+def test_rate_limiter_reads_robots_once_per_host_and_applies_overrides():
+    loaded = []
+
+    def load_robots(url):
+        loaded.append(url)
+        return "User-agent: *\nCrawl-delay: 4\n"
+
+    limiter = RateLimiter()
+    first = limiter.host("https://test.com/docs/a", load_robots)
+    assert limiter.host("https://test.com/docs/b", load_robots) is first
+    assert loaded == ["https://test.com/robots.txt"]
+    assert first.bucket.rate == 0.25
+
+    limiter.configure("https://test.com/docs", RateLimit(requests_per_second=2, respect_crawl_delay=False))
+    overridden = limiter.host("https://test.com/docs/a", load_robots)
+    assert overridden.bucket.rate == 2
+    assert loaded == ["https://test.com/robots.txt"]
+
+def test_rate_limiter_reads_robots_without_blocking_other_hosts():
+    release, reading = threading.Event(), threading.Event()
+    loaded = []
+
+    def load_robots(url):
+        loaded.append(url)
+        if "slow.com" in url:
+            reading.set()
+            assert release.wait(5)
+        return None
+
+    limiter = RateLimiter()
+    slow = []
+    threads = [threading.Thread(target=lambda: slow.append(limiter.host("https://slow.com/a", load_robots)))
+               for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    assert reading.wait(5)
+    # Another host gets its limiter while slow.com's robots.txt is still being read
+    assert limiter.host("https://fast.com/a", load_robots).host == "fast.com"
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert len(slow) == 3 and all(host is slow[0] for host in slow)
+    assert loaded.count("https://slow.com/robots.txt") == 1
@@ -1,6 +1,20 @@
+import json
+import random
 import pytest
 import responses
-from src.scraper import fetch_and_clean_html, convert_to_markdown, scrape_documentation, clean_text, chunk_text
+from responses import matchers
+from unittest.mock import patch
+from urllib.parse import urljoin
+import markdownify
+from bs4 import BeautifulSoup
+from src import fast_markdown
+from src.checkpoint import CrawlCheckpoint
+from src.dedup import Deduplicator
+from src.http_client import HttpClient
+from src.manifest import PageManifest
+from src.metrics import Metrics, set_metrics
+from src.page_store import PageStore
+from src.scraper import fetch_and_clean_html, convert_to_markdown, scrape_documentation, iter_documentation, clean_text, chunk_text, count_words, ChunkAssembler, PROCESSING_VERSION, create_parse_pool, process_page, iter_pages
 
 def test_clean_text():
     text_with_extra_newlines = "Line 1\n\n\n\nLine 2\n\n\nLine 3"
@@ -109,3 +123,542 @@ def test_scrape_documentation_single_page(mock_html):
         assert "# Main Title" in result_md
         assert "important content" in result_md
         assert "## Page 2 Content" in result_md
+
+def test_scrape_documentation_ignore_paths():
+    with responses.RequestsMock(assert_all_requests_are_fired=False) as rsps:
+        root_html = """<html><body><main><h1>Root</h1>
+            <a href="/docs/guide">Guide</a>
+            <a href="/docs/sdks/python">SDK</a>
+        </main></body></html>"""
+        rsps.add(responses.GET, "https://test.com/docs", body=root_html, status=200)
+        rsps.add(responses.GET, "https://test.com/docs/guide", body="<main><p>Guide page</p></main>", status=200)
+        rsps.add(responses.GET, "https://test.com/docs/sdks/python", body="<main><p>SDK page</p></main>", status=200)
+
+        result_md = scrape_documentation("https://test.com/docs", ignore_paths=["/sdks/"])
+
+        assert "Guide page" in result_md
+        assert "SDK page" not in result_md
+        fetched = [call.request.url for call in rsps.calls]
+        assert "https://test.com/docs/sdks/python" not in fetched
+
+def test_scrape_documentation_incremental_reuses_unchanged_pages(mock_html, tmp_path):
+    page2_html = "<html><body><main><h2>Page 2 Content</h2></main></body></html>"
+    path = str(tmp_path / "manifest.sqlite")
+
+    def scrape():
+        with responses.RequestsMock() as rsps:
+            rsps.add(responses.GET, "https://test.com/docs", body=mock_html, status=200)
+            rsps.add(responses.GET, "https://test.com/docs/page2", body=page2_html, status=200)
+            manifest = PageManifest(path, version=PROCESSING_VERSION)
+            try:
+                return scrape_documentation("https://test.com/docs", manifest=manifest)
+            finally:
+                manifest.close()
+
+    first = scrape()
+    with patch("src.scraper.process_page", side_effect=AssertionError("page should not be re-processed")):
+        second = scrape()
+
+    assert second == first == scrape_documentation_plain(mock_html, page2_html)
+
+def scrape_documentation_plain(mock_html, page2_html):
+    with responses.RequestsMock() as rsps:
+        rsps.add(responses.GET, "https://test.com/docs", body=mock_html, status=200)
+        rsps.add(responses.GET, "https://test.com/docs/page2", body=page2_html, status=200)
+        return scrape_documentation("https://test.com/docs")
+
+def reference_chunks(text, max_words):
+    """The original list-based chunking algorithm, kept as the behavioural reference."""
+    chunks, current_chunk, current_word_count = [], [], 0
+    for line in text.split('\n'):
+        line_word_count = len(line.split())
+        if current_word_count + line_word_count > max_words and current_chunk:
+            chunks.append('\n'.join(current_chunk))
+            current_chunk, current_word_count = [line], line_word_count
+        else:
+            current_chunk.append(line)
+            current_word_count += line_word_count
+    chunks.append('\n'.join(current_chunk))
+    return chunks
+
+@pytest.mark.parametrize("max_words", [1, 7, 45, 1000])
+def test_chunk_assembler_matches_reference(max_words):
+    rng = random.Random(max_words)
+    words = ["alpha", "beta", "```", "code", "|", "x"]
+    text = "\n".join(
+        " ".join(rng.choice(words) for _ in range(rng.randint(0, 12)))
+        for _ in range(300)
+    )
+    # Feed the text in arbitrary pieces, splitting lines and even words
+    pieces, position = [], 0
+    while position < len(text):
+        step = rng.randint(1, 80)
+        pieces.append(text[position:position + step])
+        position += step
+
+    assembler = ChunkAssembler(max_words=max_words)
+    chunks = [chunk for piece in pieces for chunk in assembler.feed(piece)]
+    chunks += list(assembler.finish())
+
+    assert chunks == reference_chunks(text, max_words)
+    assert chunk_text(text, max_words=max_words) == chunks
+    assert assembler.chunk_count == len(chunks)
+    assert assembler.total_words == len(text.split())
+    assert assembler.total_chars == len(text)
+
+def test_chunk_assembler_without_input():
+    assembler = ChunkAssembler(max_words=10)
+    assert list(assembler.finish()) == []
+    assert assembler.chunk_count == 0
+
+def test_iter_documentation_pieces_join_to_document(mock_html):
+    page2_html = "<html><body><main><h2>Page 2 Content</h2></main></body></html>"
+    with responses.RequestsMock() as rsps:
+        rsps.add(responses.GET, "https://test.com/docs", body=mock_html, status=200)
+        rsps.add(responses.GET, "https://test.com/docs/page2", body=page2_html, status=200)
+        pieces = list(iter_documentation("https://test.com/docs"))
+
+    assert len(pieces) == 2
+    assert pieces[0].startswith("<!-- Source: https://test.com/docs -->\n# Main Title")
+    assert pieces[1] == "\n\n---\n\n<!-- Source: https://test.com/docs/page2 -->\n## Page 2 Content"
+    assert "".join(pieces) == scrape_documentation_plain(mock_html, page2_html)
+
+def test_chunk_text_edge_cases():
+    assert chunk_text("", max_words=10) == [""]
+    assert chunk_text("\n\n", max_words=10) == ["\n\n"]
+    # A single oversized line is kept whole
+    assert chunk_text("a b c d\ne", max_words=2) == ["a b c d", "e"]
+
+def test_chunk_text_max_bytes():
+    # "ção" is 5 bytes in UTF-8
+    text = "\n".join(["ção ção"] * 6)  # 11 bytes per line
+    chunks = chunk_text(text, max_words=1000, max_bytes=23)
+    assert chunks == ["ção ção\nção ção"] * 3
+    assert all(len(chunk.encode("utf-8")) <= 23 for chunk in chunks)
+
+    # Word and byte limits combine; whichever is hit first splits the chunk
+    assert chunk_text("a b\nc d\ne f", max_words=4, max_bytes=100) == ["a b\nc d", "e f"]
+    assert chunk_text("a b\nc d\ne f", max_words=100, max_bytes=3) == ["a b", "c d", "e f"]
+
+def test_count_words():
+    assert count_words("") == 0
+    assert count_words("one two\n\n three\tfour\nfive") == 5
+    text = "\n".join("word " * (i % 7) for i in range(500))
+    assert count_words(text) == len(text.split())
+
+def test_iter_documentation_parse_pool_matches_serial(mock_html, tmp_path):
+    page2_html = "<html><body><main><h2>Page 2 Content</h2></main></body></html>"
+    manifest = PageManifest(str(tmp_path / "manifest.sqlite"), version=PROCESSING_VERSION)
+    with create_parse_pool(2) as pool:
+        with responses.RequestsMock() as rsps:
+            rsps.add(responses.GET, "https://test.com/docs", body=mock_html, status=200)
+            rsps.add(responses.GET, "https://test.com/docs/page2", body=page2_html, status=200)
+            pooled = "".join(iter_documentation("https://test.com/docs", parse_pool=pool, manifest=manifest))
+    manifest.close()
+
+    assert pooled == scrape_documentation_plain(mock_html, page2_html)
+    assert manifest.converted == 2
+
+def reference_process_page(url, html):
+    """The original multi-pass page processing (re-serializes before converting), kept as the reference."""
+    soup = BeautifulSoup(html, 'html.parser')
+    links = [urljoin(url, a['href']) for a in soup.find_all("a", href=True) if not a['href'].startswith('#')]
+    for tag in soup(["nav", "footer", "header", "aside", "script", "style", "svg", "img", "noscript", "form", "iframe", "video", "audio", "canvas", "map", "area", "button", "input", "select", "textarea"]):
+        tag.decompose()
+    main_content = soup.find("main") or soup.find("article") or soup.find("body") or soup
+    return markdownify.markdownify(str(main_content), heading_style="ATX").strip(), links
+
+PAGE_CORPUS = [
+    "<p>No body at all, <a href='x'>x</a> &amp; entities &lt;tag&gt; &nbsp;here</p>",
+    "<body><header><main><p>Hidden main</p></main></header><article><h2>Article</h2><p>Text</p></article></body>",
+    "<body><main><p>First</p></main><main><p>Second</p></main></body>",
+    """<body><nav><a href="/docs/nav">Nav</a></nav><main>
+        <ul>
+            <li>One <a href="#frag">anchor</a></li>
+            <li>Two
+                <ol><li>Nested <a href="../up">up</a></li></ol>
+            </li>
+        </ul>
+        <table><thead><tr><th>A</th><th>B</th></tr></thead>
+            <tbody><tr><td>1</td><td><code>x | y</code></td></tr></tbody></table>
+        <pre><code>  indented
+    code &lt;b&gt;
+</code></pre>
+        <blockquote><p>Quote with <em>emphasis</em> and <strong>bold</strong></p></blockquote>
+        <h3>Heading <a href="https://other.com/page?b=2&amp;a=1">link</a></h3>
+        <p>Line<br>break <!-- comment --> <a href="">empty href</a> <a>no href</a></p>
+        <form><a href="/docs/in-form">in form</a></form>
+    </main></body>""",
+    "<main><pre><button>Copy</button>\n  \n<img src='i'>\t<code>x = 1</code> <button>Run</button>\n</pre><p> <svg></svg> </p></main>",
+    "<html><body><div><p>Body fallback</p><script>var x = '<a href=\"/s\">';</script></div></body></html>",
+]
+
+@pytest.mark.parametrize("html", PAGE_CORPUS + ["__mock_html__"])
+def test_process_page_matches_reference(html, mock_html):
+    html = mock_html if html == "__mock_html__" else html
+    url = "https://test.com/docs/guide/page"
+    result = process_page(url, html)
+    expected_markdown, expected_links = reference_process_page(url, html)
+    assert result.markdown == expected_markdown
+    assert result.links == expected_links
+
+SITEMAP = """<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <url><loc>https://test.com/docs/guide</loc><lastmod>2024-05-01</lastmod></url>
+  <url><loc>https://test.com/docs/api.md</loc><lastmod>2024-05-02</lastmod></url>
+  <url><loc>https://test.com/blog/news</loc></url>
+</urlset>"""
+
+def add_sitemap_site(rsps):
+    rsps.add(responses.GET, "https://test.com/robots.txt", body="Sitemap: https://test.com/sitemap.xml\n")
+    rsps.add(responses.GET, "https://test.com/sitemap.xml", body=SITEMAP)
+    rsps.add(responses.GET, "https://test.com/docs",
+             body="<main><h1>Home</h1><a href='/docs/linked'>Linked</a></main>")
+    rsps.add(responses.GET, "https://test.com/docs/guide", body="<main><p>Guide page</p></main>")
+    rsps.add(responses.GET, "https://test.com/docs/api.md", body="# API\n\nAlready *Markdown*.\n")
+
+def test_scrape_documentation_sitemap_discovery():
+    with responses.RequestsMock() as rsps:
+        add_sitemap_site(rsps)
+        result_md = scrape_documentation("https://test.com/docs", discovery=["sitemap"])
+
+    assert result_md == (
+        "<!-- Source: https://test.com/docs -->\n# Home\n\n[Linked](/docs/linked)"
+        "\n\n---\n\n<!-- Source: https://test.com/docs/guide -->\nGuide page"
+        "\n\n---\n\n<!-- Source: https://test.com/docs/api.md -->\n# API\n\nAlready *Markdown*."
+    )
+
+def test_scrape_documentation_incremental_skips_pages_with_unchanged_lastmod(tmp_path):
+    path = str(tmp_path / "manifest.sqlite")
+
+    def scrape():
+        with responses.RequestsMock(assert_all_requests_are_fired=False) as rsps:
+            add_sitemap_site(rsps)
+            manifest = PageManifest(path, version=PROCESSING_VERSION)
+            try:
+                document = scrape_documentation("https://test.com/docs", discovery=["sitemap"], manifest=manifest)
+            finally:
+                manifest.close()
+            return document, [call.request.url for call in rsps.calls]
+
+    first, _ = scrape()
+    second, fetched = scrape()
+
+    assert second == first
+    assert "https://test.com/docs/guide" not in fetched
+    assert "https://test.com/docs/api.md" not in fetched
+
+def test_scrape_documentation_uses_llms_full():
+    with responses.RequestsMock() as rsps:
+        rsps.add(responses.GET, "https://test.com/docs/llms-full.txt", body="# Docs\n\nThe whole site.\n",
+                 content_type="text/plain")
+        result_md = scrape_documentation("https://test.com/docs", discovery=["llms-full", "links"])
+
+    assert result_md == "<!-- Source: https://test.com/docs/llms-full.txt -->\n# Docs\n\nThe whole site."
+
+def add_duplicated_site(rsps):
+    paragraphs = "".join(f"<p>Paragraph {i} explains how the client sends request number {i} to the API.</p>"
+                         for i in range(10))
+    guide = f"<html><head><title>Guide</title></head><body><main><h1>Guide</h1>{paragraphs}</main></body></html>"
+    rsps.add(responses.GET, "https://test.com/docs", body=(
+        "<main><h1>Home</h1><a href='/docs/guide'>Guide</a><a href='/docs/guide?lang=en'>EN</a>"
+        "<a href='/docs/print/guide'>Print</a><a href='/docs/v2/guide'>v2</a></main>"))
+    # responses ignores query strings unless told otherwise: each variant only answers its own URL
+    rsps.add(responses.GET, "https://test.com/docs/guide", body=guide, match=[matchers.query_param_matcher({})])
+    rsps.add(responses.GET, "https://test.com/docs/guide", body=guide,
+             match=[matchers.query_param_matcher({"lang": "en"})])
+    rsps.add(responses.GET, "https://test.com/docs/print/guide", body=(
+        '<html><head><link rel="canonical" href="https://test.com/docs/guide"></head>'
+        f"<body><h1>Guide</h1>{paragraphs}</body></html>"))
+    rsps.add(responses.GET, "https://test.com/docs/v2/guide", body=guide.replace("Paragraph 9", "Paragraph nine"))
+
+def test_scrape_documentation_drops_duplicates():
+    with responses.RequestsMock() as rsps:
+        add_duplicated_site(rsps)
+        with patch("src.scraper.fast_markdown.convert_soup", side_effect=fast_markdown.convert_soup) as convert:
+            deduplicator = Deduplicator()
+            result_md = scrape_documentation("https://test.com/docs", deduplicator=deduplicator)
+
+    sources = [line for line in result_md.splitlines() if line.startswith("<!-- Source:")]
+    assert sources == ["<!-- Source: https://test.com/docs -->", "<!-- Source: https://test.com/docs/guide -->"]
+    assert (deduplicator.exact, deduplicator.canonical, deduplicator.near) == (1, 1, 1)
+    # Home, guide and v2: the identical copy reuses the guide's conversion, the canonical copy is not converted
+    assert convert.call_count == 3
+
+@pytest.mark.parametrize("limits", [{"max_depth": 1}, {"max_pages": 2}])
+def test_scrape_documentation_keeps_canonical_copies_when_canonical_is_not_crawled(limits):
+    with responses.RequestsMock(assert_all_requests_are_fired=False) as rsps:
+        rsps.add(responses.GET, "https://test.com/docs", body="<main><h1>Home</h1><a href='/docs/a'>A</a></main>")
+        rsps.add(responses.GET, "https://test.com/docs/a", body=(
+            '<html><head><link rel="canonical" href="/docs/a-v2"></head><body><main><p>Page A</p></main></body></html>'))
+        rsps.add(responses.GET, "https://test.com/docs/a-v2", body="<main><p>Page A, version 2</p></main>")
+        deduplicator = Deduplicator()
+        result_md = scrape_documentation("https://test.com/docs", deduplicator=deduplicator, **limits)
+
+    assert result_md.endswith("<!-- Source: https://test.com/docs/a -->\nPage A")
+    assert "version 2" not in result_md
+    assert deduplicator.dropped == 0
+
+def test_scrape_documentation_incremental_keeps_canonical_copies_under_new_limits(tmp_path):
+    path = str(tmp_path / "manifest.sqlite")
+
+    def scrape(manifest=None, **limits):
+        with responses.RequestsMock(assert_all_requests_are_fired=False) as rsps:
+            rsps.add(responses.GET, "https://test.com/docs", body="<main><h1>Home</h1><a href='/docs/a'>A</a></main>")
+            rsps.add(responses.GET, "https://test.com/docs/a", body=(
+                '<html><head><link rel="canonical" href="/docs/a-v2"></head><body><main><p>Page A</p></main></body></html>'))
+            rsps.add(responses.GET, "https://test.com/docs/a-v2", body="<main><p>Page A, version 2</p></main>")
+            return scrape_documentation("https://test.com/docs", manifest=manifest, **limits)
+
+    # The first run leaves /docs/a to its canonical URL; the second one does not crawl that URL
+    for limits in ({}, {"max_depth": 1}):
+        manifest = PageManifest(path, version=PROCESSING_VERSION)
+        try:
+            result_md = scrape(manifest, **limits)
+        finally:
+            manifest.close()
+
+    assert result_md == scrape(max_depth=1)
+    assert result_md.endswith("<!-- Source: https://test.com/docs/a -->\nPage A")
+
+def test_scrape_documentation_drops_canonical_copies_at_max_depth():
+    with responses.RequestsMock() as rsps:
+        rsps.add(responses.GET, "https://test.com/docs",
+                 body="<main><h1>Home</h1><a href='/docs/a'>A</a><a href='/docs/a-v2'>A v2</a></main>")
+        rsps.add(responses.GET, "https://test.com/docs/a", body=(
+            '<html><head><link rel="canonical" href="/docs/a-v2"></head><body><main><p>Page A</p></main></body></html>'))
+        rsps.add(responses.GET, "https://test.com/docs/a-v2", body="<main><p>Page A, version 2</p></main>")
+        deduplicator = Deduplicator()
+        result_md = scrape_documentation("https://test.com/docs", deduplicator=deduplicator, max_depth=1)
+
+    # Converted, since its links are not followed, but dropped in favour of its canonical URL crawled alongside
+    assert "<!-- Source: https://test.com/docs/a -->" not in result_md
+    assert result_md.endswith("<!-- Source: https://test.com/docs/a-v2 -->\nPage A, version 2")
+    assert deduplicator.canonical == 1
+
+def test_scrape_documentation_dedupe_disabled_keeps_copies():
+    with responses.RequestsMock() as rsps:
+        add_duplicated_site(rsps)
+        result_md = scrape_documentation("https://test.com/docs", dedupe=False)
+
+    assert result_md.count("<!-- Source:") == 5
+
+def add_site_with_div_chrome(rsps, pages=12):
+    sidebar = "<div class='sidebar'>" + "".join(f"<a href='/docs/p{i}'>Page {i}</a><br>" for i in range(pages)) + "</div>"
+    chrome = ("<div class='cookies'><p>We use cookies. <a href='/privacy'>Accept</a></p></div>", sidebar,
+              "<div class='feedback'><p>Was this helpful?</p><p>Yes No</p></div>")
+    for i in range(pages):
+        path = "/docs" if i == 0 else f"/docs/p{i}"
+        body = f"<h1>Page {i}</h1><p>Content of page {i}, which is not like the others.</p>"
+        rsps.add(responses.GET, f"https://test.com{path}",
+                 body=f"<html><body>{chrome[0]}<div class='layout'>{chrome[1]}{body}</div>{chrome[2]}</body></html>")
+
+def test_scrape_documentation_strips_boilerplate_blocks():
+    with responses.RequestsMock() as rsps:
+        add_site_with_div_chrome(rsps)
+        result_md = scrape_documentation("https://test.com/docs")
+    with responses.RequestsMock() as rsps:
+        add_site_with_div_chrome(rsps)
+        unstripped = scrape_documentation("https://test.com/docs", strip_boilerplate=False)
+
+    assert result_md.count("<!-- Source:") == unstripped.count("<!-- Source:") == 12
+    for chrome in ("We use cookies", "[Page 3](/docs/p3)", "Was this helpful?", "Yes No"):
+        assert chrome not in result_md
+        assert unstripped.count(chrome) == 12
+    assert "# Page 3\n\nContent of page 3, which is not like the others." in result_md
+
+API_RESOURCES = ["users", "teams", "projects", "invoices", "webhooks", "events", "files", "tokens",
+                 "roles", "audit-logs", "regions", "plans", "coupons", "reports", "exports", "imports"]
+
+def add_api_reference_site(rsps):
+    sidebar = "<div class='sidebar'>" + "".join(
+        f"<div class='group'><p>{name.title()}</p><ul><li><a href='/docs/{name}'>List {name}</a></li>"
+        f"<li><a href='/docs/{name}#get'>Get one of the {name}</a></li>"
+        f"<li><a href='/docs/{name}#delete'>Delete one of the {name}</a></li></ul></div>"
+        for name in API_RESOURCES) + "</div>"
+    for i, name in enumerate(API_RESOURCES):
+        path = "/docs" if i == 0 else f"/docs/{name}"
+        body = f"<h1>{name.title()}</h1><p>Endpoints to manage the {name} of an account.</p>"
+        rsps.add(responses.GET, f"https://test.com{path}",
+                 body=f"<html><body><div class='layout'>{sidebar}<div class='content'>{body}</div></div></body></html>")
+
+def test_scrape_documentation_compares_near_duplicates_without_boilerplate():
+    with responses.RequestsMock(assert_all_requests_are_fired=False) as rsps:
+        add_api_reference_site(rsps)
+        deduplicator = Deduplicator()
+        result_md = scrape_documentation("https://test.com/docs", deduplicator=deduplicator)
+
+    # The sidebar is most of every page, but only the short descriptions are compared
+    assert result_md.count("<!-- Source:") == 16
+    assert deduplicator.dropped == 0
+    assert "# Imports\n\nEndpoints to manage the imports of an account." in result_md
+
+def test_process_page_converts_html_served_for_text_urls():
+    page = process_page("https://test.com/docs/guide.md", "# Guide\n\nAlready *Markdown*.\n")
+    assert page.markdown == "# Guide\n\nAlready *Markdown*."
+
+    shell = "<!DOCTYPE html><html><body><main><h1>Guide</h1></main><script>boot()</script></body></html>"
+    page = process_page("https://test.com/docs/guide.md", shell)
+    assert page.markdown == "# Guide"
+
+def test_process_page_skips_canonical_copies():
+    html = '<html><head><link rel="canonical" href="/docs/guide"></head><body><p>Copy</p></body></html>'
+    accept_docs = lambda url: url.startswith("https://test.com/docs")
+
+    page = process_page("https://test.com/docs/print/guide", html, canonical_filter=accept_docs)
+    assert (page.markdown, page.links, page.canonical) == ("", ["https://test.com/docs/guide"],
+                                                           "https://test.com/docs/guide")
+    page = process_page("https://test.com/docs/print/guide", html)
+    assert (page.markdown, page.canonical) == ("Copy", "https://test.com/docs/guide")
+    page = process_page("https://test.com/docs/guide/", html, canonical_filter=accept_docs)
+    assert page.markdown == "Copy"
+
+NEXT_ARTICLE = "# Streaming\n\nSee [the reference](/docs/reference).\n\n" + "Responses are streamed as events. " * 10
+
+def next_data_page(body: str) -> str:
+    data = {"props": {"pageProps": {"page": {"markdown": NEXT_ARTICLE}}}}
+    return (f'<html><body><nav><a href="/docs/home">Home</a></nav>{body}'
+            f'<script id="__NEXT_DATA__" type="application/json">{json.dumps(data)}</script></body></html>')
+
+def test_process_page_reads_embedded_content_of_client_rendered_pages():
+    html = next_data_page('<main><div id="__next">Loading...</div></main>')
+
+    page = process_page("https://test.com/docs/streaming", html, embedded=True)
+    assert page.markdown == NEXT_ARTICLE.strip()
+    assert page.links == ["https://test.com/docs/home", "https://test.com/docs/reference"]
+    assert process_page("https://test.com/docs/streaming", html).markdown == "Loading..."
+
+def test_process_page_keeps_rendered_dom_when_it_has_the_content():
+    rendered = "<main>" + convert_to_markdown_html(NEXT_ARTICLE) + "</main>"
+    html = next_data_page(rendered)
+
+    page = process_page("https://test.com/docs/streaming", html, embedded=True)
+    assert page == process_page("https://test.com/docs/streaming", html)
+
+def convert_to_markdown_html(markdown: str) -> str:
+    """Crude Markdown to HTML rendering of NEXT_ARTICLE, standing in for server-side rendering."""
+    blocks = markdown.strip().split("\n\n")
+    return f"<h1>{blocks[0][2:]}</h1>" + "".join(f"<p>{block}</p>" for block in blocks[1:])
+
+def test_iter_documentation_crawls_markdown_versions():
+    advertised = ('<html><head><link rel="alternate" type="text/markdown" href="/docs/index.md"></head>'
+                  '<body><main><p>Rendered home</p><a href="/docs/shell">Shell</a></main></body></html>')
+    shell = '<html><body><nav><a href="/docs">Home</a></nav><main><div id="root"></div></main></body></html>'
+    with responses.RequestsMock() as rsps:
+        rsps.add(responses.GET, "https://test.com/docs", body=advertised)
+        rsps.add(responses.GET, "https://test.com/docs/shell", body=shell)
+        rsps.add(responses.GET, "https://test.com/docs/index.md", body="# Home\n\nFrom Markdown.")
+        rsps.add(responses.GET, "https://test.com/docs/shell.md", body="# Shell\n\nAlso Markdown.")
+        result_md = scrape_documentation("https://test.com/docs", extractors=["markdown"])
+
+    assert result_md == ("<!-- Source: https://test.com/docs/index.md -->\n# Home\n\nFrom Markdown.\n\n---\n\n"
+                         "<!-- Source: https://test.com/docs/shell.md -->\n# Shell\n\nAlso Markdown.")
+
+def test_iter_documentation_crawls_markdown_versions_of_identical_shells():
+    paths = ["/docs", "/docs/a", "/docs/b", "/docs/c"]
+    shell = ("<html><body><nav><a href='/docs'>Home</a><a href='/docs/a'>A</a><a href='/docs/b'>B</a>"
+             "<a href='/docs/c'>C</a></nav><main><div id='root'></div></main></body></html>")
+    with responses.RequestsMock() as rsps:
+        for path in paths:
+            rsps.add(responses.GET, f"https://test.com{path}", body=shell)
+            rsps.add(responses.GET, f"https://test.com{path}.md", body=f"# {path}\n\nFrom Markdown.")
+        result_md = scrape_documentation("https://test.com/docs", extractors=["markdown"])
+
+    # Same HTML, but each shell has its own Markdown version
+    sources = [line for line in result_md.splitlines() if line.startswith("<!-- Source:")]
+    assert sources == [f"<!-- Source: https://test.com{path}.md -->" for path in paths]
+
+@pytest.mark.parametrize("limits,sources", [
+    ({"max_depth": 0}, ["https://test.com/docs"]),
+    ({"max_depth": 1}, ["https://test.com/docs/index.md", "https://test.com/docs/guide"]),
+    ({"max_pages": 2}, ["https://test.com/docs", "https://test.com/docs/guide"]),
+])
+def test_iter_documentation_converts_html_when_markdown_version_is_not_crawled(limits, sources):
+    def advertised(name, body):
+        return (f'<html><head><link rel="alternate" type="text/markdown" href="/docs/{name}.md"></head>'
+                f'<body><main>{body}</main></body></html>')
+    with responses.RequestsMock(assert_all_requests_are_fired=False) as rsps:
+        rsps.add(responses.GET, "https://test.com/docs",
+                 body=advertised("index", '<p>Rendered home</p><a href="/docs/guide">Guide</a>'))
+        rsps.add(responses.GET, "https://test.com/docs/guide", body=advertised("guide", "<p>Rendered guide</p>"))
+        rsps.add(responses.GET, "https://test.com/docs/index.md", body="# Home\n\nFrom Markdown.")
+        rsps.add(responses.GET, "https://test.com/docs/guide.md", body="# Guide\n\nFrom Markdown.")
+        pages = list(iter_pages("https://test.com/docs", extractors=["markdown"], **limits))
+
+    assert [page.url for page in pages] == sources
+    assert pages[-1].markdown.startswith("From Markdown." if sources[-1].endswith(".md") else "Rendered")
+
+def add_three_level_site(rsps, levels):
+    pages = {
+        "https://test.com/docs": "<main><h1>Home</h1><a href='/docs/a'>A</a><a href='/docs/b'>B</a></main>",
+        "https://test.com/docs/a": "<main><p>Page A</p><a href='/docs/a/deep'>Deep</a></main>",
+        "https://test.com/docs/b": "<main><p>Page B</p></main>",
+        "https://test.com/docs/a/deep": "<main><p>Deep page</p></main>",
+    }
+    depths = {"https://test.com/docs": 0, "https://test.com/docs/a": 1, "https://test.com/docs/b": 1,
+              "https://test.com/docs/a/deep": 2}
+    for url, body in pages.items():
+        if depths[url] in levels:
+            rsps.add(responses.GET, url, body=body)
+
+def test_iter_documentation_resumes_from_checkpoint(tmp_path):
+    path = str(tmp_path / "checkpoint.sqlite")
+    with responses.RequestsMock() as rsps:
+        add_three_level_site(rsps, levels=(0, 1, 2))
+        expected = scrape_documentation("https://test.com/docs")
+
+    # The first run stops (e.g. times out) before the deep page is reached
+    with responses.RequestsMock() as rsps:
+        add_three_level_site(rsps, levels=(0, 1))
+        checkpoint = CrawlCheckpoint(path, key="k")
+        pieces = iter_documentation("https://test.com/docs", checkpoint=checkpoint)
+        assert len([next(pieces) for _ in range(3)]) == 3
+        pieces.close()
+        checkpoint.close()
+
+    # The resumed run only fetches what is left, and produces the same document
+    with responses.RequestsMock() as rsps:
+        add_three_level_site(rsps, levels=(2,))
+        checkpoint = CrawlCheckpoint(path, key="k", resume=True)
+        resumed = scrape_documentation("https://test.com/docs", checkpoint=checkpoint)
+        checkpoint.close()
+
+    assert resumed == expected
+    assert checkpoint.restored == 3 and checkpoint.stored == 1
+
+def test_iter_documentation_page_store_gives_same_document(tmp_path):
+    with responses.RequestsMock() as rsps:
+        add_duplicated_site(rsps)
+        expected = scrape_documentation("https://test.com/docs")
+
+    page_store = PageStore()
+    checkpoint = CrawlCheckpoint(str(tmp_path / "checkpoint.sqlite"), key="k")
+    with responses.RequestsMock() as rsps:
+        add_duplicated_site(rsps)
+        assert scrape_documentation("https://test.com/docs", page_store=page_store, checkpoint=checkpoint) == expected
+    # Home, guide and v2: identical copies share a record, the canonical copy has no Markdown
+    assert len(page_store) == 3
+    # Spilled pages are checkpointed with their Markdown
+    assert checkpoint.lookup("https://test.com/docs/guide").markdown.startswith("# Guide")
+    checkpoint.close()
+    page_store.close()
+
+def test_iter_documentation_records_page_metrics():
+    metrics = Metrics()
+    set_metrics(metrics)
+    try:
+        # The deep page cannot be fetched
+        with responses.RequestsMock(assert_all_requests_are_fired=False) as rsps:
+            add_three_level_site(rsps, levels=(0, 1))
+            rsps.add(responses.GET, "https://test.com/docs/a/deep", status=404)
+            document = scrape_documentation("https://test.com/docs", client=HttpClient(retries=0))
+    finally:
+        set_metrics(None)
+
+    target = "https://test.com/docs"
+    assert metrics.counter("pages_converted", target=target) == 3
+    assert metrics.counter("pages", target=target, outcome="emitted") == 3
+    assert metrics.counter("pages", target=target, outcome="failed") == 1
+    # The Markdown of the pages, without the source comments and separators
+    assert 0 < metrics.counter("markdown_bytes", target=target) < len(document)
+    for stage in ("parse", "extract", "convert"):
+        assert metrics.histogram("stage_seconds", stage=stage, target=target).count == 3
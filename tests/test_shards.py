@@ -0,0 +1,56 @@
+import json
+from src.shards import ShardBuilder, path_segments
+
+BASE = "https://test.com/docs"
+
+def build(pages, max_bytes=200):
+    builder = ShardBuilder("Test Doc", BASE, max_bytes=max_bytes)
+    for url, markdown in pages.items():
+        builder.add(url, markdown)
+    shards = dict(builder.finish())
+    manifest = json.loads(builder.manifest())
+    builder.close()
+    return shards, manifest
+
+def test_path_segments():
+    assert path_segments("https://test.com/docs/api/errors", BASE) == ["api", "errors"]
+    assert path_segments("https://test.com/docs", BASE) == []
+    assert path_segments("https://test.com/docsearch/a", BASE) == []
+    assert path_segments("https://other.com/docs/api/errors", BASE) == []
+
+PAGES = {
+    "https://test.com/docs": "# Home",
+    "https://test.com/docs/quickstart": "# Quickstart",
+    "https://test.com/docs/api/errors": "# Errors\n\n" + "Errors are returned as JSON. " * 3,
+    "https://test.com/docs/api": "# API",
+    "https://test.com/docs/api/auth": "# Auth\n\n" + "Pass the key in a header. " * 3,
+    "https://test.com/docs/guides/streaming": "# Streaming ünïcode",
+}
+
+def test_shards_group_pages_by_section_and_bound_their_size():
+    shards, manifest = build(PAGES)
+
+    assert sorted(shards) == ["Test Doc - api - Parte 1", "Test Doc - api - Parte 2",
+                              "Test Doc - guides - Parte 1", "Test Doc - index - Parte 1"]
+    # Pages are ordered by URL within a section; the API landing page joins its section
+    assert shards["Test Doc - api - Parte 1"].startswith("<!-- Source: https://test.com/docs/api -->\n# API")
+    assert shards["Test Doc - index - Parte 1"] == ("<!-- Source: https://test.com/docs -->\n# Home\n\n---\n\n"
+                                                    "<!-- Source: https://test.com/docs/quickstart -->\n# Quickstart")
+    assert all(len(content.encode("utf-8")) <= 200 for content in shards.values())
+
+def test_manifest_locates_every_page():
+    shards, manifest = build(PAGES)
+
+    assert set(manifest["pages"]) == set(PAGES)
+    assert set(manifest["shards"]) == {f"{name}.txt" for name in shards}
+    for url, entry in manifest["pages"].items():
+        content = shards[entry["shard"][:-len(".txt")]].encode("utf-8")
+        assert content[entry["offset"]:entry["offset"] + entry["length"]].decode("utf-8") == (
+            f"<!-- Source: {url} -->\n{PAGES[url]}")
+
+def test_page_change_only_changes_its_section():
+    before, _ = build(PAGES)
+    after, _ = build({**PAGES, "https://test.com/docs/guides/streaming": "# Streaming v2"})
+
+    changed = [name for name in before if before[name] != after[name]]
+    assert changed == ["Test Doc - guides - Parte 1"]
@@ -0,0 +1,40 @@
+import pytest
+from src.url_filter import UrlFilter
+
+BASE = "https://openrouter.ai/docs"
+
+def test_url_filter_scope_only():
+    url_filter = UrlFilter(BASE)
+    assert url_filter("https://openrouter.ai/docs/quickstart")
+    assert not url_filter("https://openrouter.ai/pricing")
+    assert not url_filter("https://external.com/docs")
+
+def test_url_filter_ignore_paths():
+    url_filter = UrlFilter(BASE, ignore_paths=["/sdks/", "/components/", "/operations/"])
+    assert url_filter("https://openrouter.ai/docs/quickstart")
+    assert not url_filter("https://openrouter.ai/docs/sdks/python")
+    assert not url_filter("https://openrouter.ai/docs/api/components/schemas")
+    # Only the path is checked, not the query string
+    assert url_filter("https://openrouter.ai/docs/search?q=/sdks/")
+
+def test_url_filter_glob_and_regex_rules():
+    url_filter = UrlFilter(
+        BASE,
+        include=["/docs/api/*", "re:^/docs/guides?/"],
+        exclude=["*/deprecated/*", "re:v[0-9]+$"],
+    )
+    assert url_filter("https://openrouter.ai/docs/api/chat")
+    assert url_filter("https://openrouter.ai/docs/guide/intro")
+    assert url_filter("https://openrouter.ai/docs/guides/intro")
+    assert not url_filter("https://openrouter.ai/docs/quickstart")
+    assert not url_filter("https://openrouter.ai/docs/api/deprecated/chat")
+    assert not url_filter("https://openrouter.ai/docs/api/chat/v2")
+
+def test_url_filter_carries_limits():
+    url_filter = UrlFilter(BASE, max_depth=2, max_pages=100)
+    assert url_filter.max_depth == 2
+    assert url_filter.max_pages == 100
+
+def test_url_filter_invalid_regex():
+    with pytest.raises(ValueError, match="Invalid regular expression"):
+        UrlFilter(BASE, exclude=["re:(unclosed"])